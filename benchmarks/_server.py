@@ -0,0 +1,222 @@
+"""
+Minimal local HTTPS stand-ins for PayWay used by the benchmarks.
+
+Answer every request with a canned JSON body, after an optional delay, over
+HTTP/1.1 keep-alive or HTTP/2, and count the TCP connections accepted, so a
+benchmark can show how many handshakes a client paid for. The HTTP/2 server
+imports h2 (``python-payway[http2]``) only when it starts.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import h2.connection
+
+
+def make_self_signed_cert(directory: Path) -> tuple[Path, Path]:
+    """
+    Create a throwaway certificate for 127.0.0.1 with the openssl CLI
+    """
+    certfile, keyfile = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(  # noqa: S603
+        [  # noqa: S607
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout",
+            str(keyfile),
+            "-out",
+            str(certfile),
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return certfile, keyfile
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once
+    request_queue_size = 128
+    connections = 0
+    body = b"{}"
+    latency = 0.0
+
+    def count_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def server_activate(self) -> None:
+        self._lock = threading.Lock()
+        super().server_activate()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+    server: StandInServer
+
+    def setup(self) -> None:
+        # One handler instance per accepted connection
+        super().setup()
+        self.server.count_connection()
+
+    def _respond(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond  # noqa: N815
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+@contextmanager
+def https_stand_in(body: dict[str, Any], *, latency: float = 0.0) -> Iterator[tuple[StandInServer, str, Path]]:
+    """
+    Serve ``body`` over HTTPS on a free local port, ``latency`` seconds after each request.
+    Yields the server, its base URL and the certificate to verify it with.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = make_self_signed_cert(Path(directory))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(certfile, keyfile)
+        server = StandInServer(("127.0.0.1", 0), StandInHandler)
+        server.body = json.dumps(body).encode()
+        server.latency = latency
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server, f"https://127.0.0.1:{server.server_address[1]}/rest/v1", certfile
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class H2StandInServer:
+    """
+    HTTP/2 over TLS on an asyncio loop in a background thread. Requests on a
+    connection are answered independently, each ``latency`` seconds after it
+    arrives, so concurrent streams overlap as they would at PayWay.
+    """
+
+    def __init__(self, body: bytes, latency: float, context: ssl.SSLContext) -> None:
+        self.body = body
+        self.latency = latency
+        self.context = context
+        self.connections = 0
+        self.port = 0
+        self._loop = asyncio.new_event_loop()
+        self._started = threading.Event()
+        self._stopped: asyncio.Event | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._handlers: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._stopped.set)
+        self._thread.join()
+
+    async def _serve(self) -> None:
+        self._stopped = asyncio.Event()
+        server = await asyncio.start_server(self._connection, "127.0.0.1", 0, ssl=self.context)
+        self.port = server.sockets[0].getsockname()[1]
+        self._started.set()
+        async with server:
+            await self._stopped.wait()
+        for writer in list(self._writers):
+            writer.transport.abort()
+        if self._handlers:
+            await asyncio.wait(self._handlers)
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+
+        self.connections += 1
+        self._writers.add(writer)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        handler.add_done_callback(self._handlers.discard)
+        connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False))
+        connection.initiate_connection()
+        writer.write(connection.data_to_send())
+        loop = asyncio.get_running_loop()
+        try:
+            while data := await reader.read(65535):
+                for event in connection.receive_data(data):
+                    if isinstance(event, h2.events.StreamEnded):
+                        loop.call_later(self.latency, self._respond, connection, writer, event.stream_id)
+                writer.write(connection.data_to_send())
+        except (ConnectionError, ssl.SSLError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _respond(self, connection: h2.connection.H2Connection, writer: asyncio.StreamWriter, stream_id: int) -> None:
+        import h2.connection
+
+        if writer.is_closing() or connection.state_machine.state == h2.connection.ConnectionState.CLOSED:
+            return
+        headers = [(":status", "200"), ("content-type", "application/json"), ("content-length", str(len(self.body)))]
+        connection.send_headers(stream_id, headers)
+        connection.send_data(stream_id, self.body, end_stream=True)
+        writer.write(connection.data_to_send())
+
+
+@contextmanager
+def h2_stand_in(body: dict[str, Any], *, latency: float = 0.0) -> Iterator[tuple[H2StandInServer, str, Path]]:
+    """
+    Serve ``body`` over HTTP/2 (TLS with ALPN h2) on a free local port, ``latency`` seconds after each request.
+    Yields the server, its base URL and the certificate to verify it with.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        certfile, keyfile = make_self_signed_cert(Path(directory))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(certfile, keyfile)
+        context.set_alpn_protocols(["h2"])
+        server = H2StandInServer(json.dumps(body).encode(), latency, context)
+        server.start()
+        try:
+            yield server, f"https://127.0.0.1:{server.port}/rest/v1", certfile
+        finally:
+            server.stop()
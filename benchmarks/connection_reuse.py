@@ -0,0 +1,78 @@
+"""
+Compare a fresh connection per call (the old module-level ``requests.get``)
+with the Client's pooled keep-alive session, against a local HTTPS stand-in,
+and a new client's first call with and without ``warm_up``.
+
+    python -m benchmarks.connection_reuse --requests 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+
+import requests
+
+from benchmarks._server import https_stand_in
+from payway.client import Client
+from payway.test_utils import load_json_file
+
+
+def run(label: str, calls: int, send: Callable[[], requests.Response], connections: Callable[[], int]) -> None:
+    before = connections()
+    start = time.perf_counter()
+    for _ in range(calls):
+        send().raise_for_status()
+    elapsed = time.perf_counter() - start
+    print(  # noqa: T201
+        f"{label:<22} {calls / elapsed:8.1f} req/s  {elapsed / calls * 1000:6.2f} ms/req  "
+        f"{connections() - before:4d} connections"
+    )
+
+
+def first_call(label: str, base_url: str, certfile: str, *, warm: bool, samples: int = 20) -> None:
+    """
+    Median time of a new client's first call, e.g. the first payment after a worker starts
+    """
+    times = []
+    for _ in range(samples):
+        client = Client("TEST", "0000000A", "SECRET", "PUBLISHABLE", api_url=base_url)
+        client.session.verify = certfile
+        client.session.trust_env = False
+        if warm:
+            client.warm_up(1)
+        start = time.perf_counter()
+        client.get_request(f"{base_url}/transactions/1179985404").raise_for_status()
+        times.append(time.perf_counter() - start)
+        client.close()
+    print(f"{label:<22} {sorted(times)[samples // 2] * 1000:6.2f} ms first call (median)")  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with https_stand_in(load_json_file("tests/data/transaction.json")) as (server, base_url, certfile):
+        endpoint = f"{base_url}/transactions/1179985404"
+        client = Client("TEST", "0000000A", "SECRET", "PUBLISHABLE")
+        client.session.verify = str(certfile)
+        # REQUESTS_CA_BUNDLE would otherwise override the session's verify setting
+        client.session.trust_env = False
+
+        def fresh_connection() -> requests.Response:
+            return requests.get(endpoint, auth=(client.secret_api_key, ""), timeout=30, verify=str(certfile))
+
+        def pooled_connection() -> requests.Response:
+            return client.get_request(endpoint)
+
+        run("requests.get per call", args.requests, fresh_connection, lambda: server.connections)
+        run("Client pooled session", args.requests, pooled_connection, lambda: server.connections)
+        client.close()
+        first_call("cold client", base_url, str(certfile), warm=False)
+        first_call("after warm_up(1)", base_url, str(certfile), warm=True)
+
+
+if __name__ == "__main__":
+    main()
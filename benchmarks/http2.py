@@ -0,0 +1,75 @@
+"""
+Compare the HTTP/1.1 connection pool with HTTP/2 multiplexing under
+concurrency, against local HTTPS stand-ins that answer after a fixed delay:
+TCP connections opened, throughput and latency percentiles.
+
+    python -m benchmarks.http2 --requests 2000 --concurrency 64 --latency 0.02
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._server import h2_stand_in, https_stand_in
+from payway.bench import percentile
+from payway.client import Client
+from payway.test_utils import load_json_file
+from payway.transport import HTTP2Transport, RequestsTransport, Transport
+
+
+def run(label: str, transport: Transport, base_url: str, connections: Callable[[], int], args: argparse.Namespace) -> None:
+    client = Client("TEST", "0000000A", "SECRET", "PUBLISHABLE", api_url=base_url, coalesce_gets=False, transport=transport)
+    endpoint = f"{base_url}/transactions/1179985404"
+
+    def call(_: int) -> float:
+        start = time.perf_counter()
+        client.get_request(endpoint).raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        latencies = sorted(pool.map(call, range(args.requests)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    p50, p99 = (percentile(latencies, fraction) * 1000 for fraction in (0.5, 0.99))
+    print(  # noqa: T201
+        f"{label:<10} {connections():5d} connections {args.requests / elapsed:8.0f} req/s  "
+        f"p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  max {latencies[-1] * 1000:6.1f} ms"
+    )
+
+
+def requests_transport(certfile: str, concurrency: int) -> RequestsTransport:
+    transport = RequestsTransport(pool_maxsize=concurrency)
+    transport.verify = certfile
+    # REQUESTS_CA_BUNDLE would otherwise override the session's verify setting
+    transport.trust_env = False
+    return transport
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the stand-ins take to answer")
+    parser.add_argument("--connections", type=int, default=2, help="HTTP/2 connections")
+    parser.add_argument("--streams", type=int, default=100, help="HTTP/2 requests in flight at once")
+    args = parser.parse_args()
+    body = load_json_file("tests/data/transaction.json")
+
+    with https_stand_in(body, latency=args.latency) as (server, base_url, certfile):
+        run("HTTP/1.1", requests_transport(str(certfile), args.concurrency), base_url, lambda: server.connections, args)
+    with h2_stand_in(body, latency=args.latency) as (h2_server, base_url, certfile):
+        run(
+            "HTTP/2",
+            HTTP2Transport(args.connections, args.streams, ca_certs=str(certfile)),
+            base_url,
+            lambda: h2_server.connections,
+            args,
+        )
+
+
+if __name__ == "__main__":
+    main()
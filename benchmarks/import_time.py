@@ -0,0 +1,109 @@
+"""
+Time ``import payway.client`` in fresh interpreters with ``-X importtime`` and
+check it against a budget: the cold-start cost a serverless handler pays
+before it can serve its first request.
+
+    python -m benchmarks.import_time                     # exit 1 if over budget
+    python -m benchmarks.import_time --module payway --budget 5 --top 5
+
+Two things are checked. The import must stay under ``--budget`` milliseconds,
+taking the fastest of ``--runs`` interpreters since cold-start noise only ever
+adds time. And it must not load any of the DEFERRED modules, which the client
+imports on its first call instead: that check doesn't depend on how fast the
+machine is, so it catches a stray top-level ``import requests`` on any runner.
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+ROOT = Path(__file__).resolve().parent.parent
+# Milliseconds for ``import payway.client``; a few times what a laptop takes, so
+# slow CI runners pass while a heavy new top-level import still shows up.
+BUDGET_MS = 120.0
+# Packages the blocking client must only import once it sends a request
+DEFERRED = frozenset({"requests", "urllib3", "httpx", "httpcore", "h2", "asyncio", "ssl", "certifi"})
+
+
+class ImportTime(NamedTuple):
+    self_us: int
+    cumulative_us: int
+
+
+def import_times(statement: str) -> dict[str, ImportTime]:
+    """
+    Every module a fresh interpreter imports to run ``statement``, interpreter
+    startup included, with the microseconds spent in it alone and including
+    what it imported
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time:       269 |        269 |   payway
+        _, _, fields = line.partition("import time:")
+        self_us, cumulative_us, name = (field.strip() for field in fields.split("|"))
+        if self_us.isdigit():
+            times[name] = ImportTime(int(self_us), int(cumulative_us))
+    return times
+
+
+def fastest(module: str, runs: int) -> dict[str, ImportTime]:
+    """
+    The modules ``import module`` loads beyond interpreter startup, timed in
+    the run in which ``module`` itself imported fastest
+    """
+    startup = import_times("pass")
+    times = min((import_times(f"import {module}") for _ in range(runs)), key=lambda times: times[module].cumulative_us)
+    return {name: time for name, time in times.items() if name not in startup}
+
+
+def deferred_imports(times: dict[str, ImportTime]) -> list[str]:
+    """
+    The DEFERRED packages among ``times``
+    """
+    return sorted({name.partition(".")[0] for name in times} & DEFERRED)
+
+
+def report(module: str, times: dict[str, ImportTime], top: int) -> str:
+    own = sorted((name for name in times if name.partition(".")[0] == "payway"), key=lambda name: -times[name].self_us)
+    lines = [f"import {module}: {times[module].cumulative_us / 1000:.1f} ms, {len(times)} modules", ""]
+    lines.append(f"{'payway module':<28} {'self ms':>8} {'total ms':>9}")
+    lines.extend(f"{name:<28} {times[name].self_us / 1000:>8.1f} {times[name].cumulative_us / 1000:>9.1f}" for name in own[:top])
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="payway.client")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="milliseconds")
+    parser.add_argument("--runs", type=int, default=5, help="interpreters to start; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="payway modules to list, slowest first")
+    args = parser.parse_args(argv)
+
+    times = fastest(args.module, args.runs)
+    print(report(args.module, times, args.top))  # noqa: T201
+    failed = False
+    elapsed = times[args.module].cumulative_us / 1000
+    if elapsed > args.budget:
+        print(f"OVER BUDGET import {args.module} took {elapsed:.1f} ms (budget {args.budget:.0f} ms)")  # noqa: T201
+        failed = True
+    deferred = deferred_imports(times)
+    if deferred:
+        print(f"EAGER IMPORTS import {args.module} loaded {', '.join(deferred)}")  # noqa: T201
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
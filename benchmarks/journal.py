@@ -0,0 +1,66 @@
+"""
+Measure how many payment-journal records per second a Journal makes durable
+with group commit, as the number of threads writing at once grows. One thread
+pays a whole fsync per record; more threads share each fsync.
+
+    python -m benchmarks.journal --threads 1 8 64 --records 2000
+    python -m benchmarks.journal --directory /var/lib/payway   # the disk you'll journal to
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from payway.journal import Journal
+
+BODY = {"transactionType": "payment", "customerNumber": "1", "principalAmount": "10.00", "orderNumber": "order-1"}
+
+
+def run(directory: Path, threads: int, records: int, *, fsync: bool) -> None:
+    """
+    ``threads`` threads each begin and finish ``records / threads / 2`` payments
+    """
+    path = directory / f"journal-{threads}"
+    path.unlink(missing_ok=True)
+    journal = Journal(path, fsync=fsync)
+    per_thread = max(records // threads // 2, 1)
+
+    def write(worker: int) -> None:
+        for number in range(per_thread):
+            key = f"{worker}-{number}"
+            journal.begin(key, "/transactions", BODY)
+            journal.finish(key, 200)
+
+    workers = [threading.Thread(target=write, args=(worker,)) for worker in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    journal.close()
+    print(  # noqa: T201
+        f"{threads:>4} threads {journal.records / elapsed:10.0f} records/s  "
+        f"{journal.records / journal.commits:6.1f} records/commit  {elapsed / journal.records * 1e6:8.1f} us/record"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--records", type=int, default=4000, help="records to write per run")
+    parser.add_argument("--directory", type=Path, help="where to write the journal; a temporary directory by default")
+    parser.add_argument("--no-fsync", action="store_true", help="flush to the OS only, without fsync")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        for threads in args.threads:
+            run(Path(directory), threads, args.records, fsync=not args.no_fsync)
+
+
+if __name__ == "__main__":
+    main()
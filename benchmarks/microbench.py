@@ -0,0 +1,201 @@
+"""
+Time the pure-CPU hot paths (model parsing and serialisation, error parsing,
+snake_to_camel and request body building) on the tests/data fixtures and on a
+scaled-up transaction page, and compare them with a stored baseline.
+
+    python -m benchmarks.microbench                  # compare with the baseline, exit 1 on regressions
+    python -m benchmarks.microbench --save           # record a new baseline
+    python -m benchmarks.microbench --threshold 0.1 --case page
+
+Timings are divided by a fixed pure-Python calibration loop measured just before
+each case, so a baseline recorded on one machine stays usable on a faster or
+slower one. ``--save`` keeps the fastest of a few runs, and cases over the
+threshold are measured twice more before they count. Re-record the baseline when
+a change is meant to make a case slower.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import platform
+import sys
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from payway.client import Client
+from payway.constants import PaymentMethod
+from payway.metrics import Metrics
+from payway.model import PaymentError, PayWayCard, PayWayCustomer, PayWayPayment, PayWayTransaction
+from payway.utils import snake_to_camel
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / "tests" / "data"
+BASELINE = Path(__file__).resolve().parent / "baselines" / "microbench.json"
+
+
+def load(name: str) -> dict[str, Any]:
+    return json.loads((DATA / name).read_text())
+
+
+def transaction_page(rows: int) -> dict[str, Any]:
+    """
+    A search-transactions page with ``rows`` copies of the card transaction fixture
+    """
+    row = load("card_transaction.json")
+    data = [copy.deepcopy(row) | {"transactionId": row["transactionId"] + n} for n in range(rows)]
+    return {"data": data, "links": [{"rel": "self", "href": "https://api.payway.com.au/rest/v1/transactions"}]}
+
+
+def error_body(errors: int) -> dict[str, Any]:
+    return {"data": [{"fieldName": f"field{n}", "message": "Invalid value", "fieldValue": str(n)} for n in range(errors)]}
+
+
+def cases(rows: int) -> dict[str, Callable[[], object]]:
+    transaction_json = load("card_transaction.json")
+    transaction = PayWayTransaction.from_dict(transaction_json)
+    customer_json = load("customer.json")
+    customer = PayWayCustomer.from_dict(customer_json)
+    page = transaction_page(rows)
+    errors = error_body(5)
+    card = PayWayCard(card_number="4564710000000004", cvn="847", expiry_date_month="02", expiry_date_year="29")
+    payment = PayWayPayment(transaction_type="payment", customer_number="1", amount=10, currency="aud", order_number="1")
+    client = Client("TEST", "0000000A", "TSECRET-API-KEY", "TPUBLISHABLE-API-KEY")
+    metrics = Metrics()
+    names = [f.name for f in PayWayTransaction.__dataclass_fields__.values()]
+    return {
+        "transaction.from_dict": lambda: PayWayTransaction.from_dict(transaction_json),
+        "transaction.to_dict": transaction.to_dict,
+        "customer.from_dict": lambda: PayWayCustomer.from_dict(customer_json),
+        "customer.to_dict": customer.to_dict,
+        "payment.to_dict": payment.to_dict,
+        "payment_error.from_dict": lambda: PaymentError.from_dict(errors),
+        "snake_to_camel": lambda: [snake_to_camel(name) for name in names],
+        "create_token.body": lambda: client._token_data(card, PaymentMethod.CARD),  # noqa: SLF001
+        "refund_transaction.body": lambda: client._refund_data(1179985404, 10.5, order_id="5100", ip_address="127.0.0.1"),  # noqa: SLF001
+        f"transaction_page.from_dict[{rows}]": lambda: [PayWayTransaction.from_dict(row) for row in page["data"]],
+        f"transaction_page.lazy[{rows}]": lambda: [PayWayTransaction.from_dict(row, lazy=True) for row in page["data"]],
+        "metrics.observe": lambda: metrics.observe("process_payment", "200", "ok", 0.042),
+    }
+
+
+def calibration() -> None:
+    """
+    Fixed interpreter work that the case timings are divided by
+    """
+    table = {}
+    for n in range(200):
+        table[f"key{n}"] = n * n
+    sorted(table.items(), key=lambda item: -item[1])
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """
+    Best seconds per call over ``repeat`` runs of an auto-sized loop
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(selected: dict[str, Callable[[], object]], repeat: int) -> dict[str, Any]:
+    """
+    Each case is calibrated just before it is timed, so load that comes and goes
+    on the machine during a run is divided out of the case it lands on
+    """
+    results = {}
+    for name, function in selected.items():
+        unit = measure(calibration, repeat)
+        seconds = measure(function, repeat)
+        results[name] = {"seconds": seconds, "calibration": unit, "relative": seconds / unit}
+    return {"python": platform.python_version(), "machine": platform.machine(), "cases": results}
+
+
+def keep_fastest(current: dict[str, Any], again: dict[str, Any]) -> None:
+    for name, result in again["cases"].items():
+        if result["relative"] < current["cases"][name]["relative"]:
+            current["cases"][name] = result
+
+
+def confirm(
+    selected: dict[str, Callable[[], object]], current: dict[str, Any], baseline: dict[str, Any], threshold: float, repeat: int
+) -> dict[str, float]:
+    """
+    Regressions that are still there after the flagged cases are measured twice
+    more; ``current`` keeps each case's fastest measurement
+    """
+    suspects = regressions(current, baseline, threshold)
+    for _ in range(2):
+        if not suspects:
+            break
+        keep_fastest(current, run({name: selected[name] for name in suspects}, repeat))
+        suspects = regressions(current, baseline, threshold)
+    return suspects
+
+
+def regressions(current: dict[str, Any], baseline: dict[str, Any], threshold: float) -> dict[str, float]:
+    """
+    Cases whose calibrated time grew by more than ``threshold`` (0.3 = 30%)
+    over the baseline, with their new/old ratio; cases missing from either side are skipped
+    """
+    found = {}
+    for name, result in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            continue
+        ratio = result["relative"] / before["relative"]
+        if ratio > 1 + threshold:
+            found[name] = ratio
+    return found
+
+
+def report(current: dict[str, Any], baseline: dict[str, Any] | None) -> str:
+    lines = [f"{'case':<36} {'us/call':>10} {'baseline':>10} {'change':>8}"]
+    for name, result in current["cases"].items():
+        before = (baseline or {}).get("cases", {}).get(name)
+        line = f"{name:<36} {result['seconds'] * 1e6:>10.2f}"
+        if before is not None:
+            ratio = result["relative"] / before["relative"]
+            expected = before["relative"] * result["calibration"] * 1e6
+            line += f" {expected:>10.2f} {ratio - 1:>+8.0%}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed slowdown, 0.3 = 30%%")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows in the scaled transaction page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=3, help="with --save, keep the fastest of this many runs")
+    parser.add_argument("--case", default="", help="only run cases whose name contains this")
+    args = parser.parse_args(argv)
+
+    selected = {name: function for name, function in cases(args.rows).items() if args.case in name}
+    current = run(selected, args.repeat)
+    for _ in range(args.rounds - 1 if args.save else 0):
+        keep_fastest(current, run(selected, args.repeat))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+    if args.save:
+        print(report(current, baseline))  # noqa: T201
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        # with --case, only the cases that ran are replaced
+        saved = {**current, "cases": {**(baseline or {}).get("cases", {}), **current["cases"]}}
+        args.baseline.write_text(json.dumps(saved, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")  # noqa: T201
+        return
+    slower = confirm(selected, current, baseline, args.threshold, args.repeat) if baseline else {}
+    print(report(current, baseline))  # noqa: T201
+    for name, ratio in slower.items():
+        print(f"REGRESSION {name}: {ratio:.2f}x the baseline (threshold {1 + args.threshold:.2f}x)")  # noqa: T201
+    if slower:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
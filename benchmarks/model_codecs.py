@@ -0,0 +1,73 @@
+"""
+Compare PayWayModel.to_dict/from_dict using the per-class compiled field plan
+with the previous per-call ``dataclasses.fields()`` + ``snake_to_camel()`` loop,
+on the transaction and customer fixtures in tests/data.
+
+    python -m benchmarks.model_codecs --number 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from collections.abc import Callable
+from dataclasses import fields
+from typing import Any
+
+from payway.model import PayWayModel, PayWayPayment, PayWayTransaction
+from payway.test_utils import load_json_file
+from payway.utils import snake_to_camel
+
+
+def uncompiled_to_dict(model: PayWayModel) -> dict[str, Any]:
+    result = {}
+    for f in fields(model):
+        if f.metadata.get("exclude"):
+            continue
+        value = getattr(model, f.name)
+        if isinstance(value, PayWayModel):
+            value = uncompiled_to_dict(value)
+        result[f.metadata.get("alias", snake_to_camel(f.name))] = value
+    return result
+
+
+def uncompiled_from_dict(cls: type[PayWayModel], data: dict[str, Any]) -> PayWayModel:
+    kwargs = {}
+    for f in fields(cls):
+        value = data.get(f.metadata.get("alias", snake_to_camel(f.name)))
+        converter = f.metadata.get("from_dict")
+        if converter is not None and value is not None:
+            value = converter(value)
+        kwargs[f.name] = value
+    instance = cls(**kwargs)
+    instance.raw = data
+    return instance
+
+
+def compare(label: str, before: Callable[[], object], after: Callable[[], object], number: int) -> None:
+    old = min(timeit.repeat(before, number=number, repeat=5)) / number * 1e6
+    new = min(timeit.repeat(after, number=number, repeat=5)) / number * 1e6
+    print(f"{label:<32} {old:7.2f} us -> {new:7.2f} us  ({old / new:4.2f}x)")  # noqa: T201
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    transaction_json = load_json_file("tests/data/card_transaction.json")
+    transaction = PayWayTransaction.from_dict(transaction_json)
+    payment = PayWayPayment(transaction_type="payment", customer_number="1", amount=10, currency="aud", order_number="1")
+
+    compare(
+        "PayWayTransaction.from_dict",
+        lambda: uncompiled_from_dict(PayWayTransaction, transaction_json),
+        lambda: PayWayTransaction.from_dict(transaction_json),
+        args.number,
+    )
+    compare("PayWayTransaction.to_dict", lambda: uncompiled_to_dict(transaction), transaction.to_dict, args.number)
+    compare("PayWayPayment.to_dict", lambda: uncompiled_to_dict(payment), lambda: PayWayModel.to_dict(payment), args.number)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Measure the memory held per parsed PayWayTransaction: the previous
+``__dict__``-backed models against the slotted ones, with ``raw`` kept,
+compressed or dropped. Each transaction is parsed from its own ``json.loads``
+of tests/data/card_transaction.json, as it would be from a response.
+
+    python -m benchmarks.model_memory --number 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import field, fields, make_dataclass
+from pathlib import Path
+
+from payway.constants import RawBody
+from payway.model import Merchant, PayWayCard, PayWayModel, PayWayTransaction
+
+FIXTURE = Path(__file__).resolve().parent.parent / "tests" / "data" / "card_transaction.json"
+
+
+def unslotted(model: type[PayWayModel], nested: dict[str, type[PayWayModel]] | None = None) -> type[PayWayModel]:
+    """
+    A copy of ``model`` as a plain dataclass, so each instance has a ``__dict__``
+    like the models did before they were slotted
+    """
+    nested = nested or {}
+    specs = []
+    for f in fields(model):
+        metadata = dict(f.metadata)
+        if f.name in nested:
+            metadata["from_dict"] = nested[f.name].from_dict
+        specs.append((f.name, f.type, field(default=f.default, metadata=metadata)))
+    return make_dataclass(f"Unslotted{model.__name__}", specs, bases=(PayWayModel,))
+
+
+def retained_per_model(parse: Callable[[str], PayWayModel], body: str, number: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    models = [parse(body) for _ in range(number)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del models
+    return current / number
+
+
+def instance_size(model: object) -> int:
+    return sys.getsizeof(model) + (sys.getsizeof(model.__dict__) if hasattr(model, "__dict__") else 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    body = FIXTURE.read_text()
+    unslotted_transaction = unslotted(PayWayTransaction, {"card": unslotted(PayWayCard), "merchant": unslotted(Merchant)})
+    data = json.loads(body)
+    before = instance_size(unslotted_transaction.from_dict(data))
+    after = instance_size(PayWayTransaction.from_dict(data))
+    print(f"{'PayWayTransaction instance':<34} {before:7d} B -> {after:7d} B")  # noqa: T201
+
+    variants = {
+        "__dict__ models, raw kept": lambda text: unslotted_transaction.from_dict(json.loads(text)),
+        "slotted, raw kept": lambda text: PayWayTransaction.from_dict(json.loads(text)),
+        "slotted, raw compressed": lambda text: PayWayTransaction.from_dict(json.loads(text), raw_body=RawBody.COMPRESS),
+        "slotted, raw dropped": lambda text: PayWayTransaction.from_dict(json.loads(text), raw_body=RawBody.DROP),
+    }
+    baseline = None
+    for label, parse in variants.items():
+        size = retained_per_model(parse, body, args.number)
+        baseline = baseline or size
+        print(f"{label:<34} {size:7.0f} B per transaction ({size / baseline:4.0%})")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
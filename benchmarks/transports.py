@@ -0,0 +1,85 @@
+"""
+Compare the Client's transports: per-call overhead (one thread, sequential
+calls) and throughput (several threads sharing one client) against the local
+PayWay emulator. The in-memory transport skips HTTP altogether, so it shows
+the cost of the client itself.
+
+    python -m benchmarks.transports --requests 2000 --threads 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from payway.client import Client
+from payway.model import PayWayCard, PayWayPayment
+from payway.testing.emulator import Emulator
+from payway.transport import RequestsTransport, Transport, Urllib3Transport
+
+CREDENTIALS = {
+    "merchant_id": "TEST",
+    "bank_account_id": "0000000A",
+    "secret_api_key": "SECRET",
+    "publishable_api_key": "PUBLISHABLE",
+}
+
+
+def transports(emulator: Emulator, threads: int) -> dict[str, Callable[[], Transport]]:
+    return {
+        "requests": lambda: RequestsTransport(pool_maxsize=threads),
+        "urllib3": lambda: Urllib3Transport(pool_maxsize=threads),
+        "in-memory": emulator.transport,
+    }
+
+
+def seed_transaction(client: Client) -> str:
+    card = PayWayCard(card_number="4564710000000004", cvn="847", expiry_date_month="02", expiry_date_year="29")
+    token, _ = client.create_card_token(card)
+    transaction, _ = client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+    return transaction.transaction_id
+
+
+def timed(calls: int, threads: int, call: Callable[[], object]) -> float:
+    """
+    Seconds to make ``calls`` calls spread over ``threads`` threads
+    """
+    start = time.perf_counter()
+    if threads == 1:
+        for _ in range(calls):
+            call()
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            for _ in pool.map(lambda _: call(), range(calls)):
+                pass
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with Emulator() as emulator:
+        print(f"{'transport':<10} {'sequential':>14} {f'{args.threads} threads':>16}")  # noqa: T201
+        for name, make in transports(emulator, args.threads).items():
+            client = Client(**CREDENTIALS, api_url=emulator.url, coalesce_gets=False, transport=make())
+            transaction_id = seed_transaction(client)
+
+            def call(client: Client = client, transaction_id: str = transaction_id) -> object:
+                return client.get_transaction(transaction_id)
+
+            timed(50, 1, call)  # warm the pool
+            sequential = timed(args.requests, 1, call)
+            threaded = timed(args.requests, args.threads, call)
+            client.close()
+            print(  # noqa: T201
+                f"{name:<10} {sequential / args.requests * 1e6:8.0f} us/call {args.requests / threaded:10.0f} req/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+PayWay REST API client.
+
+The names below are imported from their modules on first access, so
+``import payway`` is almost free and ``payway.Client`` loads only what the
+blocking client needs: requests and urllib3 wait for its first call, httpx
+for an AsyncClient.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from payway.async_client import AsyncClient
+    from payway.breaker import CircuitBreaker
+    from payway.cache import LRUCache, TransactionCache
+    from payway.client import Client
+    from payway.exceptions import PaywayError
+    from payway.hooks import AttemptEvent, ParseEvent
+    from payway.journal import Journal
+    from payway.metrics import Metrics
+    from payway.model import BankAccount, PaymentError, PaymentSetup, PayWayCard, PayWayCustomer, PayWayPayment, PayWayTransaction
+    from payway.ratelimit import RateLimiter
+    from payway.retry import RetryBudget, RetryPolicy
+    from payway.transport import HTTP2Transport, InMemoryTransport, RequestsTransport, Urllib3Transport
+
+# public name -> module it is defined in
+_EXPORTS = {
+    "AsyncClient": "payway.async_client",
+    "AttemptEvent": "payway.hooks",
+    "BankAccount": "payway.model",
+    "CircuitBreaker": "payway.breaker",
+    "Client": "payway.client",
+    "HTTP2Transport": "payway.transport",
+    "InMemoryTransport": "payway.transport",
+    "Journal": "payway.journal",
+    "LRUCache": "payway.cache",
+    "Metrics": "payway.metrics",
+    "ParseEvent": "payway.hooks",
+    "PayWayCard": "payway.model",
+    "PayWayCustomer": "payway.model",
+    "PayWayPayment": "payway.model",
+    "PayWayTransaction": "payway.model",
+    "PaymentError": "payway.model",
+    "PaymentSetup": "payway.model",
+    "PaywayError": "payway.exceptions",
+    "RateLimiter": "payway.ratelimit",
+    "RequestsTransport": "payway.transport",
+    "RetryBudget": "payway.retry",
+    "RetryPolicy": "payway.retry",
+    "TransactionCache": "payway.cache",
+    "Urllib3Transport": "payway.transport",
+}
+
+__all__ = [
+    "AsyncClient",
+    "AttemptEvent",
+    "BankAccount",
+    "CircuitBreaker",
+    "Client",
+    "HTTP2Transport",
+    "InMemoryTransport",
+    "Journal",
+    "LRUCache",
+    "Metrics",
+    "ParseEvent",
+    "PayWayCard",
+    "PayWayCustomer",
+    "PayWayPayment",
+    "PayWayTransaction",
+    "PaymentError",
+    "PaymentSetup",
+    "PaywayError",
+    "RateLimiter",
+    "RequestsTransport",
+    "RetryBudget",
+    "RetryPolicy",
+    "TransactionCache",
+    "Urllib3Transport",
+]
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    module = _EXPORTS.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(import_module(module), name)
+    # later lookups find it without calling back in here
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,606 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from http import HTTPStatus
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Self
+
+from payway.base import BaseClient
+from payway.batch import alookup_customers, alookup_transactions
+from payway.breaker import CircuitBreaker
+from payway.cache import Cache
+from payway.constants import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_READ_TIMEOUT,
+    PAYWAY_API_URL,
+    EndpointFamily,
+    PaymentMethod,
+    RawBody,
+)
+from payway.customers import customer_from_list_item
+from payway.hooks import Hook, current_attempt, instrument
+from payway.idempotency import noting_idempotency_key
+from payway.metrics import Metrics
+from payway.model import (
+    BankAccount,
+    PaymentError,
+    PaymentSetup,
+    PayWayCard,
+    PayWayCustomer,
+    PayWayPayment,
+    PayWayTransaction,
+    TokenResponse,
+)
+from payway.pagination import apaginate, page_json
+from payway.ratelimit import RateLimiter
+from payway.retry import RetryPolicy
+from payway.singleflight import AsyncSingleFlight, request_key
+from payway.utils import endpoint_family, json_result
+
+if TYPE_CHECKING:
+    from payway.journal import Journal
+
+try:
+    import httpx
+except ImportError as exc:  # pragma: no cover
+    msg = "AsyncClient requires httpx: pip install 'python-payway[async]'"
+    raise ImportError(msg) from exc
+
+logger = getLogger(__name__)
+
+
+async def _trace_attempt(request: httpx.Request) -> None:
+    """
+    httpx request hook: send the connection and response-header trace events to the attempt in flight
+    """
+    attempt = current_attempt.get()
+    if attempt is not None:
+        request.extensions["trace"] = attempt.trace
+
+
+def _drop_none(values: dict[str, Any] | None) -> dict[str, Any] | None:
+    # requests omits None form fields and query params; httpx would send them as empty strings
+    if values is None:
+        return None
+    return {key: value for key, value in values.items() if value is not None}
+
+
+class StreamLimit(httpx.AsyncBaseTransport):
+    """
+    Caps the requests in flight through ``transport`` at once: over HTTP/2, the
+    streams open on its connections. Each holds its slot until its body is read.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_streams: int) -> None:
+        self.transport = transport
+        self._streams = asyncio.Semaphore(max_streams)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        async with self._streams:
+            response = await self.transport.handle_async_request(request)
+            await response.aread()
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class AsyncClient(BaseClient):
+    """
+    asyncio twin of ``payway.client.Client``: the same methods and ``(result, errors)``
+    return values, awaited over a pooled, non-blocking httpx connection pool.
+    """
+
+    request_errors = (httpx.HTTPError,)
+    retryable_errors = (httpx.TransportError,)
+    stale_connection_errors = (httpx.NetworkError, httpx.RemoteProtocolError)
+
+    def __init__(  # noqa: PLR0913
+        self,
+        merchant_id: str,
+        bank_account_id: str,
+        secret_api_key: str,
+        publishable_api_key: str,
+        max_retries: int = 0,
+        retry_delay: float = 1.0,
+        *,
+        api_url: str = PAYWAY_API_URL,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_connections: int | None = None,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        transport: httpx.AsyncBaseTransport | None = None,
+        http2: bool = False,
+        max_streams: int | None = None,
+        lazy_parsing: bool = False,
+        raw_body: RawBody | str = RawBody.KEEP,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        customer_cache: Cache | None = None,
+        transaction_cache: Cache | None = None,
+        coalesce_gets: bool = True,
+        hooks: Iterable[Hook] | None = None,
+        metrics: Metrics | None = None,
+        auto_idempotency_keys: bool = False,
+        journal: Journal | None = None,
+    ) -> None:
+        """
+        :param merchant_id: PayWay Merchant ID
+        :param bank_account_id: PayWay Bank Account ID
+        :param secret_api_key: PayWay Secret APi Key
+        :param publishable_api_key: PayWay Publishable API Key
+        :param max_retries: retries per request on network errors and HTTP 429/503 (0 disables)
+        :param retry_delay: base seconds to wait between attempts (Retry-After header wins if present)
+        :param api_url: PayWay REST API base URL, e.g. a local emulator's
+        :param pool_maxsize: idle keep-alive connections kept open
+        :param max_connections: cap on open connections, in use or idle (None for no cap)
+        :param connect_timeout: seconds to wait for a connection to PayWay
+        :param read_timeout: seconds to wait for PayWay to send a response
+        :param lazy_parsing: build nested models (card, merchant, payment setup) only when first read
+        :param raw_body: "keep" the response body on each model's ``raw``, "compress" it, or "drop" it
+        :param rate_limiter: RateLimiter to pace requests with; share one between clients using the same credentials
+        :param retry_policy: RetryPolicy with jittered backoff, a retry budget and a deadline; replaces max_retries and retry_delay
+        :param circuit_breaker: CircuitBreaker that fails requests fast while an endpoint family is failing
+        :param customer_cache: Cache (e.g. LRUCache) that get_customer reads through; customer updates invalidate it
+        :param transaction_cache: Cache (e.g. TransactionCache) that get_transaction reads through; voids and refunds update it
+        :param coalesce_gets: let concurrent identical GETs share one request and its response
+        :param hooks: callables given an AttemptEvent per HTTP attempt and a ParseEvent per parsed response
+        :param metrics: Metrics to record each call's latency, status, retry outcome and PayWay response code in
+        :param transport: httpx transport to send through, e.g. ``httpx.MockTransport`` in tests
+        :param http2: multiplex concurrent calls as HTTP/2 streams over the pool's connections (needs ``python-payway[http2]``)
+        :param max_streams: cap on requests in flight at once; further calls wait for one to finish
+        :param auto_idempotency_keys: send every POST with an Idempotency-Key, so all POSTs can be retried (see payway.idempotency)
+        :param journal: Journal to record payment POSTs in before sending them, so ``payway.journal.recover`` can settle
+            those a crash left unanswered; implies auto_idempotency_keys
+        """
+        super().__init__(
+            merchant_id,
+            bank_account_id,
+            secret_api_key,
+            publishable_api_key,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            api_url=api_url,
+            lazy_parsing=lazy_parsing,
+            raw_body=raw_body,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            customer_cache=customer_cache,
+            transaction_cache=transaction_cache,
+            hooks=hooks,
+            metrics=metrics,
+            auto_idempotency_keys=auto_idempotency_keys,
+            journal=journal,
+        )
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.single_flight: AsyncSingleFlight[httpx.Response] | None = AsyncSingleFlight() if coalesce_gets else None
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=pool_maxsize)
+        if max_streams is not None:
+            transport = StreamLimit(transport or httpx.AsyncHTTPTransport(http2=http2, limits=limits), max_streams)
+        self.session = httpx.AsyncClient(
+            auth=(self.secret_api_key, ""),
+            http2=http2,
+            limits=limits,
+            timeout=self.timeout,
+            transport=transport,
+            event_hooks={"request": [_trace_attempt]},
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the client's pooled connections
+        """
+        await self.session.aclose()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def get_request(self, endpoint: str, params: dict[str, Any] | None = None) -> httpx.Response:
+        """
+        Concurrent identical GETs share one request (see coalesce_gets); cancelling
+        one caller leaves it running for the rest
+        """
+
+        def fetch() -> Awaitable[httpx.Response]:
+            return self._send_with_retries(
+                "GET",
+                endpoint,
+                lambda timeout: self.session.get(endpoint, params=_drop_none(params), timeout=timeout),
+                can_retry=True,
+            )
+
+        if self.single_flight is None:
+            return await fetch()
+        return await self.single_flight.do(request_key(endpoint, params), fetch)
+
+    async def post_request(
+        self, endpoint: str, data: dict[str, Any], auth: tuple[str, str] | None = None, idempotency_key: str | None = None
+    ) -> httpx.Response:
+        """
+        Supply an idempotency_key to avoid duplicate POSTs
+        https://www.payway.com.au/docs/rest.html#avoiding-duplicate-posts
+        Inside an ``operation``, or with auto_idempotency_keys, one is generated
+        when none is given. Keyed POSTs can be retried. The key is noted on
+        exceptions raised here. With a journal, payment POSTs are recorded (in a
+        worker thread, as the journal blocks on fsync) as they are handed to the
+        transport and again once PayWay has answered them.
+        """
+        idempotency_key = self._idempotency_key(endpoint, idempotency_key)
+        headers = {"content-type": "application/x-www-form-urlencoded"}
+        if idempotency_key:
+            headers["Idempotency-Key"] = idempotency_key
+        journal = self.journal if self._journalled(endpoint, idempotency_key) else None
+
+        async def send(attempt_timeout: httpx.Timeout | Any) -> httpx.Response:  # noqa: ANN401
+            if journal is not None:
+                await asyncio.to_thread(journal.begin, idempotency_key, endpoint, data)
+            return await self.session.post(
+                endpoint, data=_drop_none(data), auth=auth or httpx.USE_CLIENT_DEFAULT, headers=headers, timeout=attempt_timeout
+            )
+
+        with noting_idempotency_key(idempotency_key):
+            response = await self._send_with_retries(
+                "POST",
+                endpoint,
+                send,
+                can_retry=bool(idempotency_key),
+                transaction_type=data.get("transactionType"),
+            )
+        if journal is not None and response.status_code < HTTPStatus.INTERNAL_SERVER_ERROR:
+            # a 5xx leaves the outcome unknown, so the entry stays for recover()
+            await asyncio.to_thread(journal.finish, idempotency_key, response.status_code)
+        return response
+
+    async def _send_with_retries(
+        self,
+        method: str,
+        endpoint: str,
+        send: Callable[[httpx.Timeout | Any], Awaitable[httpx.Response]],
+        can_retry: bool,  # noqa: FBT001
+        *,
+        transaction_type: str | None = None,
+    ) -> httpx.Response:
+        """
+        Same retry rules as Client._send_with_retries, waiting with asyncio.sleep
+        so other payments keep running while this one backs off.
+        """
+        family = endpoint_family(endpoint)
+        call = self.retry_policy.call(can_retry=can_retry)
+        with self._measure(method, endpoint, transaction_type) as attempts:
+            while True:
+                with instrument(self.hooks, method, endpoint, call.number) as attempt:
+                    attempts.append(attempt)
+                    try:
+                        response = attempt.response = await self._send(
+                            family, lambda: send(self._attempt_timeout(call.remaining()))
+                        )
+                    except self.retryable_errors as exc:
+                        attempt.error = exc
+                        wait = self._wait_after_error(call, exc, attempt)
+                    else:
+                        wait = self._wait_after_response(call, response)
+                    attempt.retry_wait = wait
+                if wait is None:
+                    return response
+                await asyncio.sleep(wait)
+
+    def _attempt_timeout(self, remaining: float | None) -> httpx.Timeout | Any:  # noqa: ANN401
+        """
+        The client's timeouts, shortened to fit a deadline of ``remaining`` seconds
+        """
+        if remaining is None:
+            return httpx.USE_CLIENT_DEFAULT
+        timeout = self.timeout
+        return httpx.Timeout(
+            connect=min(timeout.connect or remaining, remaining),
+            read=min(timeout.read or remaining, remaining),
+            write=min(timeout.write or remaining, remaining),
+            pool=min(timeout.pool or remaining, remaining),
+        )
+
+    async def _send(self, family: EndpointFamily | None, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        self._before_send(family)
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire(family)
+        try:
+            response = await send()
+        except self.request_errors:
+            self._send_failed(family)
+            raise
+        self._after_send(family, response)
+        return response
+
+    # No Idempotency-Key is sent on PUTs, PATCHes or DELETEs, so they are never retried
+    async def put_request(self, endpoint: str, data: dict[str, Any]) -> httpx.Response:
+        return await self._send_with_retries(
+            "PUT",
+            endpoint,
+            lambda timeout: self.session.put(
+                endpoint,
+                data=_drop_none(data),
+                headers={"content-type": "application/x-www-form-urlencoded"},
+                timeout=timeout,
+            ),
+            can_retry=False,
+        )
+
+    async def patch_request(self, endpoint: str, data: dict[str, Any]) -> httpx.Response:
+        return await self._send_with_retries(
+            "PATCH",
+            endpoint,
+            lambda timeout: self.session.patch(endpoint, data=_drop_none(data), timeout=timeout),
+            can_retry=False,
+        )
+
+    async def delete_request(self, endpoint: str) -> httpx.Response:
+        return await self._send_with_retries(
+            "DELETE", endpoint, lambda timeout: self.session.delete(endpoint, timeout=timeout), can_retry=False
+        )
+
+    async def create_token(
+        self, payway_obj: BankAccount | PayWayCard, payment_method: PaymentMethod | str, idempotency_key: str | None = None
+    ) -> tuple[TokenResponse | None, list[PaymentError] | None]:
+        """
+        Creates a single use token for a Customer's payment setup (credit card or bank account)
+        :param payway_obj:   object: one of model.PayWayCard or model.BankAccount object
+        :param payment_method:   PaymentMethod or str: one of `card` or `direct_debit`
+        :param idempotency_key:   str: unique value to avoid duplicate POSTs
+        """
+        data = self._token_data(payway_obj, payment_method)
+        key = self._idempotency_key(self.token_url, idempotency_key)
+        logger.info("Sending Create Token request to PayWay.")
+        response = await self.post_request(
+            self.token_url,
+            data,
+            auth=(self.publishable_api_key, ""),
+            idempotency_key=key,
+        )
+        return self._parse_response(response, TokenResponse, idempotency_key=key)
+
+    async def create_card_token(
+        self, card: PayWayCard, idempotency_key: str | None = None
+    ) -> tuple[TokenResponse | None, list[PaymentError] | None]:
+        """
+        :param card:    PayWayCard object represents a customer's credit card details
+        :param idempotency_key:   str: unique value to avoid duplicate POSTs
+        """
+        return await self.create_token(card, PaymentMethod.CARD, idempotency_key=idempotency_key)
+
+    async def create_bank_account_token(
+        self, bank_account: BankAccount, idempotency_key: str | None = None
+    ) -> tuple[TokenResponse | None, list[PaymentError] | None]:
+        """
+        :param bank_account:    BankAccount object represents a customer's bank account
+        :param idempotency_key:   str: unique value to avoid duplicate POSTs
+        """
+        return await self.create_token(bank_account, PaymentMethod.DIRECT_DEBIT, idempotency_key=idempotency_key)
+
+    async def create_customer(
+        self, customer: PayWayCustomer, idempotency_key: str | None = None
+    ) -> tuple[PayWayCustomer | None, list[PaymentError] | None]:
+        """
+        Create a customer in PayWay system (see Client.create_customer)
+        :param customer:    PayWayCustomer object represents a customer in PayWay
+        :param idempotency_key:   str: unique value to avoid duplicate POSTs
+        """
+        data = self._customer_data(customer)
+        endpoint = self._customer_endpoint(customer)
+        logger.info("Sending Create Customer request to PayWay.")
+        if customer.custom_id:
+            response = await self.put_request(endpoint, data)
+            self._invalidate_customer(customer.custom_id)
+            return self._parse_response(response, PayWayCustomer)
+        key = self._idempotency_key(endpoint, idempotency_key)
+        response = await self.post_request(endpoint, data, idempotency_key=key)
+        return self._parse_response(response, PayWayCustomer, idempotency_key=key)
+
+    async def process_payment(
+        self, payment: PayWayPayment, idempotency_key: str | None = None
+    ) -> tuple[PayWayTransaction | None, list[PaymentError] | None]:
+        """
+        Process an individual payment against a Customer with active Recurring Billing setup.
+        :param payment: PayWayPayment object (see model.PayWayPayment)
+        :param idempotency_key:   str: unique value to avoid duplicate POSTs
+        """
+        key = self._idempotency_key(self.transaction_url, idempotency_key)
+        logger.info("Sending Process Payment request to PayWay.")
+        response = await self.post_request(self.transaction_url, payment.to_dict(), idempotency_key=key)
+        return self._parse_response(response, PayWayTransaction, idempotency_key=key)
+
+    async def get_transaction(self, transaction_id: int) -> tuple[PayWayTransaction | None, list[PaymentError] | None]:
+        """
+        Lookup and return a transaction if found in PayWay
+        :param transaction_id: str  A PayWay transaction ID
+        Served from the client's transaction_cache when it has the transaction.
+        """
+        transaction = self._cached_transaction(transaction_id)
+        if transaction is not None:
+            return transaction, None
+        response = await self.get_request(f"{self.transaction_url}/{transaction_id}")
+        return self._parse_transaction(response)
+
+    async def void_transaction(
+        self, transaction_id: int, idempotency_key: str | None = None
+    ) -> tuple[PayWayTransaction | None, list[PaymentError] | None]:
+        """
+        Void a transaction in PayWay
+        :param transaction_id: str  A PayWay transaction ID
+        :param idempotency_key:   str: unique value to avoid duplicate POSTs
+        """
+        endpoint = f"{self.transaction_url}/{transaction_id}/void"
+        key = self._idempotency_key(endpoint, idempotency_key)
+        response = await self.post_request(endpoint, data={}, idempotency_key=key)
+        return self._parse_transaction(response, idempotency_key=key)
+
+    async def refund_transaction(
+        self,
+        transaction_id: int,
+        amount: float,
+        order_id: str | None = None,
+        ip_address: str | None = None,
+        idempotency_key: str | None = None,
+    ) -> tuple[PayWayTransaction | None, list[PaymentError] | None]:
+        """
+        Refund a transaction in PayWay
+        :param transaction_id: str  A PayWay transaction ID
+        :param amount:  str  amount to refund
+        :param order_id:  str  optional reference number
+        :param ip_address:  str  optional IP address
+        :param idempotency_key:   str: unique value to avoid duplicate POSTs
+        """
+        data = self._refund_data(transaction_id, amount, order_id=order_id, ip_address=ip_address)
+        key = self._idempotency_key(self.transaction_url, idempotency_key)
+        response = await self.post_request(self.transaction_url, data, idempotency_key=key)
+        return self._parse_transaction(response, stale=transaction_id, idempotency_key=key)
+
+    async def get_customer(self, customer_id: str) -> tuple[PayWayCustomer | None, list[PaymentError] | None]:
+        """
+        Returns a PayWay Customer's Payment Setup, [Payment] Schedule, Contact Details, Custom Fields and Notes
+        :param customer_id  str PayWay customer ID in PayWay system
+        Served from the client's customer_cache when it has the customer.
+        """
+        customer = self._cached_customer(customer_id)
+        if customer is not None:
+            return customer, None
+        response = await self.get_request(f"{self.customer_url}/{customer_id}")
+        return self._parse_customer(customer_id, response)
+
+    async def get_transactions(
+        self, transaction_ids: Iterable[int], *, concurrency: int = 50
+    ) -> dict[int, tuple[PayWayTransaction | None, list[PaymentError] | None]]:
+        """
+        Look up many transactions at once (see Client.get_transactions). To stream a
+        very large list use batch.alookup_transactions.
+        :param transaction_ids: transaction IDs; duplicates are looked up once
+        :param concurrency: lookups in flight at once
+        """
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        results = alookup_transactions(self, transaction_ids, concurrency=concurrency)
+        found = {key: (model, errors) async for key, model, errors in results}
+        return {key: found[key] for key in transaction_ids}
+
+    async def get_customers(
+        self, customer_ids: Iterable[str], *, concurrency: int = 50
+    ) -> dict[str, tuple[PayWayCustomer | None, list[PaymentError] | None]]:
+        """
+        Look up many customers at once (see Client.get_customers). To stream a
+        very large list use batch.alookup_customers.
+        :param customer_ids: PayWay customer numbers; duplicates are looked up once
+        :param concurrency: lookups in flight at once
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        results = alookup_customers(self, customer_ids, concurrency=concurrency)
+        found = {key: (model, errors) async for key, model, errors in results}
+        return {key: found[key] for key in customer_ids}
+
+    async def update_payment_setup(self, token: str, customer_id: str) -> tuple[PaymentSetup | None, list[PaymentError] | None]:
+        """
+        Updates the Customer's Payment Setup with a new Credit Card or Bank Account.
+        :param token: PayWay credit card or bank account token
+        :param customer_id: PayWay customer ID
+        """
+        endpoint = f"{self.customer_url}/{customer_id}/payment-setup"
+        response = await self.put_request(endpoint, self._payment_setup_data(token))
+        self._invalidate_customer(customer_id)
+        return self._parse_response(response, PaymentSetup)
+
+    # Customer and transaction search methods: see CustomerRequest and TransactionRequest
+
+    async def delete_customer(self, customer_number: int) -> Any:  # noqa: ANN401
+        response = await self.delete_request(f"{self.customer_url}/{customer_number}")
+        self._invalidate_customer(customer_number)
+        return json_result(response)
+
+    async def schedule_payments(
+        self,
+        customer_number: int,
+        frequency: str,
+        next_payment_date: str,
+        regular_amount: int,
+        next_amount: int | None = None,
+    ) -> Any:  # noqa: ANN401
+        data = {
+            "frequency": frequency,
+            "nextPaymentDate": next_payment_date,
+            "nextPrincipalAmount": next_amount,
+            "regularPrincipalAmount": regular_amount,
+        }
+        response = await self.put_request(f"{self.customer_url}/{customer_number}/schedule", data=data)
+        self._invalidate_customer(customer_number)
+        return json_result(response)
+
+    async def stop_schedule(self, customer_number: int) -> Any:  # noqa: ANN401
+        response = await self.delete_request(f"{self.customer_url}/{customer_number}/schedule")
+        self._invalidate_customer(customer_number)
+        return json_result(response)
+
+    async def stop_all_payments(self, customer_number: int) -> Any:  # noqa: ANN401
+        endpoint = f"{self.customer_url}/{customer_number}/payment-setup"
+        response = await self.patch_request(endpoint, data={"stopped": "true"})
+        self._invalidate_customer(customer_number)
+        return json_result(response)
+
+    async def start_all_payments(self, customer_number: int) -> Any:  # noqa: ANN401
+        endpoint = f"{self.customer_url}/{customer_number}/payment-setup"
+        response = await self.patch_request(endpoint, data={"stopped": "false"})
+        self._invalidate_customer(customer_number)
+        return json_result(response)
+
+    async def update_contact_details(
+        self, customer_number: int, customer: PayWayCustomer | None = None, **options: dict[str, Any]
+    ) -> Any:  # noqa: ANN401
+        data = {}
+        if customer:
+            data.update(customer.to_dict())
+        data.update(options)
+        response = await self.put_request(f"{self.customer_url}/{customer_number}/contact", data=data)
+        self._invalidate_customer(customer_number)
+        return json_result(response)
+
+    async def list_customers(self, page: int | None = None) -> Any:  # noqa: ANN401
+        return json_result(await self.get_request(self.customer_url, params={"page": page}))
+
+    async def _search(self, path: str, params: dict[str, Any]) -> Any:  # noqa: ANN401
+        return json_result(await self.get_request(f"{self.transaction_url}/{path}", params=params))
+
+    async def search_transactions_by_customer(self, customer_number: int | str, page: int | None = None) -> Any:  # noqa: ANN401
+        return await self._search("search-customer", {"customerNumber": customer_number, "page": page})
+
+    async def search_transactions_by_receipt(self, receipt_number: int | str, page: int | None = None) -> Any:  # noqa: ANN401
+        return await self._search("search-receipt", {"receiptNumber": receipt_number, "page": page})
+
+    async def search_transactions_by_order(self, order_number: str, page: int | None = None) -> Any:  # noqa: ANN401
+        return await self._search("search-order", {"orderNumber": order_number, "page": page})
+
+    def iter_customers(self) -> AsyncIterator[PayWayCustomer]:
+        """
+        Iterate over every customer in PayWay (``async for``), fetching the next page
+        while the current one is consumed.
+        """
+
+        async def fetch_page(page: int | None) -> dict[str, Any]:
+            return page_json(await self.get_request(self.customer_url, params={"page": page}))
+
+        return apaginate(fetch_page, lambda item: customer_from_list_item(item, lazy=self.lazy_parsing, raw_body=self.raw_body))
+
+    def _iter_search(self, path: str, params: dict[str, Any]) -> AsyncIterator[PayWayTransaction]:
+        async def fetch_page(page: int | None) -> dict[str, Any]:
+            return page_json(await self.get_request(f"{self.transaction_url}/{path}", params={**params, "page": page}))
+
+        return apaginate(fetch_page, lambda item: self._from_dict(PayWayTransaction, item))
+
+    def iter_transactions_by_customer(self, customer_number: int | str) -> AsyncIterator[PayWayTransaction]:
+        return self._iter_search("search-customer", {"customerNumber": customer_number})
+
+    def iter_transactions_by_receipt(self, receipt_number: int | str) -> AsyncIterator[PayWayTransaction]:
+        return self._iter_search("search-receipt", {"receiptNumber": receipt_number})
+
+    def iter_transactions_by_order(self, order_number: str) -> AsyncIterator[PayWayTransaction]:
+        return self._iter_search("search-order", {"orderNumber": order_number})
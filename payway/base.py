@@ -0,0 +1,424 @@
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from http import HTTPStatus
+from logging import getLogger
+from typing import TYPE_CHECKING, Any, Protocol, TypeVar
+
+from payway.breaker import CircuitBreaker
+from payway.cache import Cache, customer_key, transaction_key
+from payway.constants import (
+    BANK_ACCOUNT_PAYMENT_CHOICE,
+    CREDIT_CARD_PAYMENT_CHOICE,
+    PAYWAY_API_URL,
+    PAYWAY_ERROR_RESPONSE_CODES,
+    RETRYABLE_STATUS_CODES,
+    VALID_PAYMENT_METHOD_CHOICES,
+    EndpointFamily,
+    PaymentMethod,
+    RawBody,
+)
+from payway.exceptions import PaywayError
+from payway.hooks import Attempt, Hook, ParseEvent, emit
+from payway.idempotency import idempotency_key, noting_idempotency_key
+from payway.metrics import Metrics, operation_name
+from payway.model import BankAccount, PaymentError, PayWayCard, PayWayCustomer, PayWayModel, PayWayTransaction, ServerError
+from payway.ratelimit import RateLimiter
+from payway.retry import LinearRetryPolicy, RetryCall, RetryPolicy
+from payway.utils import endpoint_family, endpoint_template
+
+if TYPE_CHECKING:
+    from payway.journal import Journal
+
+logger = getLogger(__name__)
+
+M = TypeVar("M", bound=PayWayModel)
+
+
+class HTTPResponse(Protocol):
+    """
+    The parts of an HTTP response the clients read: satisfied by both
+    ``requests.Response`` and ``httpx.Response``.
+    """
+
+    status_code: int
+
+    @property
+    def url(self) -> Any: ...  # noqa: ANN401
+
+    @property
+    def request(self) -> Any: ...  # noqa: ANN401
+
+    @property
+    def headers(self) -> Mapping[str, str]: ...
+
+    def json(self) -> Any: ...  # noqa: ANN401
+
+
+def retry_after_seconds(response: HTTPResponse) -> float | None:
+    """
+    The delay in a response's Retry-After header, if it gives one in seconds
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    return None
+
+
+def _with_idempotency_key(errors: list[PaymentError], idempotency_key: str | None) -> list[PaymentError]:
+    for error in errors:
+        error.idempotency_key = idempotency_key
+    return errors
+
+
+class BaseClient:
+    """
+    Credentials, request bodies and response validation shared by the
+    blocking ``Client`` and the asyncio ``AsyncClient``. Subclasses supply the
+    transport.
+    """
+
+    merchant_id = ""
+    bank_account_id = ""
+    secret_api_key = ""
+    publishable_api_key = ""
+    # Exceptions the transport raises when a request fails to complete
+    request_errors: tuple[type[Exception], ...] = ()
+    # Connection errors and timeouts, which the retry policy may retry
+    retryable_errors: tuple[type[Exception], ...] = ()
+    # Network errors that, on a reused pooled connection, mean the server had closed it
+    stale_connection_errors: tuple[type[Exception], ...] = ()
+
+    def __init__(  # noqa: PLR0913
+        self,
+        merchant_id: str,
+        bank_account_id: str,
+        secret_api_key: str,
+        publishable_api_key: str,
+        max_retries: int = 0,
+        retry_delay: float = 1.0,
+        *,
+        api_url: str = PAYWAY_API_URL,
+        lazy_parsing: bool = False,
+        raw_body: RawBody | str = RawBody.KEEP,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        customer_cache: Cache | None = None,
+        transaction_cache: Cache | None = None,
+        hooks: Iterable[Hook] | None = None,
+        metrics: Metrics | None = None,
+        auto_idempotency_keys: bool = False,
+        journal: Journal | None = None,
+    ) -> None:
+        self._validate_credentials(
+            merchant_id,
+            bank_account_id,
+            secret_api_key,
+            publishable_api_key,
+        )
+        self.merchant_id = merchant_id
+        self.bank_account_id = bank_account_id
+        self.secret_api_key = secret_api_key
+        self.publishable_api_key = publishable_api_key
+        self.api_url = api_url.rstrip("/")
+        self.token_url = f"{self.api_url}/single-use-tokens"
+        self.transaction_url = f"{self.api_url}/transactions"
+        self.customer_url = f"{self.api_url}/customers"
+        self.retry_policy = retry_policy or LinearRetryPolicy(max_retries, base_delay=retry_delay)
+        self.lazy_parsing = lazy_parsing
+        self.raw_body = RawBody(raw_body)
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.customer_cache = customer_cache
+        self.transaction_cache = transaction_cache
+        self.hooks: list[Hook] = list(hooks or ())
+        self.metrics = metrics
+        # a journalled POST needs a key to be replayed with
+        self.auto_idempotency_keys = auto_idempotency_keys or journal is not None
+        self.journal = journal
+
+    def _validate_credentials(
+        self,
+        merchant_id: str,
+        bank_account_id: str,
+        secret_api_key: str,
+        publishable_api_key: str,
+    ) -> None:
+        if any(not key for key in (secret_api_key, publishable_api_key)):
+            logger.error("PayWay API keys not found")
+            raise PaywayError(
+                message="PayWay API keys not found",
+                code="INVALID_API_KEYS",
+            )
+        if any(not val for val in (merchant_id, bank_account_id)):
+            logger.error("Merchant ID or bank account ID invalid")
+            raise PaywayError(
+                message="Invalid credentials",
+                code="INVALID_API_CREDENTIALS",
+            )
+
+    @property
+    def max_retries(self) -> int:
+        return self.retry_policy.max_retries
+
+    @property
+    def retry_delay(self) -> float:
+        return self.retry_policy.base_delay
+
+    def _wait_after_error(self, call: RetryCall, exc: Exception, attempt: Attempt) -> float:
+        """
+        Seconds to wait before resending after a network error, or re-raise it.
+        A request that failed on a reused pooled connection is resent at once.
+        """
+        stale = attempt.reused_connection and not attempt.new_connection
+        if stale and isinstance(exc, self.stale_connection_errors) and call.resend_stale():
+            logger.info("PayWay closed a pooled connection (%s), resending", exc)
+            return 0.0
+        wait = call.next_wait(None)
+        if wait is None:
+            raise exc
+        logger.warning("PayWay request failed (%s), retrying", exc)
+        return wait
+
+    def _wait_after_response(self, call: RetryCall, response: HTTPResponse) -> float | None:
+        """
+        Seconds to wait before resending after a 429/503, or None to return the response
+        """
+        if response.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+        wait = call.next_wait(retry_after_seconds(response))
+        if wait is not None:
+            logger.warning("PayWay responded %s, retrying", response.status_code)
+        return wait
+
+    def _before_send(self, family: EndpointFamily | None) -> None:
+        """
+        Fail fast if the family's circuit is open
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_send(family)
+
+    def _send_failed(self, family: EndpointFamily | None) -> None:
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(family, None)
+
+    def _after_send(self, family: EndpointFamily | None, response: HTTPResponse) -> None:
+        """
+        Report the response to the circuit breaker, and slow the rate limiter down
+        when PayWay answers 429 or asks us to back off
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(family, response.status_code)
+        if self.rate_limiter is None:
+            return
+        retry_after = retry_after_seconds(response)
+        if response.status_code == HTTPStatus.TOO_MANY_REQUESTS or retry_after is not None:
+            self.rate_limiter.throttled(family, retry_after)
+
+    @contextmanager
+    def _measure(self, method: str, endpoint: str, transaction_type: str | None = None) -> Iterator[list[Attempt]]:
+        """
+        Record a call's latency, final status and retry outcome in the client's
+        metrics. The retry loop appends each attempt to the yielded list.
+        """
+        attempts: list[Attempt] = []
+        if self.metrics is None:
+            yield attempts
+            return
+        started = time.perf_counter()
+        try:
+            yield attempts
+        finally:
+            operation = operation_name(method, endpoint, transaction_type)
+            self.metrics.observe_call(operation, attempts[-1] if attempts else None, time.perf_counter() - started)
+
+    def _token_data(self, payway_obj: BankAccount | PayWayCard, payment_method: PaymentMethod | str) -> dict[str, Any]:
+        try:
+            payment_method = PaymentMethod(payment_method)
+        except ValueError as exc:
+            valid_payment_method_choices = ", ".join(VALID_PAYMENT_METHOD_CHOICES)
+            raise PaywayError(
+                message=f"Invalid payment method. Must be one of {valid_payment_method_choices}",
+                code="INVALID_PAYMENT_METHOD",
+            ) from exc
+        data = payway_obj.to_dict()
+        if payment_method is PaymentMethod.CARD:
+            data["paymentMethod"] = CREDIT_CARD_PAYMENT_CHOICE
+        else:
+            data["paymentMethod"] = BANK_ACCOUNT_PAYMENT_CHOICE
+        return data
+
+    def _customer_data(self, customer: PayWayCustomer) -> dict[str, Any]:
+        data = customer.to_dict()
+        data.update(
+            {"merchantId": self.merchant_id, "bankAccountId": self.bank_account_id},
+        )
+        return data
+
+    def _customer_endpoint(self, customer: PayWayCustomer) -> str:
+        """
+        POST /customers to have PayWay generate the customer number
+        PUT /customers/{customerNumber} to use your own customer number
+        """
+        if customer.custom_id:
+            return f"{self.customer_url}/{customer.custom_id}"
+        return f"{self.customer_url}"
+
+    @staticmethod
+    def _refund_data(
+        transaction_id: int,
+        amount: float,
+        order_id: str | None = None,
+        ip_address: str | None = None,
+    ) -> dict[str, Any]:
+        data = {
+            "transactionType": "refund",
+            "parentTransactionId": transaction_id,
+            "principalAmount": amount,
+        }
+        if order_id:
+            data["orderNumber"] = order_id
+        if ip_address:
+            data["customerIpAddress"] = ip_address
+        return data
+
+    def _payment_setup_data(self, token: str) -> dict[str, Any]:
+        return {
+            "singleUseTokenId": token,
+            "merchantId": self.merchant_id,
+            "bankAccountId": self.bank_account_id,
+        }
+
+    def _from_dict(self, model: type[M], data: dict[str, Any]) -> M:
+        return model.from_dict(data, lazy=self.lazy_parsing, raw_body=self.raw_body)
+
+    def _idempotency_key(self, endpoint: str, key: str | None) -> str | None:
+        """
+        The Idempotency-Key to send on a POST to ``endpoint``: the caller's ``key``,
+        else one from the current operation or, with auto_idempotency_keys, a random one
+        """
+        return key or idempotency_key(endpoint, auto=self.auto_idempotency_keys)
+
+    def _journalled(self, endpoint: str, key: str | None) -> bool:
+        """
+        Whether a POST to ``endpoint`` is recorded in the journal: keyed POSTs to the
+        transactions endpoints are, token and customer POSTs aren't
+        """
+        return self.journal is not None and key is not None and endpoint_family(endpoint) is EndpointFamily.TRANSACTIONS
+
+    def _parse_response(
+        self,
+        response: HTTPResponse,
+        model: type[M],
+        keep: Callable[[dict[str, Any]], None] | None = None,
+        *,
+        idempotency_key: str | None = None,
+    ) -> tuple[M | None, list[PaymentError] | None]:
+        """
+        Validate a response and parse its JSON body into ``model``
+        :param keep: called with the JSON body of a successful response, e.g. to cache it
+        :param idempotency_key: the key the request was POSTed with, set on the model
+            or the errors and noted on a PaywayError
+        """
+        with noting_idempotency_key(idempotency_key):
+            errors = self._validate_response(response)
+        if errors:
+            return None, _with_idempotency_key(errors, idempotency_key)
+        started = time.perf_counter()
+        data = response.json()
+        decoded = time.perf_counter()
+        result = self._from_dict(model, data)
+        result.idempotency_key = idempotency_key
+        if self.metrics is not None:
+            self._count_response_code(response, result)
+        if self.hooks:
+            seconds = {"json": decoded - started, "parse": time.perf_counter() - decoded}
+            emit(self.hooks, ParseEvent(model.__name__, endpoint_template(str(response.url)), response.status_code, **seconds))
+        if keep is not None:
+            keep(data)
+        return result, errors
+
+    def _count_response_code(self, response: HTTPResponse, result: PayWayModel) -> None:
+        response_code = getattr(result, "response_code", None)
+        if response_code is not None and self.metrics is not None:
+            transaction_type = getattr(result, "transaction_type", None)
+            operation = operation_name(response.request.method, str(response.url), transaction_type)
+            self.metrics.count_response_code(operation, response_code)
+
+    def _cached_customer(self, customer_id: str) -> PayWayCustomer | None:
+        if self.customer_cache is None:
+            return None
+        data = self.customer_cache.get(customer_key(customer_id))
+        return None if data is None else self._from_dict(PayWayCustomer, data)
+
+    def _parse_customer(self, customer_id: str, response: HTTPResponse) -> tuple[PayWayCustomer | None, list[PaymentError] | None]:
+        """
+        Parse a GET /customers/{customerNumber} response, caching it if there is a customer cache
+        """
+        cache = self.customer_cache
+        keep = None if cache is None else lambda data: cache.set(customer_key(customer_id), data)
+        return self._parse_response(response, PayWayCustomer, keep)
+
+    def _cached_transaction(self, transaction_id: int | str) -> PayWayTransaction | None:
+        if self.transaction_cache is None:
+            return None
+        data = self.transaction_cache.get(transaction_key(transaction_id))
+        return None if data is None else self._from_dict(PayWayTransaction, data)
+
+    def _parse_transaction(
+        self, response: HTTPResponse, stale: int | str | None = None, *, idempotency_key: str | None = None
+    ) -> tuple[PayWayTransaction | None, list[PaymentError] | None]:
+        """
+        Parse a transaction response. With a transaction cache, the returned
+        transaction is cached and ``stale`` (e.g. a refund's parent) is dropped.
+        """
+        cache = self.transaction_cache
+        if cache is None:
+            return self._parse_response(response, PayWayTransaction, idempotency_key=idempotency_key)
+        if stale is not None:
+            cache.delete(transaction_key(stale))
+
+        def keep(data: dict[str, Any]) -> None:
+            if data.get("transactionId") is not None:
+                cache.set(transaction_key(data["transactionId"]), data)
+
+        return self._parse_response(response, PayWayTransaction, keep, idempotency_key=idempotency_key)
+
+    def _invalidate_customer(self, customer_number: int | str) -> None:
+        """
+        Drop a cached customer after a request that changes it
+        """
+        if self.customer_cache is not None:
+            self.customer_cache.delete(customer_key(customer_number))
+
+    def _validate_response(self, response: HTTPResponse) -> list[PaymentError] | None:
+        """
+        Validates all responses from PayWay to catch documented PayWay errors.
+        :param response: requests or httpx response object
+        """
+        if response.status_code in PAYWAY_ERROR_RESPONSE_CODES:
+            reason = HTTPStatus(response.status_code).phrase
+            http_error_msg = f"{response.status_code} Client Error: {reason} for url: {response.url}"
+            raise PaywayError(code=str(response.status_code), message=http_error_msg)
+
+        if response.status_code in [HTTPStatus.NOT_FOUND, HTTPStatus.UNPROCESSABLE_ENTITY]:  # Documented PayWay errors in JSON
+            return PaymentError.from_dict(response.json())
+
+        if response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR:
+            try:
+                errors = response.json()
+            except json.JSONDecodeError as exc:
+                raise PaywayError(
+                    code=str(response.status_code),
+                    message="Internal server error",
+                ) from exc
+            # Documented PayWay server errors in JSON
+            payway_error = ServerError.from_dict(errors)
+            message = payway_error.to_message()
+            raise PaywayError(code=str(response.status_code), message=message)
+
+        return None
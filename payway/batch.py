@@ -0,0 +1,280 @@
+"""
+Charge many payments, or look up many transactions or customers, with bounded
+concurrency, streaming results as they finish.
+
+Input is pulled lazily: at most ``max_pending`` payments are in memory or in
+flight at once, so ``payments`` can be a generator over millions of rows.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import TYPE_CHECKING, TypeVar
+
+from payway.constants import TRANSACTION_URL
+from payway.exceptions import PaywayError
+from payway.model import PaymentError, PayWayCustomer, PayWayPayment, PayWayTransaction
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from payway.async_client import AsyncClient
+    from payway.client import Client
+
+T = TypeVar("T")
+R = TypeVar("R")
+K = TypeVar("K")
+M = TypeVar("M")
+
+BatchResult = tuple[PayWayPayment, PayWayTransaction | None, list[PaymentError] | None]
+# (ID looked up, model or None, errors or None)
+LookupResult = tuple[K, M | None, list[PaymentError] | None]
+
+PAYMENT_KEY_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, TRANSACTION_URL)
+
+
+def payment_idempotency_key(payment: PayWayPayment, namespace: str = "") -> str:
+    """
+    A stable Idempotency-Key for a payment: the same payment body (and namespace,
+    e.g. your billing run ID) always gives the same key, so a crashed or retried
+    run replays PayWay's original response instead of charging twice. Identical
+    payments in one namespace share a key, so PayWay charges only the first.
+    """
+    body = json.dumps(payment.to_dict(), sort_keys=True, default=str)
+    return str(uuid.uuid5(PAYMENT_KEY_NAMESPACE, f"{namespace}:{body}"))
+
+
+def request_failed(exc: Exception) -> list[PaymentError]:
+    """
+    Report a raised PayWay or network error as a PaymentError, so one failure
+    doesn't abort the rest of a batch
+    """
+    return [PaymentError(message=f"{type(exc).__name__}: {exc}")]
+
+
+def bounded_map(function: Callable[[T], R], items: Iterable[T], max_workers: int, max_pending: int | None = None) -> Iterator[R]:
+    """
+    ``map`` over a thread pool yielding results in completion order. A new item is
+    only read from ``items`` when fewer than ``max_pending`` are queued or running.
+    """
+    max_pending = max_pending or max_workers * 2
+    items = iter(items)
+    pending: set[Future[R]] = set()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="payway") as executor:
+        try:
+            while True:
+                pending.update(executor.submit(function, item) for item in islice(items, max_pending - len(pending)))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from (future.result() for future in done)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def abounded_map(
+    function: Callable[[T], Awaitable[R]], items: Iterable[T] | AsyncIterable[T], concurrency: int
+) -> AsyncIterator[R]:
+    """
+    asyncio version of bounded_map: at most ``concurrency`` items are read ahead
+    and in flight, each costing a task rather than a thread.
+    """
+    import asyncio
+
+    source = _aiter(items)
+    pending: set[asyncio.Task[R]] = set()
+    try:
+        while True:
+            pending |= {asyncio.create_task(function(item)) async for item in _aislice(source, concurrency - len(pending))}
+            if not pending:
+                return
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _aiter(items: Iterable[T] | AsyncIterable[T]) -> AsyncIterator[T]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _aislice(items: AsyncIterator[T], count: int) -> AsyncIterator[T]:
+    # Like islice, but stops before reading the item after the last one it yields
+    for _ in range(count):
+        try:
+            yield await anext(items)
+        except StopAsyncIteration:
+            return
+
+
+def _payment_keys(
+    run_id: str | None, idempotency_key: Callable[[PayWayPayment], str] | None = None
+) -> Callable[[int, PayWayPayment], str]:
+    """
+    How a batch keys the payment at each position of its input: with the caller's
+    ``idempotency_key`` if given, else from the run ID, the position and the body,
+    so identical rows get different keys but a rerun of the run replays, else
+    randomly, so nothing is replayed from an earlier run
+    """
+    if idempotency_key is not None:
+        return lambda _, payment: idempotency_key(payment)
+    if run_id is not None:
+        return lambda index, payment: payment_idempotency_key(payment, namespace=f"{run_id}:{index}")
+    return lambda _, payment: str(uuid.uuid4())
+
+
+def process_payments(  # noqa: PLR0913
+    client: Client,
+    payments: Iterable[PayWayPayment],
+    *,
+    max_workers: int = 8,
+    max_pending: int | None = None,
+    run_id: str | None = None,
+    idempotency_key: Callable[[PayWayPayment], str] | None = None,
+) -> Iterator[BatchResult]:
+    """
+    Run ``client.process_payment`` over ``payments`` on a thread pool.
+    Yields ``(payment, transaction, errors)`` in completion order. Raised
+    PayWay and network errors come back as ``errors`` for that payment.
+    :param client: Client to charge with; its connection pool should hold at least max_workers connections
+    :param payments: any iterable of PayWayPayment, consumed lazily
+    :param max_workers: payments in flight at once
+    :param max_pending: payments read ahead of the results (default 2 * max_workers)
+    :param run_id: your ID for this billing run; rerunning it with the same ID and payments in the same
+        order replays PayWay's responses instead of charging again. Without it each payment gets a random key.
+    :param idempotency_key: derives each payment's Idempotency-Key instead, e.g. from your own payment IDs
+    """
+    keys = _payment_keys(run_id, idempotency_key)
+
+    def charge(keyed: tuple[PayWayPayment, str]) -> BatchResult:
+        payment, key = keyed
+        try:
+            transaction, errors = client.process_payment(payment, idempotency_key=key)
+        except (PaywayError, *client.request_errors) as exc:
+            return payment, None, request_failed(exc)
+        return payment, transaction, errors
+
+    keyed = ((payment, keys(index, payment)) for index, payment in enumerate(payments))
+    return bounded_map(charge, keyed, max_workers=max_workers, max_pending=max_pending)
+
+
+async def aprocess_payments(
+    client: AsyncClient,
+    payments: Iterable[PayWayPayment] | AsyncIterable[PayWayPayment],
+    *,
+    concurrency: int = 50,
+    run_id: str | None = None,
+    idempotency_key: Callable[[PayWayPayment], str] | None = None,
+) -> AsyncIterator[BatchResult]:
+    """
+    asyncio version of process_payments: at most ``concurrency`` payments are in
+    flight, each costing a coroutine rather than a thread.
+    """
+    keys = _payment_keys(run_id, idempotency_key)
+
+    async def charge(keyed: tuple[PayWayPayment, str]) -> BatchResult:
+        payment, key = keyed
+        try:
+            transaction, errors = await client.process_payment(payment, idempotency_key=key)
+        except (PaywayError, *client.request_errors) as exc:
+            return payment, None, request_failed(exc)
+        return payment, transaction, errors
+
+    keyed = ((payment, keys(index, payment)) async for index, payment in _aenumerate(_aiter(payments)))
+    async for result in abounded_map(charge, keyed, concurrency):
+        yield result
+
+
+async def _aenumerate(items: AsyncIterator[T]) -> AsyncIterator[tuple[int, T]]:
+    index = 0
+    async for item in items:
+        yield index, item
+        index += 1
+
+
+def _lookup(
+    client: Client,
+    get: Callable[[K], tuple[M | None, list[PaymentError] | None]],
+    ids: Iterable[K],
+    max_workers: int,
+    max_pending: int | None,
+) -> Iterator[LookupResult[K, M]]:
+    def fetch(key: K) -> LookupResult[K, M]:
+        try:
+            model, errors = get(key)
+        except (PaywayError, *client.request_errors) as exc:
+            return key, None, request_failed(exc)
+        return key, model, errors
+
+    return bounded_map(fetch, ids, max_workers=max_workers, max_pending=max_pending)
+
+
+def lookup_transactions(
+    client: Client, transaction_ids: Iterable[int], *, max_workers: int = 8, max_pending: int | None = None
+) -> Iterator[LookupResult[int, PayWayTransaction]]:
+    """
+    Run ``client.get_transaction`` over ``transaction_ids`` on a thread pool.
+    Yields ``(transaction_id, transaction, errors)`` in completion order; a 404 or
+    raised error only fills in ``errors`` for that ID.
+    :param client: Client to look up with; its connection pool should hold at least max_workers connections
+    :param transaction_ids: any iterable of transaction IDs, consumed lazily
+    :param max_workers: lookups in flight at once
+    :param max_pending: IDs read ahead of the results (default 2 * max_workers)
+    """
+    return _lookup(client, client.get_transaction, transaction_ids, max_workers, max_pending)
+
+
+def lookup_customers(
+    client: Client, customer_numbers: Iterable[str], *, max_workers: int = 8, max_pending: int | None = None
+) -> Iterator[LookupResult[str, PayWayCustomer]]:
+    """
+    Run ``client.get_customer`` over ``customer_numbers``, like lookup_transactions
+    """
+    return _lookup(client, client.get_customer, customer_numbers, max_workers, max_pending)
+
+
+async def _alookup(
+    client: AsyncClient,
+    get: Callable[[K], Awaitable[tuple[M | None, list[PaymentError] | None]]],
+    ids: Iterable[K] | AsyncIterable[K],
+    concurrency: int,
+) -> AsyncIterator[LookupResult[K, M]]:
+    async def fetch(key: K) -> LookupResult[K, M]:
+        try:
+            model, errors = await get(key)
+        except (PaywayError, *client.request_errors) as exc:
+            return key, None, request_failed(exc)
+        return key, model, errors
+
+    async for result in abounded_map(fetch, ids, concurrency):
+        yield result
+
+
+def alookup_transactions(
+    client: AsyncClient, transaction_ids: Iterable[int] | AsyncIterable[int], *, concurrency: int = 50
+) -> AsyncIterator[LookupResult[int, PayWayTransaction]]:
+    """
+    asyncio version of lookup_transactions, for ``async for``
+    """
+    return _alookup(client, client.get_transaction, transaction_ids, concurrency)
+
+
+def alookup_customers(
+    client: AsyncClient, customer_numbers: Iterable[str] | AsyncIterable[str], *, concurrency: int = 50
+) -> AsyncIterator[LookupResult[str, PayWayCustomer]]:
+    """
+    asyncio version of lookup_customers, for ``async for``
+    """
+    return _alookup(client, client.get_customer, customer_numbers, concurrency)
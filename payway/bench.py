@@ -0,0 +1,351 @@
+"""
+Load-test a Client: drive a weighted mix of PayWay calls at a fixed request
+rate or concurrency and report throughput, latency percentiles, retries and
+errors per operation, as text and JSON.
+
+    python -m payway.bench --url http://127.0.0.1:8765/rest/v1 --rate 200 --duration 30
+    python -m payway.bench --concurrency 32 --mix payment=4,get_transaction=4,token=1,list_customers=1 --json run.json
+
+Without ``--url`` an in-process payway.testing.emulator is started. It shares
+the interpreter with the load generator, so for throughput numbers run
+``python -m payway.testing.emulator`` separately and pass its URL.
+
+With ``--rate`` the load is open: calls start on schedule whether or not earlier
+ones have finished, and latency is measured from the scheduled start, so a
+saturated client shows up as growing latency rather than a lower send rate.
+Otherwise ``--concurrency`` workers each send their next call as soon as the
+last one finishes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from importlib import metadata
+from typing import Any, TypeVar
+
+from payway.client import Client
+from payway.exceptions import PaywayError
+from payway.model import PaymentError, PayWayCustomer, PayWayModel, PayWayPayment
+from payway.retry import RetryCall, RetryPolicy
+from payway.test_utils import make_card
+
+DEFAULT_MIX = {"token": 1, "payment": 4, "get_transaction": 4, "list_customers": 1}
+PERCENTILES = (0.5, 0.95, 0.99)
+
+M = TypeVar("M", bound=PayWayModel)
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values
+    """
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+@dataclass(slots=True)
+class OperationStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: Counter[str] = field(default_factory=Counter)
+    retries: int = 0
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "count": len(ordered),
+            "errors": sum(self.errors.values()),
+            "retries": self.retries,
+            "throughput": len(ordered) / elapsed if elapsed else 0.0,
+            **{f"p{round(q * 100)}_ms": percentile(ordered, q) * 1000 for q in PERCENTILES},
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+            "error_breakdown": dict(self.errors.most_common()),
+        }
+
+
+class TrackedRetryPolicy(RetryPolicy):
+    """
+    RetryPolicy that remembers each thread's latest RetryCall, so the load test
+    can count the retries one operation made
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        super().__init__(*args, **kwargs)
+        self.local = threading.local()
+
+    def call(self, *, can_retry: bool) -> RetryCall:
+        self.local.call = super().call(can_retry=can_retry)
+        return self.local.call
+
+    def take_retries(self) -> int:
+        call, self.local.call = getattr(self.local, "call", None), None
+        return call.number - 1 if call is not None else 0
+
+
+def error_label(exc: Exception) -> str:
+    if isinstance(exc, PaywayError):
+        return f"PaywayError {exc.code}"
+    return type(exc).__name__
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    """
+    ``token=1,payment=4`` -> {"token": 1.0, "payment": 4.0}
+    """
+    mix = {name.strip(): float(weight) for name, weight in (part.split("=") for part in value.split(","))}
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        msg = f"unknown operations {sorted(unknown)}; choose from {sorted(DEFAULT_MIX)}"
+        raise argparse.ArgumentTypeError(msg)
+    return mix
+
+
+def _set_up(result: tuple[M | None, list[PaymentError] | None]) -> M:
+    """
+    The model from a setup call, or a PaywayError carrying the errors PayWay returned instead
+    """
+    model, errors = result
+    if model is None:
+        raise PaywayError(code="BENCH_SETUP", message=PaymentError.list_to_message(errors or []))
+    return model
+
+
+class LoadTest:
+    """
+    Runs the mix against one shared Client and collects OperationStats per operation
+    """
+
+    def __init__(self, client: Client, policy: TrackedRetryPolicy, mix: dict[str, float], *, seed: int | None = None) -> None:
+        self.client = client
+        self.policy = policy
+        self.mix = mix
+        self.stats = {name: OperationStats() for name in mix}
+        self.customer_numbers: list[str] = []
+        self.transaction_ids: list[int] = []
+        self.elapsed = 0.0
+        self._random = random.Random(seed)  # noqa: S311
+        self._lock = threading.Lock()
+        self._operations: dict[str, Callable[[], list[PaymentError] | None]] = {
+            "token": self.create_token,
+            "payment": self.process_payment,
+            "get_transaction": self.get_transaction,
+            "list_customers": self.list_customers,
+        }
+
+    def setup(self, customers: int = 5) -> None:
+        """
+        Create the customers that payments charge and one payment to look up
+        """
+        for number in range(customers):
+            token = _set_up(self.client.create_card_token(make_card()))
+            customer = _set_up(self.client.create_customer(PayWayCustomer(customer_name=f"Load test {number}", token=token.token)))
+            self.customer_numbers.append(customer.customer_number)
+        self.process_payment()
+
+    def create_token(self) -> list[PaymentError] | None:
+        return self.client.create_card_token(make_card())[1]
+
+    def process_payment(self) -> list[PaymentError] | None:
+        payment = PayWayPayment(
+            transaction_type="payment",
+            customer_number=self._random.choice(self.customer_numbers),
+            amount=10,
+            currency="aud",
+            order_number=uuid.uuid4().hex[:20],
+        )
+        transaction, errors = self.client.process_payment(payment, idempotency_key=str(uuid.uuid4()))
+        if transaction is not None:
+            self.transaction_ids.append(transaction.transaction_id)
+        return errors
+
+    def get_transaction(self) -> list[PaymentError] | None:
+        return self.client.get_transaction(self._random.choice(self.transaction_ids))[1]
+
+    def list_customers(self) -> list[PaymentError] | None:
+        result = self.client.list_customers()
+        return PaymentError.from_dict(result) if "links" not in result else None
+
+    def run_one(self, name: str, scheduled: float | None = None) -> None:
+        """
+        Send one operation and record it; latency counts from ``scheduled`` if given
+        """
+        start = time.perf_counter() if scheduled is None else scheduled
+        try:
+            errors = self._operations[name]()
+        except (PaywayError, *self.client.request_errors) as exc:
+            label = error_label(exc)
+        else:
+            label = f"rejected: {errors[0].message}" if errors else None
+        latency = time.perf_counter() - start
+        retries = self.policy.take_retries()
+        with self._lock:
+            stats = self.stats[name]
+            stats.latencies.append(latency)
+            stats.retries += retries
+            if label:
+                stats.errors[label] += 1
+
+    def choices(self, limit: int | None) -> Iterator[str]:
+        names, weights = list(self.mix), list(self.mix.values())
+        count = 0
+        while limit is None or count < limit:
+            count += 1
+            yield self._random.choices(names, weights)[0]
+
+    def run_closed(self, concurrency: int, duration: float, requests: int | None) -> None:
+        """
+        ``concurrency`` workers each send their next operation when the last one finishes
+        """
+        stop_at = time.perf_counter() + duration
+        operations = self.choices(requests)
+        lock = threading.Lock()
+
+        def worker() -> None:
+            while time.perf_counter() < stop_at:
+                with lock:
+                    name = next(operations, None)
+                if name is None:
+                    return
+                self.run_one(name)
+
+        self._timed(lambda: self._in_threads(worker, concurrency))
+
+    def run_open(self, rate: float, concurrency: int, duration: float, requests: int | None) -> None:
+        """
+        Start an operation every ``1 / rate`` seconds on a pool of ``concurrency`` threads
+        """
+
+        def schedule() -> None:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="payway-bench") as executor:
+                start = time.perf_counter()
+                for index, name in enumerate(self.choices(requests)):
+                    scheduled = start + index / rate
+                    if scheduled - start >= duration:
+                        break
+                    time.sleep(max(0.0, scheduled - time.perf_counter()))
+                    executor.submit(self.run_one, name, scheduled)
+
+        self._timed(schedule)
+
+    def _timed(self, run: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        run()
+        self.elapsed = time.perf_counter() - start
+
+    @staticmethod
+    def _in_threads(worker: Callable[[], None], count: int) -> None:
+        threads = [threading.Thread(target=worker, name=f"payway-bench-{n}") for n in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def report(self) -> dict[str, Any]:
+        total = OperationStats()
+        for stats in self.stats.values():
+            total.latencies += stats.latencies
+            total.errors.update(stats.errors)
+            total.retries += stats.retries
+        operations = {name: stats.summary(self.elapsed) for name, stats in self.stats.items()}
+        return {"elapsed_s": self.elapsed, "operations": operations, "total": total.summary(self.elapsed)}
+
+
+def format_report(report: dict[str, Any]) -> str:
+    columns = ("count", "errors", "retries", "req/s", "p50", "p95", "p99", "max")
+    lines = [f"{'operation':<16}" + "".join(f" {column:>8}" for column in columns) + "  (latency in ms)"]
+    rows = {**report["operations"], "total": report["total"]}
+    for name, row in rows.items():
+        lines.append(
+            f"{name:<16} {row['count']:>8} {row['errors']:>8} {row['retries']:>8} {row['throughput']:>8.1f} "
+            f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}"
+        )
+    for name, row in report["operations"].items():
+        lines.extend(f"  {name}: {label} x{count}" for label, count in row["error_breakdown"].items())
+    return "\n".join(lines)
+
+
+def _version() -> str:
+    try:
+        return metadata.version("python-payway")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m payway.bench", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--url", help="PayWay API base URL (default: start an in-process emulator)")
+    parser.add_argument("--rate", type=float, help="operations started per second (open load)")
+    parser.add_argument("--concurrency", type=int, default=8, help="workers, or the thread pool size with --rate")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--requests", type=int, help="stop after this many operations")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="weights, e.g. payment=4,get_transaction=4")
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--emulator-latency", type=float, default=0.02, help="median latency of the in-process emulator")
+    parser.add_argument("--merchant-id", default="TEST")
+    parser.add_argument("--bank-account-id", default="0000000A")
+    parser.add_argument("--secret-api-key", default="TSECRET-API-KEY")
+    parser.add_argument("--publishable-api-key", default="TPUBLISHABLE-API-KEY")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", metavar="FILE", help="also write the report as JSON ('-' for stdout)")
+    return parser
+
+
+def _api_url(args: argparse.Namespace, stack: ExitStack) -> str:
+    if args.url:
+        return args.url
+    from payway.testing.emulator import Emulator, lognormal_latency
+
+    return stack.enter_context(Emulator(latency=lognormal_latency(args.emulator_latency), seed=args.seed)).url
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    with ExitStack() as stack:
+        policy = TrackedRetryPolicy(args.max_retries)
+        client = Client(
+            args.merchant_id,
+            args.bank_account_id,
+            args.secret_api_key,
+            args.publishable_api_key,
+            api_url=_api_url(args, stack),
+            pool_maxsize=args.concurrency,
+            retry_policy=policy,
+        )
+        stack.callback(client.close)
+        test = LoadTest(client, policy, args.mix, seed=args.seed)
+        test.setup()
+        if args.rate:
+            test.run_open(args.rate, args.concurrency, args.duration, args.requests)
+        else:
+            test.run_closed(args.concurrency, args.duration, args.requests)
+        settings = {key: value for key, value in vars(args).items() if "api_key" not in key and key != "json"}
+        return {"version": _version(), "python": platform.python_version(), "settings": settings, **test.report()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _parser().parse_args(argv)
+    report = run(args)
+    print(format_report(report))  # noqa: T201
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Fail fast while PayWay is down instead of queueing every request behind
+connection attempts and 30 second timeouts.
+
+Each endpoint family has its own circuit. After ``failure_threshold`` failures
+in a row (network errors, HTTP 500 and 503) it opens, and requests to that
+family raise ``PaywayError(code="CIRCUIT_OPEN")`` without being sent. After
+``reset_timeout`` seconds it lets ``probes`` requests through; if they all
+succeed it closes, and if any fails it opens again.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from enum import StrEnum
+from http import HTTPStatus
+from logging import getLogger
+
+from payway.constants import EndpointFamily
+from payway.exceptions import PaywayError
+
+logger = getLogger(__name__)
+
+CIRCUIT_OPEN = "CIRCUIT_OPEN"
+# Responses that mean PayWay itself is failing, rather than rejecting the request
+FAILURE_STATUS_CODES = frozenset({HTTPStatus.INTERNAL_SERVER_ERROR, HTTPStatus.SERVICE_UNAVAILABLE})
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class Circuit:
+    """
+    The breaker state of one endpoint family. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        probes: int = 3,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        on_change: Callable[[CircuitState], None] | None = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self.clock = clock
+        self.on_change = on_change
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.times_opened = 0
+        self.changed_at = clock()
+        self.probes_sent = 0
+        self.probes_passed = 0
+        self._lock = threading.Lock()
+
+    def _move_to(self, state: CircuitState) -> None:
+        self.state = state
+        self.changed_at = self.clock()
+        self.probes_sent = self.probes_passed = 0
+        if state is CircuitState.OPEN:
+            self.times_opened += 1
+        if self.on_change is not None:
+            self.on_change(state)
+
+    def retry_in(self) -> float:
+        """
+        Seconds until an open circuit lets probes through
+        """
+        return max(0.0, self.changed_at + self.reset_timeout - self.clock())
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now. In the half-open state this admits
+        up to ``probes`` requests; if their outcome never comes back (e.g. the
+        caller died) another batch is admitted after ``reset_timeout``.
+        """
+        with self._lock:
+            waited = self.state is not CircuitState.CLOSED and not self.retry_in()
+            if waited and (self.state is CircuitState.OPEN or self.probes_sent >= self.probes):
+                self._move_to(CircuitState.HALF_OPEN)
+            if self.state is CircuitState.HALF_OPEN and self.probes_sent < self.probes:
+                self.probes_sent += 1
+                return True
+            return self.state is CircuitState.CLOSED
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state is CircuitState.HALF_OPEN:
+                self.probes_passed += 1
+                if self.probes_passed >= self.probes:
+                    self._move_to(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state is CircuitState.HALF_OPEN or (
+                self.state is CircuitState.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self._move_to(CircuitState.OPEN)
+
+
+class CircuitBreaker:
+    """
+    One Circuit per endpoint family, shared by every client it is given to.
+
+        breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        client = Client(..., circuit_breaker=breaker)
+        breaker.states()  # {"tokens": "closed", "transactions": "open", "customers": "closed"}
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        probes: int = 3,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        on_change: Callable[[EndpointFamily, CircuitState], None] | None = None,
+    ) -> None:
+        """
+        :param failure_threshold: consecutive failures that open a family's circuit
+        :param reset_timeout: seconds a circuit stays open before probing
+        :param probes: requests let through while half-open; all must succeed to close
+        :param on_change: called with the family and new state on every transition, e.g. to update a gauge
+        """
+        self.on_change = on_change
+        self.circuits = {
+            family: Circuit(
+                failure_threshold,
+                reset_timeout,
+                probes,
+                clock=clock,
+                on_change=lambda state, family=family: self._changed(family, state),
+            )
+            for family in EndpointFamily
+        }
+
+    def _changed(self, family: EndpointFamily, state: CircuitState) -> None:
+        log = logger.warning if state is CircuitState.OPEN else logger.info
+        log("PayWay %s circuit is now %s", family, state)
+        if self.on_change is not None:
+            self.on_change(family, state)
+
+    def before_send(self, family: EndpointFamily | None) -> None:
+        """
+        Raise PaywayError(code="CIRCUIT_OPEN") if requests to ``family`` must not be sent
+        """
+        circuit = self.circuits.get(family) if family else None
+        if circuit is None or circuit.allow():
+            return
+        raise PaywayError(
+            code=CIRCUIT_OPEN,
+            message=f"PayWay {family} requests are failing; not sending for another {circuit.retry_in():.0f}s",
+        )
+
+    def record(self, family: EndpointFamily | None, status_code: int | None) -> None:
+        """
+        Count a request's outcome: its HTTP status, or None when it failed to complete
+        """
+        circuit = self.circuits.get(family) if family else None
+        if circuit is None:
+            return
+        if status_code is None or status_code in FAILURE_STATUS_CODES:
+            circuit.record_failure()
+        else:
+            circuit.record_success()
+
+    def states(self) -> dict[str, str]:
+        """
+        The state of every family's circuit, for metrics and health checks
+        """
+        return {str(family): str(circuit.state) for family, circuit in self.circuits.items()}
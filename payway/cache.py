@@ -0,0 +1,205 @@
+"""
+Caches for PayWay lookups.
+
+A client is given any object implementing ``Cache`` (get/set/delete of JSON
+bodies by string key), so entries can live in-process or in a shared store
+such as Redis. ``LRUCache`` is the in-process implementation: least recently
+used entries are evicted past ``maxsize`` and entries expire after their TTL.
+``TransactionCache`` picks each transaction's TTL from its status, keeping
+those that can no longer change until they are evicted.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+# Transaction statuses PayWay never changes again
+FINAL_TRANSACTION_STATUSES = frozenset({"declined", "voided"})
+
+
+class Cache(Protocol):
+    """
+    What a client needs from a cache backend. Values are JSON response bodies
+    (dicts), so they can be serialised by backends that store outside the process.
+    """
+
+    def get(self, key: str) -> Any | None: ...  # noqa: ANN401
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None: ...  # noqa: ANN401
+
+    def delete(self, key: str) -> None: ...
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache with a size limit and per-entry TTL. Hits,
+    misses and evictions are counted on ``stats``.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, *, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param maxsize: entries kept before the least recently used is evicted
+        :param ttl: default seconds an entry stays valid; ``math.inf`` for no expiry
+        :param clock: monotonic clock, replaceable in tests
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        # key -> (expiry time, value), least recently used first
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:  # noqa: ANN401
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        """
+        :param ttl: seconds this entry stays valid, instead of the cache's default
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = math.inf if ttl == math.inf else self.clock() + ttl
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """
+        Write the unexpired entries to a JSON file, replacing it atomically
+        """
+        now = self.clock()
+        with self._lock:
+            entries = [
+                [key, None if expires == math.inf else expires - now, value]
+                for key, (expires, value) in self._entries.items()
+                if expires > now
+            ]
+        from pathlib import Path
+
+        path = Path(path)
+        tmp = path.with_name(f"{path.name}.tmp")
+        tmp.write_text(json.dumps({"saved_at": time.time(), "entries": entries}))
+        tmp.replace(path)
+
+    def load(self, path: str | os.PathLike[str]) -> None:
+        """
+        Add the entries saved to a file by ``save``, less the time since they were saved.
+        A missing file is ignored.
+        """
+        from pathlib import Path
+
+        try:
+            saved = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            return
+        elapsed = max(0.0, time.time() - saved["saved_at"])
+        for key, ttl, value in saved["entries"]:
+            if ttl is None:
+                self.set(key, value, math.inf)
+            elif ttl > elapsed:
+                self.set(key, value, ttl - elapsed)
+
+
+def transaction_is_final(data: dict[str, Any]) -> bool:
+    """
+    Whether a transaction body can no longer change: declined, voided, or approved
+    and neither voidable nor refundable. A settled transaction that can still be
+    voided or refunded may be, by another process or in PayWay's UI.
+    """
+    status = data.get("status")
+    if status in FINAL_TRANSACTION_STATUSES:
+        return True
+    return status == "approved" and data.get("isVoidable") is False and data.get("isRefundable") is False
+
+
+class TransactionCache(LRUCache):
+    """
+    LRUCache for transaction bodies. Final transactions (see ``transaction_is_final``)
+    are kept until evicted; those that may still change expire after ``pending_ttl``.
+    With a ``path`` the cache starts from the file written by its last ``save()``.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        pending_ttl: float = 60.0,
+        *,
+        path: str | os.PathLike[str] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param maxsize: transactions kept before the least recently used is evicted
+        :param pending_ttl: seconds a transaction that may still change is kept
+        :param path: JSON file to load on creation and write with ``save()``
+        """
+        super().__init__(maxsize, pending_ttl, clock=clock)
+        self.path = path
+        if path is not None:
+            self.load(path)
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:  # noqa: ANN401
+        if ttl is None and transaction_is_final(value):
+            ttl = math.inf
+        super().set(key, value, ttl)
+
+    def save(self, path: str | os.PathLike[str] | None = None) -> None:
+        """
+        :param path: file to write, instead of the cache's ``path``
+        """
+        path = path or self.path
+        if path is None:
+            msg = "TransactionCache.save() needs a path"
+            raise ValueError(msg)
+        super().save(path)
+
+
+def customer_key(customer_number: int | str) -> str:
+    return f"customer:{customer_number}"
+
+
+def transaction_key(transaction_id: int | str) -> str:
+    return f"transaction:{transaction_id}"
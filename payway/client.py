@@ -1,27 +1,32 @@
 from __future__ import annotations
 
-import json
+import threading
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
+from datetime import timedelta
+from functools import cached_property
 from http import HTTPStatus
 from logging import getLogger
-from typing import Any
-
-import requests
+from typing import TYPE_CHECKING, Any, Self
 
+from payway.base import BaseClient, HTTPResponse
+from payway.batch import lookup_customers, lookup_transactions
+from payway.breaker import CircuitBreaker
+from payway.cache import Cache
 from payway.constants import (
-    BANK_ACCOUNT_PAYMENT_CHOICE,
-    CREDIT_CARD_PAYMENT_CHOICE,
-    CUSTOMER_URL,
-    PAYWAY_ERROR_RESPONSE_CODES,
-    RETRYABLE_STATUS_CODES,
-    TOKEN_URL,
-    TRANSACTION_URL,
-    VALID_PAYMENT_METHOD_CHOICES,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_READ_TIMEOUT,
+    PAYWAY_API_URL,
+    EndpointFamily,
     PaymentMethod,
+    RawBody,
 )
 from payway.customers import CustomerRequest
-from payway.exceptions import PaywayError
+from payway.hooks import Hook, instrument
+from payway.idempotency import noting_idempotency_key
+from payway.metrics import Metrics
 from payway.model import (
     BankAccount,
     PaymentError,
@@ -30,23 +35,33 @@ from payway.model import (
     PayWayCustomer,
     PayWayPayment,
     PayWayTransaction,
-    ServerError,
     TokenResponse,
 )
+from payway.ratelimit import RateLimiter
+from payway.retry import RetryPolicy
+from payway.singleflight import SingleFlight, request_key
 from payway.transactions import TransactionRequest
+from payway.utils import endpoint_family
+
+if TYPE_CHECKING:
+    from payway.journal import Journal, JournalEntry
+    from payway.transport import Timeout, Transport
 
 logger = getLogger(__name__)
 
 
-class Client(CustomerRequest, TransactionRequest):
-    """
-    PayWay Client to connect to PayWay and perform methods given credentials
+def _seconds(elapsed: object) -> float | None:
+    # requests' Response.elapsed runs from sending the request to parsing the response headers
+    return elapsed.total_seconds() if isinstance(elapsed, timedelta) else None
+
+
+class Client(BaseClient, CustomerRequest, TransactionRequest):
     """
+    PayWay Client to connect to PayWay and perform methods given credentials.
 
-    merchant_id = ""
-    bank_account_id = ""
-    secret_api_key = ""
-    publishable_api_key = ""
+    requests and urllib3 are imported when the client first needs its transport,
+    not with this module, so importing and constructing a Client stays cheap.
+    """
 
     def __init__(  # noqa: PLR0913
         self,
@@ -56,6 +71,27 @@ class Client(CustomerRequest, TransactionRequest):
         publishable_api_key: str,
         max_retries: int = 0,
         retry_delay: float = 1.0,
+        *,
+        api_url: str = PAYWAY_API_URL,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        lazy_parsing: bool = False,
+        raw_body: RawBody | str = RawBody.KEEP,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        customer_cache: Cache | None = None,
+        transaction_cache: Cache | None = None,
+        coalesce_gets: bool = True,
+        hooks: Iterable[Hook] | None = None,
+        metrics: Metrics | None = None,
+        transport: Transport | None = None,
+        keep_alive: float | None = None,
+        auto_idempotency_keys: bool = False,
+        journal: Journal | None = None,
     ) -> None:
         """
         :param merchant_id: PayWay Merchant ID
@@ -64,106 +100,281 @@ class Client(CustomerRequest, TransactionRequest):
         :param publishable_api_key: PayWay Publishable API Key
         :param max_retries: retries per request on network errors and HTTP 429/503 (0 disables)
         :param retry_delay: base seconds to wait between attempts (Retry-After header wins if present)
+        :param api_url: PayWay REST API base URL, e.g. a local emulator's
+        :param pool_connections: number of per-host connection pools to cache
+        :param pool_maxsize: keep-alive connections kept open per host
+        :param pool_block: wait for a free connection instead of opening one beyond pool_maxsize
+        :param connect_timeout: seconds to wait for a connection to PayWay
+        :param read_timeout: seconds to wait for PayWay to send a response
+        :param lazy_parsing: build nested models (card, merchant, payment setup) only when first read
+        :param raw_body: "keep" the response body on each model's ``raw``, "compress" it, or "drop" it
+        :param rate_limiter: RateLimiter to pace requests with; share one between clients using the same credentials
+        :param retry_policy: RetryPolicy with jittered backoff, a retry budget and a deadline; replaces max_retries and retry_delay
+        :param circuit_breaker: CircuitBreaker that fails requests fast while an endpoint family is failing
+        :param customer_cache: Cache (e.g. LRUCache) that get_customer reads through; customer updates invalidate it
+        :param transaction_cache: Cache (e.g. TransactionCache) that get_transaction reads through; voids and refunds update it
+        :param coalesce_gets: let concurrent identical GETs share one request and its response
+        :param hooks: callables given an AttemptEvent per HTTP attempt and a ParseEvent per parsed response
+        :param metrics: Metrics to record each call's latency, status, retry outcome and PayWay response code in
+        :param transport: Transport to send requests through, e.g. Urllib3Transport or an InMemoryTransport in tests;
+            a RequestsTransport built from the pool settings by default
+        :param keep_alive: reopen pooled connections in the background once idle this many seconds; keep it
+            below PayWay's keep-alive timeout (None disables)
+        :param auto_idempotency_keys: send every POST with an Idempotency-Key, so all POSTs can be retried (see payway.idempotency)
+        :param journal: Journal to record payment POSTs in before sending them, so ``payway.journal.recover`` can settle
+            those a crash left unanswered; implies auto_idempotency_keys
         """
-        self._validate_credentials(
+        super().__init__(
             merchant_id,
             bank_account_id,
             secret_api_key,
             publishable_api_key,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            api_url=api_url,
+            lazy_parsing=lazy_parsing,
+            raw_body=raw_body,
+            rate_limiter=rate_limiter,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            customer_cache=customer_cache,
+            transaction_cache=transaction_cache,
+            hooks=hooks,
+            metrics=metrics,
+            auto_idempotency_keys=auto_idempotency_keys,
+            journal=journal,
         )
-        self.merchant_id = merchant_id
-        self.bank_account_id = bank_account_id
-        self.secret_api_key = secret_api_key
-        self.publishable_api_key = publishable_api_key
-        self.max_retries = max_retries
-        self.retry_delay = retry_delay
-        session = requests.Session()
-        session.auth = (self.secret_api_key, "")
-        session.headers["content-type"] = "application/x-www-form-urlencoded"
-        self.session = session
-        session_no_headers = requests.Session()
-        session_no_headers.auth = session.auth
-        self.session_no_headers = session_no_headers
-
-    def _validate_credentials(
-        self,
-        merchant_id: str,
-        bank_account_id: str,
-        secret_api_key: str,
-        publishable_api_key: str,
-    ) -> None:
-        if any(not key for key in (secret_api_key, publishable_api_key)):
-            logger.error("PayWay API keys not found")
-            raise PaywayError(
-                message="PayWay API keys not found",
-                code="INVALID_API_KEYS",
-            )
-        if any(not val for val in (merchant_id, bank_account_id)):
-            logger.error("Merchant ID or bank account ID invalid")
-            raise PaywayError(
-                message="Invalid credentials",
-                code="INVALID_API_CREDENTIALS",
+        self.timeout = (connect_timeout, read_timeout)
+        self.single_flight: SingleFlight[HTTPResponse] | None = SingleFlight() if coalesce_gets else None
+        self._pool_settings = (pool_connections, pool_maxsize, pool_block)
+        self._session_lock = threading.Lock()
+        if transport is not None:
+            self.session = self._authenticated(transport)
+        self.keep_alive = None
+        if keep_alive is not None:
+            from payway.transport import KeepAlive, PoolMaintenance
+
+            if isinstance(self.session, PoolMaintenance):
+                self.keep_alive = KeepAlive(self.session, self.api_url, keep_alive, timeout=connect_timeout).start()
+
+    @cached_property
+    def session(self) -> Transport:
+        """
+        The Transport requests are sent through: a RequestsTransport built from
+        the pool settings on first use unless one was given
+        """
+        with self._session_lock:
+            # another thread may have built it while this one waited for the lock
+            session = vars(self).get("session")
+            if session is None:
+                from payway.transport import RequestsTransport
+
+                connections, maxsize, block = self._pool_settings
+                session = self._authenticated(RequestsTransport(connections, maxsize, pool_block=block))
+            return session
+
+    @property
+    def session_no_headers(self) -> Transport:
+        # Kept for callers of the old two-session API; both names share one pool.
+        return self.session
+
+    def _authenticated(self, transport: Transport) -> Transport:
+        if transport.auth is None:
+            transport.auth = (self.secret_api_key, "")
+        return transport
+
+    @property
+    def request_errors(self) -> tuple[type[Exception], ...]:
+        import requests
+
+        return (requests.RequestException,)
+
+    @property
+    def retryable_errors(self) -> tuple[type[Exception], ...]:
+        import requests
+
+        return (requests.ConnectionError, requests.Timeout)
+
+    @property
+    def stale_connection_errors(self) -> tuple[type[Exception], ...]:
+        import requests
+
+        return (requests.ConnectionError,)
+
+    def warm_up(self, connections: int = 1) -> int:
+        """
+        Open ``connections`` pooled connections to PayWay ahead of the first call,
+        so it doesn't pay for DNS, TCP and TLS: e.g. when a worker starts. Each is
+        verified by completing its TLS handshake; a failure raises
+        ``requests.ConnectionError``. Capped at pool_maxsize. Returns the number
+        opened, 0 if the transport doesn't pool connections.
+        """
+        from payway.transport import PoolMaintenance
+
+        if not isinstance(self.session, PoolMaintenance):
+            return 0
+        return self.session.warm_up(self.api_url, connections, timeout=self.timeout[0])
+
+    def close(self) -> None:
+        """
+        Close the client's pooled connections
+        """
+        if self.keep_alive is not None:
+            self.keep_alive.stop()
+        session = vars(self).get("session")
+        if session is not None:
+            session.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def get_request(self, endpoint: str, params: dict[str, Any] | None = None) -> HTTPResponse:
+        """
+        Concurrent identical GETs share one request (see coalesce_gets)
+        """
+
+        def fetch() -> HTTPResponse:
+            return self._send_with_retries(
+                "GET",
+                endpoint,
+                lambda timeout: self.session.get(endpoint, params=params, timeout=timeout),
+                can_retry=True,
             )
 
-    def get_request(self, endpoint: str) -> requests.Response:
-        return self._send_with_retries(
-            lambda: requests.get(url=endpoint, auth=(self.secret_api_key, ""), timeout=30),
-            can_retry=True,
-        )
+        if self.single_flight is None:
+            return fetch()
+        return self.single_flight.do(request_key(endpoint, params), fetch)
 
     def post_request(
         self, endpoint: str, data: dict[str, Any], auth: tuple[str, str] | None = None, idempotency_key: str | None = None
-    ) -> requests.Response:
+    ) -> HTTPResponse:
         """
         Supply an idempotency_key to avoid duplicate POSTs
         https://www.payway.com.au/docs/rest.html#avoiding-duplicate-posts
+        Inside an ``operation``, or with auto_idempotency_keys, one is generated
+        when none is given. Keyed POSTs can be retried. The key is noted on
+        exceptions raised here. With a journal, payment POSTs are recorded as
+        they are handed to the transport, so one the circuit breaker or rate
+        limiter refuses is never recorded, and again once PayWay has answered them.
         """
-        if not auth:
-            auth = (self.secret_api_key, "")
+        idempotency_key = self._idempotency_key(endpoint, idempotency_key)
         headers = {"content-type": "application/x-www-form-urlencoded"}
         if idempotency_key:
             headers["Idempotency-Key"] = idempotency_key
-        return self._send_with_retries(
-            lambda: requests.post(url=endpoint, auth=auth, data=data, headers=headers, timeout=30),
-            can_retry=bool(idempotency_key),
-        )
+        journal = self.journal if self._journalled(endpoint, idempotency_key) else None
+
+        def send(timeout: Timeout) -> HTTPResponse:
+            if journal is not None:
+                journal.begin(idempotency_key, endpoint, data)
+            return self.session.post(endpoint, data=data, auth=auth, headers=headers, timeout=timeout)
+
+        with noting_idempotency_key(idempotency_key):
+            response = self._send_with_retries(
+                "POST",
+                endpoint,
+                send,
+                can_retry=bool(idempotency_key),
+                transaction_type=data.get("transactionType"),
+            )
+        if journal is not None and response.status_code < HTTPStatus.INTERNAL_SERVER_ERROR:
+            # a 5xx leaves the outcome unknown, so the entry stays for recover()
+            journal.finish(idempotency_key, response.status_code)
+        return response
 
-    def _send_with_retries(self, send: Callable[[], requests.Response], can_retry: bool) -> requests.Response:  # noqa: FBT001
+    def _send_with_retries(
+        self,
+        method: str,
+        endpoint: str,
+        send: Callable[[Timeout], HTTPResponse],
+        can_retry: bool,  # noqa: FBT001
+        *,
+        transaction_type: str | None = None,
+    ) -> HTTPResponse:
         """
         Resend on network errors and HTTP 429/503 per PayWay's retry guidance
         https://www.payway.com.au/docs/rest.html#network-errors
         Requests without an Idempotency-Key must pass can_retry=False: retrying
         them could double-charge. Other statuses (including 500/502/504) are
-        returned as-is.
-        """
-        retries = self.max_retries if can_retry else 0
-        for attempt in range(retries):
-            try:
-                response = send()
-            except (requests.ConnectionError, requests.Timeout) as exc:
-                logger.warning("PayWay request failed (%s), retrying", exc)
-                time.sleep(self._retry_wait(attempt, None))
-                continue
-            if response.status_code not in RETRYABLE_STATUS_CODES:
-                return response
-            logger.warning("PayWay responded %s, retrying", response.status_code)
-            time.sleep(self._retry_wait(attempt, response))
-        return send()
-
-    def _retry_wait(self, attempt: int, response: requests.Response | None) -> float:
-        retry_after = response.headers.get("Retry-After") if response is not None else None
-        if retry_after and retry_after.isdigit():
-            return float(retry_after)
-        return self.retry_delay * (attempt + 1)
-
-    def put_request(self, endpoint: str, data: dict[str, Any]) -> requests.Response:
-        # No Idempotency-Key is sent on PUTs, so they are never retried
-        return requests.put(
-            url=endpoint,
-            auth=(self.secret_api_key, ""),
-            data=data,
-            headers={"content-type": "application/x-www-form-urlencoded"},
-            timeout=30,
+        returned as-is. ``send`` is called with the timeout for the attempt,
+        shortened to fit the retry policy's deadline. Each attempt is reported
+        to the client's hooks and the call as a whole to its metrics;
+        ``transaction_type`` tells payments and refunds apart there.
+        """
+        family = endpoint_family(endpoint)
+        call = self.retry_policy.call(can_retry=can_retry)
+        with self._measure(method, endpoint, transaction_type) as attempts:
+            while True:
+                with instrument(self.hooks, method, endpoint, call.number) as attempt:
+                    attempts.append(attempt)
+                    try:
+                        response = attempt.response = self._send(family, lambda: send(self._attempt_timeout(call.remaining())))
+                    except self.retryable_errors as exc:
+                        attempt.error = exc
+                        wait = self._wait_after_error(call, exc, attempt)
+                    else:
+                        attempt.ttfb = _seconds(response.elapsed)
+                        wait = self._wait_after_response(call, response)
+                    attempt.retry_wait = wait
+                if wait is None:
+                    return response
+                time.sleep(wait)
+
+    def _attempt_timeout(self, remaining: float | None) -> Timeout:
+        """
+        The client's timeouts, shortened to fit a deadline of ``remaining`` seconds
+        """
+        if remaining is None:
+            return self.timeout
+        connect, read = self.timeout
+        return min(connect, remaining), min(read, remaining)
+
+    def _send(self, family: EndpointFamily | None, send: Callable[[], HTTPResponse]) -> HTTPResponse:
+        """
+        Send one attempt, checking the circuit breaker and waiting for the rate
+        limiter first if the client has them
+        """
+        self._before_send(family)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(family)
+        try:
+            response = send()
+        except self.request_errors:
+            self._send_failed(family)
+            raise
+        self._after_send(family, response)
+        return response
+
+    # No Idempotency-Key is sent on PUTs, PATCHes or DELETEs, so they are never retried
+    def put_request(self, endpoint: str, data: dict[str, Any]) -> HTTPResponse:
+        return self._send_with_retries(
+            "PUT",
+            endpoint,
+            lambda timeout: self.session.put(
+                endpoint,
+                data=data,
+                headers={"content-type": "application/x-www-form-urlencoded"},
+                timeout=timeout,
+            ),
+            can_retry=False,
+        )
+
+    def patch_request(self, endpoint: str, data: dict[str, Any]) -> HTTPResponse:
+        return self._send_with_retries(
+            "PATCH",
+            endpoint,
+            lambda timeout: self.session.patch(endpoint, data=data, timeout=timeout),
+            can_retry=False,
+        )
+
+    def delete_request(self, endpoint: str) -> HTTPResponse:
+        return self._send_with_retries(
+            "DELETE",
+            endpoint,
+            lambda timeout: self.session.delete(endpoint, timeout=timeout),
+            can_retry=False,
         )
 
     def create_token(
@@ -175,30 +386,16 @@ class Client(CustomerRequest, TransactionRequest):
         :param payment_method:   PaymentMethod or str: one of `card` or `direct_debit`
         :param idempotency_key:   str: unique value to avoid duplicate POSTs
         """
-        try:
-            payment_method = PaymentMethod(payment_method)
-        except ValueError as exc:
-            valid_payment_method_choices = ", ".join(VALID_PAYMENT_METHOD_CHOICES)
-            raise PaywayError(
-                message=f"Invalid payment method. Must be one of {valid_payment_method_choices}",
-                code="INVALID_PAYMENT_METHOD",
-            ) from exc
-        data = payway_obj.to_dict()
-        if payment_method is PaymentMethod.CARD:
-            data["paymentMethod"] = CREDIT_CARD_PAYMENT_CHOICE
-        else:
-            data["paymentMethod"] = BANK_ACCOUNT_PAYMENT_CHOICE
+        data = self._token_data(payway_obj, payment_method)
+        key = self._idempotency_key(self.token_url, idempotency_key)
         logger.info("Sending Create Token request to PayWay.")
         response = self.post_request(
-            TOKEN_URL,
+            self.token_url,
             data,
             auth=(self.publishable_api_key, ""),
-            idempotency_key=idempotency_key,
+            idempotency_key=key,
         )
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
-        return TokenResponse.from_dict(response.json()), errors
+        return self._parse_response(response, TokenResponse, idempotency_key=key)
 
     def create_card_token(
         self, card: PayWayCard, idempotency_key: str | None = None
@@ -235,26 +432,16 @@ class Client(CustomerRequest, TransactionRequest):
         See model.PayWayCustomer
         """
 
-        data = customer.to_dict()
-        data.update(
-            {"merchantId": self.merchant_id, "bankAccountId": self.bank_account_id},
-        )
+        data = self._customer_data(customer)
+        endpoint = self._customer_endpoint(customer)
         logger.info("Sending Create Customer request to PayWay.")
         if customer.custom_id:
-            endpoint = f"{CUSTOMER_URL}/{customer.custom_id}"
             response = self.put_request(endpoint, data)
-        else:
-            endpoint = f"{CUSTOMER_URL}"
-            response = self.post_request(
-                endpoint,
-                data,
-                idempotency_key=idempotency_key,
-            )
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
-        customer = PayWayCustomer.from_dict(response.json())
-        return customer, errors
+            self._invalidate_customer(customer.custom_id)
+            return self._parse_response(response, PayWayCustomer)
+        key = self._idempotency_key(endpoint, idempotency_key)
+        response = self.post_request(endpoint, data, idempotency_key=key)
+        return self._parse_response(response, PayWayCustomer, idempotency_key=key)
 
     def process_payment(
         self, payment: PayWayPayment, idempotency_key: str | None = None
@@ -265,55 +452,35 @@ class Client(CustomerRequest, TransactionRequest):
         :param idempotency_key:   str: unique value to avoid duplicate POSTs
         """
         data = payment.to_dict()
-        endpoint = TRANSACTION_URL
+        endpoint = self.transaction_url
+        key = self._idempotency_key(endpoint, idempotency_key)
         logger.info("Sending Process Payment request to PayWay.")
-        response = self.post_request(endpoint, data, idempotency_key=idempotency_key)
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
+        response = self.post_request(endpoint, data, idempotency_key=key)
         # convert response to PayWayTransaction object
-        transaction = PayWayTransaction.from_dict(response.json())
-        return transaction, errors
-
-    def _validate_response(self, response: requests.Response) -> list[PaymentError] | None:
-        """
-        Validates all responses from PayWay to catch documented PayWay errors.
-        :param response: requests response object
-        """
-        if response.status_code in PAYWAY_ERROR_RESPONSE_CODES:
-            http_error_msg = f"{response.status_code} Client Error: {response.reason} for url: {response.url}"
-            raise PaywayError(code=str(response.status_code), message=http_error_msg)
-
-        if response.status_code in [HTTPStatus.NOT_FOUND, HTTPStatus.UNPROCESSABLE_ENTITY]:  # Documented PayWay errors in JSON
-            return PaymentError.from_dict(response.json())
-
-        if response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR:
-            try:
-                errors = response.json()
-            except json.JSONDecodeError as exc:
-                raise PaywayError(
-                    code=str(response.status_code),
-                    message="Internal server error",
-                ) from exc
-            # Documented PayWay server errors in JSON
-            payway_error = ServerError.from_dict(errors)
-            message = payway_error.to_message()
-            raise PaywayError(code=str(response.status_code), message=message)
-
-        return None
+        return self._parse_response(response, PayWayTransaction, idempotency_key=key)
 
     def get_transaction(self, transaction_id: int) -> tuple[PayWayTransaction | None, list[PaymentError] | None]:
         """
         Lookup and return a transaction if found in PayWay
         :param transaction_id: str  A PayWay transaction ID
+        Served from the client's transaction_cache when it has the transaction.
         """
-        endpoint = f"{TRANSACTION_URL}/{transaction_id}"
+        transaction = self._cached_transaction(transaction_id)
+        if transaction is not None:
+            return transaction, None
+        endpoint = f"{self.transaction_url}/{transaction_id}"
         response = self.get_request(endpoint)
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
-        transaction = PayWayTransaction.from_dict(response.json())
-        return transaction, errors
+        return self._parse_transaction(response)
+
+    def replay(self, entry: JournalEntry) -> tuple[PayWayTransaction | None, list[PaymentError] | None]:
+        """
+        Resend a journalled POST with its original Idempotency-Key: PayWay answers
+        with the original outcome if it processed the first attempt, and processes
+        it now if not
+        :param entry: JournalEntry: from Journal.pending()
+        """
+        response = self.post_request(entry.endpoint, entry.body, idempotency_key=entry.key)
+        return self._parse_transaction(response, idempotency_key=entry.key)
 
     def void_transaction(
         self, transaction_id: int, idempotency_key: str | None = None
@@ -323,12 +490,10 @@ class Client(CustomerRequest, TransactionRequest):
         :param transaction_id: str  A PayWay transaction ID
         :param idempotency_key:   str: unique value to avoid duplicate POSTs
         """
-        endpoint = f"{TRANSACTION_URL}/{transaction_id}/void"
-        response = self.post_request(endpoint, data={}, idempotency_key=idempotency_key)
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
-        return PayWayTransaction.from_dict(response.json()), errors
+        endpoint = f"{self.transaction_url}/{transaction_id}/void"
+        key = self._idempotency_key(endpoint, idempotency_key)
+        response = self.post_request(endpoint, data={}, idempotency_key=key)
+        return self._parse_transaction(response, idempotency_key=key)
 
     def refund_transaction(
         self,
@@ -346,32 +511,52 @@ class Client(CustomerRequest, TransactionRequest):
         :param ip_address:  str  optional IP address
         :param idempotency_key:   str: unique value to avoid duplicate POSTs
         """
-        data = {
-            "transactionType": "refund",
-            "parentTransactionId": transaction_id,
-            "principalAmount": amount,
-        }
-        if order_id:
-            data["orderNumber"] = order_id
-        if ip_address:
-            data["customerIpAddress"] = ip_address
-        response = self.post_request(TRANSACTION_URL, data, idempotency_key=idempotency_key)
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
-        return PayWayTransaction.from_dict(response.json()), errors
+        data = self._refund_data(transaction_id, amount, order_id=order_id, ip_address=ip_address)
+        key = self._idempotency_key(self.transaction_url, idempotency_key)
+        response = self.post_request(self.transaction_url, data, idempotency_key=key)
+        return self._parse_transaction(response, stale=transaction_id, idempotency_key=key)
 
     def get_customer(self, customer_id: str) -> tuple[PayWayCustomer | None, list[PaymentError] | None]:
         """
         Returns a PayWay Customer's Payment Setup, [Payment] Schedule, Contact Details, Custom Fields and Notes
         :param customer_id  str PayWay customer ID in PayWay system
+        Served from the client's customer_cache when it has the customer.
         """
-        endpoint = f"{CUSTOMER_URL}/{customer_id}"
+        customer = self._cached_customer(customer_id)
+        if customer is not None:
+            return customer, None
+        endpoint = f"{self.customer_url}/{customer_id}"
         response = self.get_request(endpoint)
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
-        return PayWayCustomer.from_dict(response.json()), errors
+        return self._parse_customer(customer_id, response)
+
+    def get_transactions(
+        self, transaction_ids: Iterable[int], *, max_workers: int = 8
+    ) -> dict[int, tuple[PayWayTransaction | None, list[PaymentError] | None]]:
+        """
+        Look up many transactions at once over the client's connection pool.
+        Returns ``{transaction_id: (transaction, errors)}`` in the order given; an ID that
+        fails only has errors. To stream a very large list use batch.lookup_transactions.
+        :param transaction_ids: transaction IDs; duplicates are looked up once
+        :param max_workers: lookups in flight at once
+        """
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        results = lookup_transactions(self, transaction_ids, max_workers=max_workers)
+        found = {key: (model, errors) for key, model, errors in results}
+        return {key: found[key] for key in transaction_ids}
+
+    def get_customers(
+        self, customer_ids: Iterable[str], *, max_workers: int = 8
+    ) -> dict[str, tuple[PayWayCustomer | None, list[PaymentError] | None]]:
+        """
+        Look up many customers at once, like get_transactions. To stream a very
+        large list use batch.lookup_customers.
+        :param customer_ids: PayWay customer numbers; duplicates are looked up once
+        :param max_workers: lookups in flight at once
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        results = lookup_customers(self, customer_ids, max_workers=max_workers)
+        found = {key: (model, errors) for key, model, errors in results}
+        return {key: found[key] for key in customer_ids}
 
     def update_payment_setup(self, token: str, customer_id: str) -> tuple[PaymentSetup | None, list[PaymentError] | None]:
         """
@@ -379,14 +564,8 @@ class Client(CustomerRequest, TransactionRequest):
         :param token: PayWay credit card or bank account token
         :param customer_id: PayWay customer ID
         """
-        endpoint = f"{CUSTOMER_URL}/{customer_id}/payment-setup"
-        data = {
-            "singleUseTokenId": token,
-            "merchantId": self.merchant_id,
-            "bankAccountId": self.bank_account_id,
-        }
+        endpoint = f"{self.customer_url}/{customer_id}/payment-setup"
+        data = self._payment_setup_data(token)
         response = self.put_request(endpoint, data)
-        errors = self._validate_response(response)
-        if errors:
-            return None, errors
-        return PaymentSetup.from_dict(response.json()), errors
+        self._invalidate_customer(customer_id)
+        return self._parse_response(response, PaymentSetup)
@@ -9,10 +9,49 @@ class PaymentMethod(StrEnum):
     DIRECT_DEBIT = "direct_debit"
 
 
+class EndpointFamily(StrEnum):
+    """
+    Groups of PayWay endpoints that are rate limited and health-checked together
+    """
+
+    TOKENS = "tokens"
+    TRANSACTIONS = "transactions"
+    CUSTOMERS = "customers"
+
+
+class RawBody(StrEnum):
+    """
+    What parsed models hold on ``raw``: the response body as-is, zlib-compressed, or nothing
+    """
+
+    KEEP = "keep"
+    COMPRESS = "compress"
+    DROP = "drop"
+
+
 PAYWAY_API_URL = "https://api.payway.com.au/rest/v1"
 TOKEN_URL = PAYWAY_API_URL + "/single-use-tokens"
 TRANSACTION_URL = PAYWAY_API_URL + "/transactions"
 CUSTOMER_URL = PAYWAY_API_URL + "/customers"
+DEFAULT_CONNECT_TIMEOUT = 30.0
+DEFAULT_READ_TIMEOUT = 30.0
+# urllib3 defaults: pools kept per host, connections kept per pool
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+# HTTP/2: connections opened to PayWay, and requests in flight over them at once
+DEFAULT_HTTP2_CONNECTIONS = 2
+DEFAULT_HTTP2_STREAMS = 100
+# First path segment under the API root -> endpoint family
+ENDPOINT_FAMILY_SEGMENTS = {
+    "single-use-tokens": EndpointFamily.TOKENS,
+    "transactions": EndpointFamily.TRANSACTIONS,
+    "customers": EndpointFamily.CUSTOMERS,
+}
+# Path segment -> placeholder for the ID that follows it in endpoint templates
+ENDPOINT_ID_PLACEHOLDERS = {
+    "transactions": "{transactionId}",
+    "customers": "{customerNumber}",
+}
 TRANSACTION_APPROVED = "0"
 
 SUMMARY_CODES = {
@@ -1,24 +1,43 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterator
 from typing import Any
 
-import requests
-
-from payway.constants import CUSTOMER_URL
+from payway.base import HTTPResponse
+from payway.constants import RawBody
 from payway.model import PayWayCustomer
+from payway.pagination import page_json, paginate
 from payway.utils import json_list
 
 
+def customer_from_list_item(item: dict[str, Any], *, lazy: bool = False, raw_body: RawBody = RawBody.KEEP) -> PayWayCustomer:
+    """
+    Customer list items carry the contact fields at the top level, not under ``contact``
+    """
+    if "contact" not in item:
+        item = {"customerNumber": item.get("customerNumber"), "contact": item}
+    return PayWayCustomer.from_dict(item, lazy=lazy, raw_body=raw_body)
+
+
 class CustomerRequest:
-    session = requests.Session()
-    session_no_headers = requests.Session()
+    # Provided by Client, so these calls share its connection pool and timeouts
+    get_request: Callable[..., HTTPResponse]
+    put_request: Callable[..., HTTPResponse]
+    patch_request: Callable[..., HTTPResponse]
+    delete_request: Callable[..., HTTPResponse]
+    customer_url: str
+    lazy_parsing: bool
+    raw_body: RawBody
+    _invalidate_customer: Callable[[int | str], None]
 
     @json_list("delete_customer")
-    def delete_customer(self, customer_number: int) -> requests.Response:
+    def delete_customer(self, customer_number: int) -> HTTPResponse:
         """
         Returns a list of transactions
         """
-        return self.session_no_headers.delete(f"{CUSTOMER_URL}/{customer_number}")
+        response = self.delete_request(f"{self.customer_url}/{customer_number}")
+        self._invalidate_customer(customer_number)
+        return response
 
     @json_list("schedule_payments")
     def schedule_payments(
@@ -28,7 +47,7 @@ class CustomerRequest:
         next_payment_date: str,
         regular_amount: int,
         next_amount: int | None = None,
-    ) -> requests.Response:
+    ) -> HTTPResponse:
         """
         Schedule a new payment for a customer
         :param customer_number	PayWay customer number
@@ -43,46 +62,54 @@ class CustomerRequest:
             "nextPrincipalAmount": next_amount,
             "regularPrincipalAmount": regular_amount,
         }
-        return self.session_no_headers.put(
-            f"{CUSTOMER_URL}/{customer_number}/schedule",
+        response = self.put_request(
+            f"{self.customer_url}/{customer_number}/schedule",
             data=data,
         )
+        self._invalidate_customer(customer_number)
+        return response
 
     @json_list("schedule_payments")
-    def stop_schedule(self, customer_number: int) -> requests.Response:
+    def stop_schedule(self, customer_number: int) -> HTTPResponse:
         """
         Stop a schedule for a customer
         """
-        return self.session_no_headers.delete(
-            f"{CUSTOMER_URL}/{customer_number}/schedule",
+        response = self.delete_request(
+            f"{self.customer_url}/{customer_number}/schedule",
         )
+        self._invalidate_customer(customer_number)
+        return response
 
     @json_list("stop_all_payments")
-    def stop_all_payments(self, customer_number: int) -> requests.Response:
+    def stop_all_payments(self, customer_number: int) -> HTTPResponse:
         """
         Stops any new payments using the stored credit card or bank account/
         """
         data = {"stopped": "true"}
-        return self.session_no_headers.patch(
-            f"{CUSTOMER_URL}/{customer_number}/payment-setup",
+        response = self.patch_request(
+            f"{self.customer_url}/{customer_number}/payment-setup",
             data=data,
         )
+        self._invalidate_customer(customer_number)
+        return response
 
     @json_list("start_all_payments")
-    def start_all_payments(self, customer_number: int) -> requests.Response:
+    def start_all_payments(self, customer_number: int) -> HTTPResponse:
         """
         Allows any new payments using the stored credit card or bank account.
         """
         data = {"stopped": "false"}
-        return self.session_no_headers.patch(
-            f"{CUSTOMER_URL}/{customer_number}/payment-setup",
+        response = self.patch_request(
+            f"{self.customer_url}/{customer_number}/payment-setup",
             data=data,
         )
+        self._invalidate_customer(customer_number)
+        return response
 
     @json_list("update_contact_details")
     def update_contact_details(
         self, customer_number: int, customer: PayWayCustomer | None = None, **options: dict[str, Any]
-    ) -> requests.Response:
+    ) -> HTTPResponse:
         """
         param: customer_number: PayWay customer number
         param: customer PayWayCustomer object
@@ -92,16 +119,28 @@ class CustomerRequest:
         if customer:
             data.update(customer.to_dict())
         data.update(options)
-        return self.session.put(
-            f"{CUSTOMER_URL}/{customer_number}/contact",
+        response = self.put_request(
+            f"{self.customer_url}/{customer_number}/contact",
             data=data,
         )
+        self._invalidate_customer(customer_number)
+        return response
 
     @json_list("list_customers")
-    def list_customers(self, page: int | None = None) -> requests.Response:
+    def list_customers(self, page: int | None = None) -> HTTPResponse:
         """
         List all customers in PayWay
         Returns paginated list of customerNumber, customerName
         :param page: page number, taken from the `next`/`prev` links of a previous response
         """
-        return self.session_no_headers.get(CUSTOMER_URL, params={"page": page})
+        return self.get_request(self.customer_url, params={"page": page})
+
+    def iter_customers(self) -> Iterator[PayWayCustomer]:
+        """
+        Iterate over every customer in PayWay, following the pagination links.
+        The next page is fetched in the background while the current one is consumed.
+        """
+        return paginate(
+            lambda page: page_json(self.get_request(self.customer_url, params={"page": page})),
+            lambda item: customer_from_list_item(item, lazy=self.lazy_parsing, raw_body=self.raw_body),
+        )
@@ -18,5 +18,9 @@ class PaywayError(Exception):
         self._code = code
         self._message = f"{code}: {message}"
 
+    @property
+    def code(self) -> str:
+        return self._code
+
     def __str__(self) -> str:
         return self._message
@@ -0,0 +1,181 @@
+"""
+Per-request instrumentation. Clients created with ``hooks=[...]`` call each hook
+with an AttemptEvent after every HTTP attempt (retries included) and with a
+ParseEvent after a response body is turned into a model, so timings can go to
+a tracer or metrics library without patching requests or httpx.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any
+
+from payway.utils import endpoint_template
+
+logger = getLogger(__name__)
+
+
+@dataclass(slots=True, frozen=True)
+class AttemptEvent:
+    """
+    One HTTP attempt. ``endpoint`` is a template such as
+    ``/transactions/{transactionId}/void``, so it is safe to use as a metric label.
+    ``connect`` is the time spent opening a connection (None when a pooled one
+    was reused). ``ttfb`` runs from sending the request, including any connect,
+    to receiving the response headers. ``retry_wait`` is the pause before the
+    next attempt, or None when this attempt was the last.
+    """
+
+    method: str
+    endpoint: str
+    attempt: int
+    status: int | None
+    error: str | None
+    duration: float
+    connect: float | None
+    ttfb: float | None
+    retry_wait: float | None
+    bytes_out: int | None
+    bytes_in: int | None
+
+
+@dataclass(slots=True, frozen=True)
+class ParseEvent:
+    """
+    Decoding one response: ``json`` seconds in the JSON decoder, ``parse`` seconds in ``from_dict``
+    """
+
+    model: str
+    endpoint: str
+    status: int
+    json: float
+    parse: float
+
+
+RequestEvent = AttemptEvent | ParseEvent
+Hook = Callable[[RequestEvent], None]
+
+# httpx trace phases that open a connection
+CONNECT_PHASES = frozenset({"connection.connect_tcp", "connection.connect_unix_socket", "connection.start_tls"})
+
+
+def emit(hooks: list[Hook], event: RequestEvent) -> None:
+    """
+    Call each hook; a failing hook is logged and never fails the request
+    """
+    for hook in hooks:
+        try:
+            hook(event)
+        except Exception:
+            logger.exception("PayWay request hook %r failed", hook)
+
+
+def _size(body: Any) -> int | None:  # noqa: ANN401
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, bytes | bytearray):
+        return len(body)
+    return None
+
+
+def body_sizes(response: Any) -> tuple[int | None, int | None]:  # noqa: ANN401
+    """
+    Bytes sent and received for a requests or httpx response
+    """
+    request = getattr(response, "request", None)
+    # requests' PreparedRequest has .body, httpx's Request has .content
+    sent = _size(getattr(request, "body", None)) if hasattr(request, "body") else _size(getattr(request, "content", None))
+    return sent, _size(getattr(response, "content", None))
+
+
+@dataclass(slots=True)
+class Attempt:
+    """
+    Collects the timings of one attempt while it is in flight. The transport fills
+    in ``connect``, ``ttfb`` and how the connection was got; the retry loop sets
+    ``response``, ``error`` and ``retry_wait``.
+    """
+
+    method: str
+    endpoint: str
+    number: int
+    started: float = field(default_factory=time.perf_counter)
+    response: Any = None
+    error: BaseException | None = None
+    retry_wait: float | None = None
+    connect: float | None = None
+    ttfb: float | None = None
+    # Whether the attempt went out on a pooled keep-alive connection, and whether it
+    # opened (or tried to open) one of its own
+    reused_connection: bool = False
+    new_connection: bool = False
+    _phases: dict[str, float] = field(default_factory=dict)
+    _sent_at: float | None = None
+
+    def connected(self, seconds: float) -> None:
+        self.connect = (self.connect or 0.0) + seconds
+
+    def mark(self, event_name: str) -> None:
+        """
+        Record an httpx trace event, e.g. ``connection.connect_tcp.complete``
+        """
+        now = time.perf_counter()
+        phase, _, stage = event_name.rpartition(".")
+        if stage == "started":
+            self._phases[phase] = now
+            self.new_connection = self.new_connection or phase in CONNECT_PHASES
+            if phase.endswith("send_request_headers") and not self.new_connection:
+                self.reused_connection = True
+            self._sent_at = self._sent_at or now
+        elif phase in CONNECT_PHASES:
+            self.connected(now - self._phases.pop(phase, now))
+        elif phase.endswith("receive_response_headers"):
+            self.ttfb = now - (self._sent_at or self.started)
+
+    async def trace(self, event_name: str, info: dict[str, Any]) -> None:
+        self.mark(event_name)
+
+    def event(self) -> AttemptEvent:
+        response = self.response
+        sent, received = body_sizes(response) if response is not None else (None, None)
+        return AttemptEvent(
+            method=self.method,
+            endpoint=endpoint_template(self.endpoint),
+            attempt=self.number,
+            status=None if response is None else response.status_code,
+            error=None if self.error is None else type(self.error).__name__,
+            duration=time.perf_counter() - self.started,
+            connect=self.connect,
+            ttfb=self.ttfb,
+            retry_wait=self.retry_wait,
+            bytes_out=sent,
+            bytes_in=received,
+        )
+
+
+# The attempt in flight in this thread or task, for the transport to report connections to
+current_attempt: ContextVar[Attempt | None] = ContextVar("payway_attempt", default=None)
+
+
+@contextmanager
+def instrument(hooks: list[Hook], method: str, endpoint: str, number: int) -> Iterator[Attempt]:
+    """
+    Time one attempt and, if there are hooks, emit its AttemptEvent when the
+    block exits, whether it returns or raises
+    """
+    attempt = Attempt(method, endpoint, number)
+    token = current_attempt.set(attempt)
+    try:
+        yield attempt
+    except BaseException as exc:
+        attempt.error = attempt.error or exc
+        raise
+    finally:
+        current_attempt.reset(token)
+        if hooks:
+            emit(hooks, attempt.event())
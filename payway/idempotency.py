@@ -0,0 +1,82 @@
+"""
+Idempotency-Keys for POSTs. PayWay replays its original response to a POST
+that repeats an earlier one's key instead of acting on it again, so a keyed
+POST can be retried after a timeout or a 503 without charging twice.
+
+POSTs made inside an ``operation`` are keyed from its ID, so running the
+same operation again (e.g. after a crash) sends the same keys and PayWay
+replays what it already did. Outside one, clients with
+``auto_idempotency_keys=True`` give each POST a random key.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from payway.constants import PAYWAY_API_URL
+
+OPERATION_KEY_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, PAYWAY_API_URL)
+
+
+class Operation:
+    """
+    A caller-named unit of work, e.g. ``refund-order-1042``. Its POSTs are keyed
+    by the operation ID, the endpoint and how many POSTs to that endpoint came
+    before in the operation, so a rerun that makes the same calls in the same
+    order reuses every key. Request bodies are left out of the key: they can
+    hold card numbers.
+    """
+
+    def __init__(self, operation_id: str) -> None:
+        self.operation_id = operation_id
+        self._posts: Counter[str] = Counter()
+
+    def key(self, endpoint: str) -> str:
+        self._posts[endpoint] += 1
+        return str(uuid.uuid5(OPERATION_KEY_NAMESPACE, f"{self.operation_id}:{endpoint}:{self._posts[endpoint]}"))
+
+
+current_operation: ContextVar[Operation | None] = ContextVar("payway_operation", default=None)
+
+
+@contextmanager
+def operation(operation_id: str) -> Iterator[Operation]:
+    """
+    Key the POSTs made in this block from ``operation_id``, on any client. Make
+    the POSTs of one operation one after another, not concurrently, so they are
+    numbered in the same order each time it runs.
+    """
+    current = Operation(operation_id)
+    token = current_operation.set(current)
+    try:
+        yield current
+    finally:
+        current_operation.reset(token)
+
+
+def idempotency_key(endpoint: str, *, auto: bool) -> str | None:
+    """
+    The key for a POST to ``endpoint`` that the caller didn't key: derived from
+    the current operation if there is one, else random when ``auto``, else None
+    """
+    current = current_operation.get()
+    if current is not None:
+        return current.key(endpoint)
+    return str(uuid.uuid4()) if auto else None
+
+
+@contextmanager
+def noting_idempotency_key(key: str | None) -> Iterator[None]:
+    """
+    Add ``key`` as a note to exceptions raised in the block, so it is logged with them
+    """
+    try:
+        yield
+    except Exception as exc:
+        if key is not None:
+            exc.add_note(f"Idempotency-Key: {key}")
+        raise
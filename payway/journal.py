@@ -0,0 +1,367 @@
+"""
+A write-ahead journal of payment POSTs, so a worker that dies between sending
+a payment and recording its result can find out afterwards what happened
+instead of searching by hand.
+
+A client given a ``Journal`` records each POST to the transactions endpoints
+(payments, refunds, voids, captures) with its Idempotency-Key and body before
+sending it, and its HTTP status once a response arrives. An entry with no
+outcome is one whose result nobody saw. ``recover`` settles those entries:
+first by searching PayWay for the entry's order number, then by resending it
+with its original key, which PayWay answers with the original outcome if it
+processed the first attempt. Single-use token requests are never journalled,
+because their bodies hold card details.
+
+The journal is a file of JSON lines that is only ever appended to, and
+rewritten down to the unfinished entries by ``compact``. Writes use group
+commit: a record is durable (written and fsynced) before ``begin`` or
+``finish`` returns, but concurrent writers share one fsync. The first
+writer to find no flush in progress writes everything queued so far, while
+later writers queue up for the next flush.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Self
+
+from payway.batch import bounded_map, request_failed
+from payway.exceptions import PaywayError
+from payway.model import PaymentError, PayWayTransaction
+
+if TYPE_CHECKING:
+    from payway.client import Client
+
+# Seconds PayWay's clock may be behind ours when matching transactions to entries
+CLOCK_SKEW = 60.0
+# transactionDateTime is given to the minute
+MINUTE = 60.0
+# transactionDateTime time zones, in hours ahead of UTC
+TIME_ZONES = {"UTC": 0, "GMT": 0, "AEST": 10, "AEDT": 11, "ACST": 9.5, "ACDT": 10.5, "AWST": 8}
+
+# (entry settled, transaction or None, errors or None)
+RecoveryResult = tuple["JournalEntry", PayWayTransaction | None, list[PaymentError] | None]
+
+
+@dataclass(slots=True, frozen=True)
+class JournalEntry:
+    """
+    A journalled POST: ``started`` is when it was first sent, in seconds since the epoch
+    """
+
+    key: str
+    endpoint: str
+    body: dict[str, Any]
+    started: float
+
+
+class Journal:
+    """
+    Thread-safe append-only journal file (see the module docstring). Opening it
+    reads back the entries that were left unfinished and compacts the file.
+    ``commits`` counts flushes and ``records`` the records they wrote.
+    """
+
+    def __init__(self, path: str | os.PathLike[str], *, fsync: bool = True, compact_after: int = 100_000) -> None:
+        """
+        :param path: journal file, created if missing
+        :param fsync: fsync each flush; without it records survive a process crash but not a power cut
+        :param compact_after: rewrite the file once this many records have been appended to it
+        """
+        self.path = os.fspath(path)
+        self.fsync = fsync
+        self.compact_after = compact_after
+        self.commits = 0
+        self.records = 0
+        self._entries: dict[str, JournalEntry] = {}
+        self._flushed = threading.Condition()
+        self._buffer: list[bytes] = []
+        self._queued = 0
+        self._durable = 0
+        self._flushing = False
+        self._appended = 0
+        self._failed: OSError | None = None
+        self._load()
+        self._file = open(self.path, "ab")  # noqa: SIM115
+        self.compact()
+
+    def begin(self, key: str, endpoint: str, body: dict[str, Any]) -> None:
+        """
+        Record that a POST is about to be sent; returns once the record is durable.
+        A key already pending, being retried or replayed, isn't recorded again.
+        """
+        entry = JournalEntry(key, endpoint, body, time.time())
+        with self._flushed:
+            if key in self._entries:
+                return
+            self._entries[key] = entry
+        self._append({"event": "begin", "key": key, "endpoint": endpoint, "body": body, "started": entry.started})
+
+    def finish(self, key: str, status: int | None) -> None:
+        """
+        Record the outcome of a POST: the HTTP status of its response
+        """
+        with self._flushed:
+            self._entries.pop(key, None)
+        self._append({"event": "finish", "key": key, "status": status})
+        if self._appended >= self.compact_after:
+            self.compact()
+
+    def pending(self) -> list[JournalEntry]:
+        """
+        Entries begun and not finished, oldest first
+        """
+        with self._flushed:
+            return sorted(self._entries.values(), key=lambda entry: entry.started)
+
+    def compact(self) -> None:
+        """
+        Rewrite the file to hold only the unfinished entries, replacing it atomically
+        """
+        with self._flushed:
+            while self._flushing:
+                self._flushed.wait()
+            self._raise_if_failed()
+            lines = [self._encode({"event": "begin", **_entry_record(entry)}) for entry in self._entries.values()]
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "wb") as file:
+                file.writelines(lines)
+                self._sync(file)
+            os.replace(tmp, self.path)
+            self._file.close()
+            self._file = open(self.path, "ab")  # noqa: SIM115
+            # queued records are already reflected in the entries just written
+            self._buffer = []
+            self._durable = self._queued
+            self._appended = len(lines)
+            self._flushed.notify_all()
+
+    def close(self) -> None:
+        with self._flushed:
+            while self._flushing:
+                self._flushed.wait()
+            self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def _append(self, record: dict[str, Any]) -> None:
+        line = self._encode(record)
+        with self._flushed:
+            self._raise_if_failed()
+            self._buffer.append(line)
+            self._queued += 1
+            ticket = self._queued
+            while self._durable < ticket:
+                self._raise_if_failed()
+                if self._flushing:
+                    self._flushed.wait()
+                else:
+                    self._flush()
+
+    def _flush(self) -> None:
+        """
+        Write and sync everything queued; called with the lock held, which is
+        released while writing so other writers can queue for the next flush
+        """
+        batch, self._buffer = self._buffer, []
+        self._flushing = True
+        self._flushed.release()
+        try:
+            self._file.writelines(batch)
+            self._sync(self._file)
+        except OSError as exc:
+            # after a failed fsync the file's contents are unknown, so stop trusting it
+            self._failed = exc
+            raise
+        finally:
+            self._flushed.acquire()
+            self._flushing = False
+            self._flushed.notify_all()
+        self._durable += len(batch)
+        self._appended += len(batch)
+        self.commits += 1
+        self.records += len(batch)
+
+    def _sync(self, file: Any) -> None:  # noqa: ANN401
+        file.flush()
+        if self.fsync:
+            os.fsync(file.fileno())
+
+    def _raise_if_failed(self) -> None:
+        if self._failed is not None:
+            msg = f"journal {self.path} failed to write: {self._failed}"
+            raise PaywayError(code="JOURNAL", message=msg) from self._failed
+
+    @staticmethod
+    def _encode(record: dict[str, Any]) -> bytes:
+        return (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode()
+
+    def _load(self) -> None:
+        """
+        Read back the unfinished entries. A last line cut short by a crash mid-write
+        is dropped: its record was never durable, so no caller went on to send.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return
+        for line in data[: data.rfind(b"\n") + 1].splitlines():
+            record = json.loads(line)
+            if record["event"] == "begin":
+                self._entries.setdefault(record["key"], JournalEntry(**_entry_fields(record)))
+            else:
+                self._entries.pop(record["key"], None)
+
+
+def _entry_record(entry: JournalEntry) -> dict[str, Any]:
+    return {"key": entry.key, "endpoint": entry.endpoint, "body": entry.body, "started": entry.started}
+
+
+def _entry_fields(record: dict[str, Any]) -> dict[str, Any]:
+    return {name: record[name] for name in ("key", "endpoint", "body", "started")}
+
+
+def matching_transaction(
+    entry: JournalEntry, transactions: Iterable[dict[str, Any]], claimed: set[int] | None = None, *, skew: float = CLOCK_SKEW
+) -> dict[str, Any] | None:
+    """
+    The one transaction among ``transactions`` (a search-by-order page) that the
+    entry created: same transaction type and principal amount, for a refund or
+    capture the same parent transaction, and made in or after the minute the
+    entry was begun. Transactions made more than ``skew`` seconds before that
+    are earlier attempts and are skipped. None if no transaction matches, if
+    more than one could, or if the only one could be an earlier attempt (made
+    within ``skew`` before the entry began, or undated), so the entry is resent
+    with its key instead. Transactions whose IDs are in ``claimed`` are
+    skipped, so identical entries settle on different transactions; the
+    match's ID is added to it.
+    """
+    claimed = set() if claimed is None else claimed
+    candidates = [
+        transaction
+        for transaction in transactions
+        if transaction.get("transactionId") not in claimed and _could_have_created(entry, transaction, skew)
+    ]
+    if len(candidates) != 1 or not _made_after_begin(entry, candidates[0]):
+        return None
+    (match,) = candidates
+    claimed.add(match.get("transactionId"))
+    return match
+
+
+def _could_have_created(entry: JournalEntry, transaction: dict[str, Any], skew: float) -> bool:
+    body = entry.body
+    parent = body.get("parentTransactionId")
+    made = transaction_time(transaction)
+    return (
+        transaction.get("transactionType") == body.get("transactionType")
+        and _same_amount(transaction.get("principalAmount"), body.get("principalAmount"))
+        and (parent is None or str((transaction.get("parentTransaction") or {}).get("transactionId")) == str(parent))
+        # an earlier attempt under another key, e.g. a declined one, isn't this entry's
+        and (made is None or made + MINUTE + skew > entry.started)
+    )
+
+
+def _made_after_begin(entry: JournalEntry, transaction: dict[str, Any]) -> bool:
+    """
+    Whether the minute the transaction was made in hadn't ended when the entry began
+    """
+    made = transaction_time(transaction)
+    return made is not None and made + MINUTE > entry.started
+
+
+def transaction_time(transaction: dict[str, Any]) -> float | None:
+    """
+    When a transaction was made, in seconds since the epoch, from its
+    ``transactionDateTime`` (e.g. ``12 Jun 2015 18:22 AEST``, to the minute);
+    None if it is missing or in a time zone not in TIME_ZONES
+    """
+    text, _, zone = str(transaction.get("transactionDateTime") or "").rpartition(" ")
+    offset = TIME_ZONES.get(zone)
+    if offset is None:
+        return None
+    try:
+        made = datetime.strptime(text, "%d %b %Y %H:%M").replace(tzinfo=timezone(timedelta(hours=offset)))
+    except ValueError:
+        return None
+    return made.timestamp()
+
+
+def _same_amount(found: object, sent: object) -> bool:
+    try:
+        return round(float(found), 2) == round(float(sent), 2)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return False
+
+
+def recover(client: Client, *, max_workers: int = 8, batch_size: int = 500) -> Iterator[RecoveryResult]:
+    """
+    Settle the unfinished entries in ``client.journal``, oldest first, ``batch_size``
+    at a time. Each batch searches PayWay once per distinct order number, in
+    parallel. An entry that matches exactly one transaction found that way (see
+    ``matching_transaction``) is finished with it. Other entries, including voids,
+    which carry no order number, are resent with their original Idempotency-Key
+    by ``client.replay``. Searching first settles entries whose keys PayWay no
+    longer remembers. It reads the first page of results, the newest, and is only
+    as precise as your order numbers are unique. Yields ``(entry, transaction,
+    errors)``. An entry whose search or resend raised stays unfinished, with the
+    error in ``errors``, for a later run.
+    :param client: Client whose journal to recover; its connection pool should hold at least max_workers connections
+    :param max_workers: searches and resends in flight at once
+    :param batch_size: entries settled per batch
+    """
+    journal = client.journal
+    if journal is None:
+        raise PaywayError(code="JOURNAL", message="recover() needs a client with a journal")
+    entries = iter(journal.pending())
+    while batch := list(islice(entries, batch_size)):
+        yield from _recover_batch(client, journal, batch, max_workers)
+    journal.compact()
+
+
+def _recover_batch(client: Client, journal: Journal, batch: list[JournalEntry], max_workers: int) -> Iterator[RecoveryResult]:
+    searches = dict(bounded_map(lambda order: (order, _search_order(client, order)), _order_numbers(batch), max_workers))
+    claimed: set[int] = set()
+    unmatched = []
+    for entry in batch:
+        found = searches.get(entry.body.get("orderNumber"), [])
+        match = None if isinstance(found, Exception) else matching_transaction(entry, found, claimed)
+        if isinstance(found, Exception):
+            yield entry, None, request_failed(found)
+        elif match is None:
+            unmatched.append(entry)
+        else:
+            journal.finish(entry.key, None)
+            yield entry, PayWayTransaction.from_dict(match), None
+    yield from bounded_map(lambda entry: _replay(client, entry), unmatched, max_workers)
+
+
+def _order_numbers(batch: list[JournalEntry]) -> list[str]:
+    return list(dict.fromkeys(entry.body["orderNumber"] for entry in batch if entry.body.get("orderNumber")))
+
+
+def _search_order(client: Client, order_number: str) -> list[dict[str, Any]] | Exception:
+    try:
+        return client.search_transactions_by_order(order_number).get("data", [])
+    except (PaywayError, *client.request_errors) as exc:
+        return exc
+
+
+def _replay(client: Client, entry: JournalEntry) -> RecoveryResult:
+    try:
+        transaction, errors = client.replay(entry)
+    except (PaywayError, *client.request_errors) as exc:
+        return entry, None, request_failed(exc)
+    return entry, transaction, errors
@@ -0,0 +1,229 @@
+"""
+In-process metrics for PayWay calls: a latency histogram per operation, HTTP
+status and retry outcome, and a count of transactions per PayWay response code.
+Create one Metrics, pass it to clients as ``metrics=``, and read it with
+``snapshot()`` or serve ``exposition()`` to a Prometheus scraper.
+
+Each thread records into its own shard, so recording takes no lock; the shards
+are only merged when a snapshot is taken. The shards of threads that have
+exited are folded into one, so thread pools that come and go don't pile them up.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from itertools import accumulate
+
+from payway.constants import RETRYABLE_STATUS_CODES
+from payway.hooks import Attempt
+from payway.utils import endpoint_template
+
+# Seconds; the upper bounds of the histogram buckets, with +Inf implied
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (HTTP method, endpoint template) -> client method name
+OPERATIONS = {
+    ("POST", "/single-use-tokens"): "create_token",
+    ("POST", "/transactions"): "process_payment",
+    ("GET", "/transactions/{transactionId}"): "get_transaction",
+    ("POST", "/transactions/{transactionId}/void"): "void_transaction",
+    ("GET", "/transactions/search-customer"): "search_transactions_by_customer",
+    ("GET", "/transactions/search-receipt"): "search_transactions_by_receipt",
+    ("GET", "/transactions/search-order"): "search_transactions_by_order",
+    ("POST", "/customers"): "create_customer",
+    ("PUT", "/customers/{customerNumber}"): "create_customer",
+    ("GET", "/customers"): "list_customers",
+    ("GET", "/customers/{customerNumber}"): "get_customer",
+    ("DELETE", "/customers/{customerNumber}"): "delete_customer",
+    ("PUT", "/customers/{customerNumber}/payment-setup"): "update_payment_setup",
+    ("PATCH", "/customers/{customerNumber}/payment-setup"): "stop_or_start_payments",
+    ("PUT", "/customers/{customerNumber}/schedule"): "schedule_payments",
+    ("DELETE", "/customers/{customerNumber}/schedule"): "stop_schedule",
+    ("PUT", "/customers/{customerNumber}/contact"): "update_contact_details",
+}
+
+
+def operation_name(method: str, endpoint: str, transaction_type: str | None = None) -> str:
+    """
+    The client method behind a request, e.g. ``refund_transaction`` for a POST
+    to /transactions with transactionType=refund; ``METHOD /template`` if unknown
+    """
+    template = endpoint_template(endpoint)
+    if transaction_type == "refund" and (method, template) == ("POST", "/transactions"):
+        return "refund_transaction"
+    return OPERATIONS.get((method, template), f"{method} {template}")
+
+
+def call_labels(attempt: Attempt | None) -> tuple[str, str]:
+    """
+    (status, retry outcome) for a call whose last attempt was ``attempt``. The
+    status is the HTTP status, or the exception's name if there was no response.
+    The outcome is ``ok`` or ``failed`` on the first attempt, and
+    ``retried_ok`` or ``retried_failed`` after retries.
+    """
+    if attempt is None:
+        return "none", "failed"
+    response = attempt.response
+    status = type(attempt.error).__name__ if response is None else str(response.status_code)
+    failed = attempt.error is not None or response.status_code in RETRYABLE_STATUS_CODES
+    outcome = "failed" if failed else "ok"
+    return status, outcome if attempt.number == 1 else f"retried_{outcome}"
+
+
+@dataclass(slots=True, frozen=True)
+class HistogramSnapshot:
+    """
+    ``buckets`` pairs each upper bound (seconds, ``inf`` last) with the
+    cumulative number of calls at or below it
+    """
+
+    count: int
+    sum: float
+    buckets: tuple[tuple[float, int], ...]
+
+
+@dataclass(slots=True, frozen=True)
+class MetricsSnapshot:
+    # (operation, status, retry outcome) -> latency histogram
+    calls: dict[tuple[str, str, str], HistogramSnapshot]
+    # (operation, PayWay response code) -> transactions
+    response_codes: dict[tuple[str, str], int]
+
+
+@dataclass(slots=True)
+class _Shard:
+    # key -> [count per bucket..., count over the last bucket, sum of seconds]
+    calls: dict[tuple[str, str, str], list[float]] = field(default_factory=dict)
+    response_codes: dict[tuple[str, str], int] = field(default_factory=dict)
+
+    def merge(self, other: _Shard) -> None:
+        """
+        Add ``other``'s counts to this shard's; ``other`` may be written to meanwhile
+        """
+        for key, series in list(other.calls.items()):
+            total = self.calls.setdefault(key, [0] * len(series))
+            total[:] = [a + b for a, b in zip(total, series, strict=True)]
+        for key, count in list(other.response_codes.items()):
+            self.response_codes[key] = self.response_codes.get(key, 0) + count
+
+
+class Metrics:
+    """
+    Latency histograms and response-code counters shared by any number of clients
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS, *, prefix: str = "payway") -> None:
+        """
+        :param buckets: histogram upper bounds in seconds
+        :param prefix: metric name prefix in the exposition format
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._local = threading.local()
+        # each live thread's shard; the shards of threads that have exited are merged into _retired
+        self._shards: dict[threading.Thread, _Shard] = {}
+        self._retired = _Shard()
+        # bumped by reset(), so threads drop the shards they held and start new ones
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        local = self._local
+        if getattr(local, "generation", None) != self._generation:
+            with self._lock:
+                self._retire_exited()
+                local.generation = self._generation
+                local.shard = self._shards[threading.current_thread()] = _Shard()
+        return local.shard
+
+    def _retire_exited(self) -> None:
+        """
+        Fold the shards of threads that have exited, e.g. a finished thread pool's
+        workers, into _retired; called with the lock held
+        """
+        for thread in [thread for thread in self._shards if not thread.is_alive()]:
+            self._retired.merge(self._shards.pop(thread))
+
+    def observe(self, operation: str, status: str, outcome: str, seconds: float) -> None:
+        """
+        Record one call and its latency
+        """
+        calls = self._shard().calls
+        key = (operation, status, outcome)
+        series = calls.get(key)
+        if series is None:
+            series = calls[key] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def observe_call(self, operation: str, attempt: Attempt | None, seconds: float) -> None:
+        status, outcome = call_labels(attempt)
+        self.observe(operation, status, outcome, seconds)
+
+    def count_response_code(self, operation: str, response_code: str) -> None:
+        codes = self._shard().response_codes
+        key = (operation, response_code)
+        codes[key] = codes.get(key, 0) + 1
+
+    def snapshot(self) -> MetricsSnapshot:
+        """
+        Everything recorded so far, merged across threads
+        """
+        total = _Shard()
+        with self._lock:
+            self._retire_exited()
+            total.merge(self._retired)
+            live = list(self._shards.values())
+        for shard in live:
+            total.merge(shard)
+        return MetricsSnapshot({key: self._histogram(series) for key, series in total.calls.items()}, total.response_codes)
+
+    def _histogram(self, series: list[float]) -> HistogramSnapshot:
+        cumulative = list(accumulate(int(count) for count in series[:-1]))
+        bounds = (*self.buckets, float("inf"))
+        return HistogramSnapshot(cumulative[-1], series[-1], tuple(zip(bounds, cumulative, strict=True)))
+
+    def reset(self) -> None:
+        """
+        Forget everything recorded so far. Threads move to new shards on their next
+        write, so none is cleared while it is being written to.
+        """
+        with self._lock:
+            self._generation += 1
+            self._shards = {}
+            self._retired = _Shard()
+
+    def exposition(self) -> str:
+        """
+        The snapshot in the Prometheus text exposition format
+        """
+        snapshot = self.snapshot()
+        duration = f"{self.prefix}_request_duration_seconds"
+        codes = f"{self.prefix}_response_codes_total"
+        lines = [
+            f"# HELP {duration} PayWay API calls by operation, HTTP status and retry outcome, including retries.",
+            f"# TYPE {duration} histogram",
+        ]
+        for (operation, status, outcome), histogram in sorted(snapshot.calls.items()):
+            labels = f'operation="{_label(operation)}",status="{_label(status)}",retry="{outcome}"'
+            lines.extend(f'{duration}_bucket{{{labels},le="{_bound(le)}"}} {count}' for le, count in histogram.buckets)
+            lines.append(f"{duration}_sum{{{labels}}} {histogram.sum!r}")
+            lines.append(f"{duration}_count{{{labels}}} {histogram.count}")
+        lines.append(f"# HELP {codes} PayWay transactions by response code.")
+        lines.append(f"# TYPE {codes} counter")
+        lines.extend(
+            f'{codes}{{operation="{_label(operation)}",response_code="{_label(code)}"}} {count}'
+            for (operation, code), count in sorted(snapshot.response_codes.items())
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(le: float) -> str:
+    return "+Inf" if le == float("inf") else repr(le)
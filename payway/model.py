@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import json
+import zlib
+from collections.abc import Callable
 from dataclasses import dataclass, field, fields
-from typing import Any, ClassVar, Self
+from types import MemberDescriptorType
+from typing import Any, ClassVar, NamedTuple, Self
 
+from payway.constants import RawBody
 from payway.utils import snake_to_camel
 
 
@@ -14,44 +19,187 @@ class PayWayModel:
     Field metadata keys:
         alias:      PayWay key when it is not the camelCase of the field name
         exclude:    omit the field from to_dict output
-        from_dict:  callable applied to a non-None raw value when parsing
+        from_dict:  callable applied to a non-None raw value when parsing; with
+                    ``from_dict(data, lazy=True)`` it runs on first access instead
 
     Instances built by from_dict keep the response body they were parsed from
     on ``raw``, unchanged. Parsing is lossy - undeclared PayWay keys are dropped,
     absent ones become None, and aliases rename them - so callers persisting a
     response for auditing or dispute resolution should store ``raw``, not
     ``to_dict()``. Models you build yourself leave it None.
+
+    A model parsed from a POST's response has the Idempotency-Key the POST was
+    sent with on ``idempotency_key``, for logging; otherwise it is None.
+
+    The models are slotted dataclasses, so they carry no per-instance ``__dict__``.
+    Pass ``raw_body=RawBody.COMPRESS`` to from_dict to hold ``raw`` zlib-compressed
+    (it is decompressed on each read) or ``RawBody.DROP`` not to keep it at all.
     """
 
+    __slots__ = ("_idempotency_key", "_raw")
     __dataclass_fields__: ClassVar[dict[str, Any]]
-    raw: dict[str, Any] | None = None
+    _payway_codec: ClassVar[_Codec]
+
+    @property
+    def raw(self) -> dict[str, Any] | None:
+        raw = getattr(self, "_raw", None)
+        if isinstance(raw, bytes):
+            return json.loads(zlib.decompress(raw))
+        return raw
+
+    @raw.setter
+    def raw(self, value: dict[str, Any] | None) -> None:
+        self._raw = value
+
+    @property
+    def idempotency_key(self) -> str | None:
+        return getattr(self, "_idempotency_key", None)
+
+    @idempotency_key.setter
+    def idempotency_key(self, value: str | None) -> None:
+        self._idempotency_key = value
+
+    @classmethod
+    def _codec(cls) -> _Codec:
+        """
+        The class's field plan, built from its dataclass fields on first use and
+        cached on the class, so to_dict/from_dict don't redo the alias, converter
+        and exclude lookups for every field on every call.
+        """
+        codec = cls.__dict__.get("_payway_codec")
+        if codec is None:
+            codec = _Codec.compile(cls)
+            cls._payway_codec = codec
+        return codec
 
     def to_dict(self) -> dict[str, Any]:
         result = {}
-        for f in fields(self):
-            if f.metadata.get("exclude"):
-                continue
-            value = getattr(self, f.name)
+        for name, key in self._codec().encode:
+            value = getattr(self, name)
             if isinstance(value, PayWayModel):
                 value = value.to_dict()
-            result[f.metadata.get("alias", snake_to_camel(f.name))] = value
+            result[key] = value
         return result
 
     @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> Self:
-        kwargs = {}
-        for f in fields(cls):
-            value = data.get(f.metadata.get("alias", snake_to_camel(f.name)))
-            converter = f.metadata.get("from_dict")
-            if converter is not None and value is not None:
-                value = converter(value)
-            kwargs[f.name] = value
+    def from_dict(cls, data: dict[str, Any], *, lazy: bool = False, raw_body: RawBody = RawBody.KEEP) -> Self:
+        codec = cls._codec()
+        kwargs = {name: data.get(key) for name, key in codec.decode}
+        for name, key, converter in codec.convert:
+            kwargs[name] = cls._nested(converter, data.get(key), lazy=lazy, raw_body=raw_body)
         instance = cls(**kwargs)
-        instance.raw = data
+        if raw_body is not RawBody.DROP:
+            instance.raw = data
+        if raw_body is RawBody.COMPRESS:
+            instance.compress_raw()
         return instance
 
+    @classmethod
+    def _nested(cls, converter: Callable[[Any], Any], value: Any, *, lazy: bool, raw_body: RawBody = RawBody.KEEP) -> Any:  # noqa: ANN401
+        if value is None:
+            return None
+        deferred = _Deferred(converter, value, raw_body is RawBody.KEEP)
+        if lazy:
+            cls._codec()  # installs the _NestedField that resolves the deferred value
+            return deferred
+        return deferred.build()
+
+    def compress_raw(self) -> None:
+        """
+        Hold ``raw`` as zlib-compressed JSON; reading ``raw`` decompresses it
+        """
+        raw = getattr(self, "_raw", None)
+        if isinstance(raw, dict):
+            self._raw = zlib.compress(json.dumps(raw, separators=(",", ":")).encode())
+
+    def drop_raw(self) -> None:
+        """
+        Forget ``raw`` on this model and the nested models in it
+        """
+        self._raw = None
+        for name, _, _ in self._codec().convert:
+            value = getattr(self, name)
+            if isinstance(value, PayWayModel):
+                value.drop_raw()
+
+
+class _Deferred(NamedTuple):
+    converter: Callable[[Any], Any]
+    value: Any
+    keep_raw: bool
 
-@dataclass
+    def build(self) -> Any:  # noqa: ANN401
+        result = self.converter(self.value)
+        # A nested body is part of the enclosing model's, which is compressed or dropped
+        if not self.keep_raw and isinstance(result, PayWayModel):
+            result.drop_raw()
+        return result
+
+
+class _NestedField:
+    """
+    Descriptor for fields with a from_dict converter: a _Deferred value stored by a
+    lazy from_dict is converted on first read and the result cached on the instance.
+    It wraps the slot the dataclass made for the field, or the instance ``__dict__``
+    for subclasses that are not slotted.
+    """
+
+    def __init__(self, name: str, default: Any, slot: MemberDescriptorType | None) -> None:  # noqa: ANN401
+        self.name = name
+        self.default = default
+        self.slot = slot
+
+    def __get__(self, instance: PayWayModel | None, owner: type) -> Any:  # noqa: ANN401
+        if instance is None:
+            return self.default
+        value = instance.__dict__.get(self.name, self.default) if self.slot is None else self.slot.__get__(instance, owner)
+        if type(value) is _Deferred:
+            value = value.build()
+            self.__set__(instance, value)
+        return value
+
+    def __set__(self, instance: PayWayModel, value: Any) -> None:  # noqa: ANN401
+        if self.slot is None:
+            instance.__dict__[self.name] = value
+        else:
+            self.slot.__set__(instance, value)
+
+    @classmethod
+    def install(cls, model: type, name: str, default: Any) -> None:  # noqa: ANN401
+        """
+        Put the descriptor on the class that declares the field, in place of its slot
+        or class default, unless a subclass compiled first already did.
+        """
+        owner = next((klass for klass in model.__mro__ if name in klass.__dict__), model)
+        current = owner.__dict__.get(name)
+        if isinstance(current, cls):
+            return
+        slot = current if isinstance(current, MemberDescriptorType) else None
+        setattr(owner, name, cls(name, default, slot))
+
+
+class _Codec(NamedTuple):
+    # (field name, PayWay key) of the fields to_dict writes
+    encode: tuple[tuple[str, str], ...]
+    # (field name, PayWay key) of the fields from_dict copies as-is
+    decode: tuple[tuple[str, str], ...]
+    # (field name, PayWay key, converter) of the fields from_dict converts
+    convert: tuple[tuple[str, str, Callable[[Any], Any]], ...]
+
+    @classmethod
+    def compile(cls, model: type[PayWayModel]) -> _Codec:
+        keyed = [(f, f.metadata.get("alias", snake_to_camel(f.name))) for f in fields(model)]
+        for f, _ in keyed:
+            if f.metadata.get("from_dict") is not None:
+                _NestedField.install(model, f.name, f.default)
+        return cls(
+            encode=tuple((f.name, key) for f, key in keyed if not f.metadata.get("exclude")),
+            decode=tuple((f.name, key) for f, key in keyed if f.metadata.get("from_dict") is None),
+            convert=tuple((f.name, key, f.metadata["from_dict"]) for f, key in keyed if f.metadata.get("from_dict") is not None),
+        )
+
+
+@dataclass(slots=True)
 class BankAccount(PayWayModel):
     """
     account_name: str: 	Name used to open bank account.
@@ -64,7 +212,7 @@ class BankAccount(PayWayModel):
     account_number: str
 
 
-@dataclass
+@dataclass(slots=True)
 class PayWayCard(PayWayModel):
     card_number: str | None = None
     cvn: str | None = None
@@ -73,14 +221,16 @@ class PayWayCard(PayWayModel):
     expiry_date_year: str | None = None  # Should be YY
 
     @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> PayWayCard:
-        card = super().from_dict({**data, "cardNumber": data.get("maskedCardNumber") or data.get("cardNumber")})
-        # Keep PayWay's own body, not the copy rewritten for the alias above.
-        card.raw = data
+    def from_dict(cls, data: dict[str, Any], *, lazy: bool = False, raw_body: RawBody = RawBody.KEEP) -> PayWayCard:
+        # slots=True rebuilds the class, which breaks zero-argument super()
+        card = super(PayWayCard, cls).from_dict(data, lazy=lazy, raw_body=raw_body)
+        # PayWay returns the masked number of a stored card
+        if data.get("maskedCardNumber"):
+            card.card_number = data["maskedCardNumber"]
         return card
 
 
-@dataclass
+@dataclass(slots=True)
 class Merchant(PayWayModel):
     """
     merchantId 	Issued by us to uniquely identify a merchant facility
@@ -100,7 +250,7 @@ class Merchant(PayWayModel):
     surcharge_account_number: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class PaymentSetup(PayWayModel):
     payment_method: str | None = None
     stopped: bool | None = None
@@ -108,7 +258,7 @@ class PaymentSetup(PayWayModel):
     merchant: Merchant | None = field(default=None, metadata={"from_dict": Merchant.from_dict})
 
 
-@dataclass
+@dataclass(slots=True)
 class PayWayCustomer(PayWayModel):
     custom_id: str | None = field(default=None, metadata={"exclude": True})
     customer_name: str | None = None
@@ -122,7 +272,7 @@ class PayWayCustomer(PayWayModel):
     postal_code: str | None = None
     token: str | None = field(default=None, metadata={"alias": "singleUseTokenId"})
     customer_number: str | None = field(default=None, metadata={"exclude": True})
-    payment_setup: PaymentSetup | None = field(default=None, metadata={"exclude": True})
+    payment_setup: PaymentSetup | None = field(default=None, metadata={"exclude": True, "from_dict": PaymentSetup.from_dict})
     notes: str | None = None
     custom_field_1: str | None = None
     custom_field_2: str | None = None
@@ -130,23 +280,21 @@ class PayWayCustomer(PayWayModel):
     custom_field_4: str | None = None
 
     def to_dict(self) -> dict[str, Any]:
-        data = super().to_dict()
+        data = super(PayWayCustomer, self).to_dict()
         data["sendEmailReceipts"] = "true" if self.send_email_receipts else "false"
         if not self.token:
             del data["singleUseTokenId"]
         return data
 
     @classmethod
-    def from_dict(cls, data: dict[str, Any]) -> PayWayCustomer:
+    def from_dict(cls, data: dict[str, Any], *, lazy: bool = False, raw_body: RawBody = RawBody.KEEP) -> PayWayCustomer:
         """
         Parse PayWay Customer response data: contact and address are nested
         in the response but flat on this model.
         """
         contact = data.get("contact", {})
         address = contact.get("address", {})
-        payment_setup = None
-        if data.get("paymentSetup") is not None:
-            payment_setup = PaymentSetup.from_dict(data.get("paymentSetup", {}))
+        payment_setup = cls._nested(PaymentSetup.from_dict, data.get("paymentSetup"), lazy=lazy, raw_body=raw_body)
         custom_fields = data.get("customFields", {})
         return PayWayCustomer(
             customer_name=contact.get("customerName"),
@@ -168,11 +316,17 @@ class PayWayCustomer(PayWayModel):
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class PaymentError:
+    """
+    A field PayWay rejected. Errors for a keyed POST carry its Idempotency-Key
+    on ``idempotency_key``, for logging, as the model would have.
+    """
+
     field_name: str | None = None
     message: str | None = None
     field_value: str | None = None
+    idempotency_key: str | None = field(default=None, compare=False)
 
     @staticmethod
     def from_dict(payway_response: dict[str, Any]) -> list[PaymentError]:
@@ -208,7 +362,7 @@ class PaymentError:
         return message
 
 
-@dataclass
+@dataclass(slots=True)
 class ServerError(PayWayModel):
     error_number: int | None = None
     trace_code: str | None = None
@@ -217,7 +371,7 @@ class ServerError(PayWayModel):
         return f"Error number: {self.error_number} Trace code: {self.trace_code}"
 
 
-@dataclass
+@dataclass(slots=True)
 class PayWayPayment(PayWayModel):
     """
     customer_number: 	Customer to which this payment belongs.
@@ -242,14 +396,14 @@ class PayWayPayment(PayWayModel):
     merchant_id: str | None = None
 
     def to_dict(self) -> dict[str, Any]:
-        data = super().to_dict()
+        data = super(PayWayPayment, self).to_dict()
         for key in ("parentTransactionId", "singleUseTokenId", "merchantId"):
             if not data[key]:
                 del data[key]
         return data
 
 
-@dataclass
+@dataclass(slots=True)
 class PayWayTransaction(PayWayModel):
     transaction_id: int | None = None
     receipt_number: str | None = None
@@ -289,7 +443,7 @@ class PayWayTransaction(PayWayModel):
     is_refundable: bool | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenResponse(PayWayModel):
     token: str | None = field(default=None, metadata={"alias": "singleUseTokenId"})
     payment_method: str | None = None
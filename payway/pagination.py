@@ -0,0 +1,86 @@
+"""
+Follow PayWay's ``next`` links so list and search results can be iterated as
+one stream of models.
+
+Each page is 20 results. While the caller works through one page, the next is
+already being fetched in the background, and no more than those two pages are
+held at once.
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, TypeVar
+from urllib.parse import parse_qs, urlsplit
+
+from payway.exceptions import PaywayError
+
+if TYPE_CHECKING:
+    import asyncio
+
+T = TypeVar("T")
+
+Page = dict[str, Any]
+
+
+def next_page_number(page: Page) -> int | None:
+    """
+    The page number in a response's ``next`` link, or None on the last page
+    """
+    for link in page.get("links") or []:
+        if link.get("rel") == "next":
+            numbers = parse_qs(urlsplit(link.get("href", "")).query).get("page")
+            return int(numbers[0]) if numbers else None
+    return None
+
+
+def page_json(response: Any) -> Page:  # noqa: ANN401
+    """
+    The JSON body of a list or search response. Unlike json_list, error bodies
+    are raised rather than returned, so they are never mistaken for results.
+    """
+    if response.status_code != HTTPStatus.OK:
+        raise PaywayError(str(response.status_code), response.text)
+    return response.json()
+
+
+def paginate(fetch_page: Callable[[int | None], Page], parse: Callable[[dict[str, Any]], T]) -> Iterator[T]:
+    """
+    Yield ``parse(item)`` for every item on every page, fetching the next page on a
+    background thread while the current one is consumed.
+    :param fetch_page: returns the JSON body of a page; called with None for the first page
+    :param parse: builds a model from one item in a page's ``data``
+    """
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="payway-pages") as executor:
+        future: Future[Page] | None = executor.submit(fetch_page, None)
+        try:
+            while future is not None:
+                page = future.result()
+                page_number = next_page_number(page)
+                future = executor.submit(fetch_page, page_number) if page_number else None
+                yield from map(parse, page.get("data", []))
+        finally:
+            if future is not None:
+                future.cancel()
+
+
+async def apaginate(fetch_page: Callable[[int | None], Awaitable[Page]], parse: Callable[[dict[str, Any]], T]) -> AsyncIterator[T]:
+    """
+    asyncio version of paginate: the next page is fetched in a task while the
+    current one is consumed.
+    """
+    import asyncio
+
+    task: asyncio.Task[Page] | None = asyncio.ensure_future(fetch_page(None))
+    try:
+        while task is not None:
+            page = await task
+            page_number = next_page_number(page)
+            task = asyncio.ensure_future(fetch_page(page_number)) if page_number else None
+            for item in page.get("data", []):
+                yield parse(item)
+    finally:
+        if task is not None:
+            task.cancel()
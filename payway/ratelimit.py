@@ -0,0 +1,156 @@
+"""
+Client-side rate limiting, so a pool of workers slows down before PayWay
+starts answering 429 rather than after.
+
+Each endpoint family (single-use tokens, transactions, customers) gets its own
+token bucket. When PayWay throttles a request the family's rate is cut and any
+``Retry-After`` is honoured by every caller; the rate then climbs back to its
+configured limit over ``recovery_time`` seconds.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Mapping
+
+from payway.constants import EndpointFamily
+
+
+class TokenBucket:
+    """
+    A token bucket refilled at ``rate`` tokens a second, holding at most ``burst``.
+    Safe to share between threads and coroutines: the lock is only held to update
+    the counters, never while waiting.
+    """
+
+    # The lowest an adapted rate goes, as a share of the configured one
+    min_rate_fraction = 0.05
+    # Refills are float sums; without slack a waiter can be left 1e-15 of a token short
+    epsilon = 1e-9
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        *,
+        decrease: float = 0.5,
+        recovery_time: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param rate: requests a second when PayWay is not throttling
+        :param burst: requests that may be sent at once after an idle spell (default: one second's worth)
+        :param decrease: factor applied to the current rate on each throttled response
+        :param recovery_time: seconds to climb from zero back up to ``rate``
+        :param clock: monotonic clock, replaceable in tests
+        """
+        if not rate > 0:
+            msg = f"rate must be more than 0 requests a second, not {rate}"
+            raise ValueError(msg)
+        if burst is not None and not burst >= 1:
+            msg = f"burst must be at least 1 request, not {burst}"
+            raise ValueError(msg)
+        self.limit = rate
+        self.rate = rate
+        self.burst = burst or max(rate, 1.0)
+        self.decrease = decrease
+        self.recovery_time = recovery_time
+        self.clock = clock
+        self.tokens = self.burst
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.updated = now
+        self.rate = min(self.limit, self.rate + self.limit * elapsed / self.recovery_time)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def take(self) -> float:
+        """
+        Take a token if one is available and return 0, otherwise return the
+        seconds to wait before trying again
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            if self.tokens >= 1 - self.epsilon:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def throttled(self, retry_after: float | None = None) -> None:
+        """
+        PayWay pushed back: cut the rate, empty the bucket and hold every caller
+        for ``retry_after`` seconds if PayWay gave one
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self.rate = max(self.rate * self.decrease, self.limit * self.min_rate_fraction)
+            self.tokens = 0.0
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+
+
+class RateLimiter:
+    """
+    One TokenBucket per endpoint family. Share a single instance between all the
+    clients (threads, or AsyncClients on one loop) that use the same credentials.
+
+        limiter = RateLimiter({"transactions": 20, "customers": 5, "tokens": 20})
+        client = Client(..., rate_limiter=limiter)
+
+    Families missing from ``rates`` are not limited.
+    """
+
+    def __init__(
+        self,
+        rates: Mapping[EndpointFamily | str, float],
+        *,
+        burst: float | None = None,
+        decrease: float = 0.5,
+        recovery_time: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param rates: requests a second per endpoint family, each more than 0
+        :param burst: bucket size for every family (default: one second's worth of its rate)
+        :param decrease: factor applied to a family's rate on each throttled response
+        :param recovery_time: seconds for a family's rate to climb from zero back to its limit
+        """
+        self.buckets = {
+            EndpointFamily(family): TokenBucket(rate, burst, decrease=decrease, recovery_time=recovery_time, clock=clock)
+            for family, rate in rates.items()
+        }
+
+    def acquire(self, family: EndpointFamily | None) -> None:
+        """
+        Block the calling thread until a request to ``family`` may be sent
+        """
+        bucket = self.buckets.get(family) if family else None
+        if bucket is None:
+            return
+        for wait in iter(bucket.take, 0.0):
+            time.sleep(wait)
+
+    async def aacquire(self, family: EndpointFamily | None) -> None:
+        """
+        Wait, without blocking the event loop, until a request to ``family`` may be sent
+        """
+        bucket = self.buckets.get(family) if family else None
+        if bucket is None:
+            return
+        import asyncio
+
+        for wait in iter(bucket.take, 0.0):
+            await asyncio.sleep(wait)
+
+    def throttled(self, family: EndpointFamily | None, retry_after: float | None = None) -> None:
+        bucket = self.buckets.get(family) if family else None
+        if bucket is not None:
+            bucket.throttled(retry_after)
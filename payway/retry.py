@@ -0,0 +1,166 @@
+"""
+When and how long to wait before resending a request.
+
+``RetryPolicy`` backs off exponentially with full jitter, so workers that failed
+together don't retry together. A shared ``RetryBudget`` caps retries at a share
+of all requests, and an optional ``deadline`` bounds the time one call may take
+across all of its attempts.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections.abc import Callable
+
+
+class RetryBudget:
+    """
+    Retries allowed as a share of requests: every request adds ``ratio`` of a
+    retry to the budget and every retry spends one. Up to ``reserve`` retries can
+    be banked, so a quiet client can still retry. Thread-safe.
+    """
+
+    def __init__(self, ratio: float = 0.1, reserve: float = 10.0) -> None:
+        """
+        :param ratio: retries allowed per request sent, e.g. 0.1 for at most one in ten
+        :param reserve: retries that can be banked, and the starting balance
+        """
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.balance = min(self.reserve, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Spend one retry if the budget has it
+        """
+        with self._lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter: the wait before retry ``n`` is uniform
+    between 0 and ``min(max_delay, base_delay * 2**n)``. A Retry-After header from
+    PayWay is used instead when present.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        max_retries: int = 3,
+        *,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        budget: RetryBudget | None = None,
+        deadline: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        random: Callable[[], float] = random.random,
+    ) -> None:
+        """
+        :param max_retries: retries per request on network errors and HTTP 429/503 (0 disables)
+        :param base_delay: seconds the first backoff is drawn from
+        :param max_delay: cap on the backoff range
+        :param budget: shared cap on the share of traffic that may be retries (default RetryBudget())
+        :param deadline: seconds a call may take across all its attempts; timeouts are shortened to fit
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+        self.deadline = deadline
+        self.clock = clock
+        self.random = random
+
+    def backoff(self, attempt: int) -> float:
+        return self.random() * min(self.max_delay, self.base_delay * 2**attempt)
+
+    def call(self, *, can_retry: bool) -> RetryCall:
+        """
+        Start tracking one request, counting it towards the retry budget
+        """
+        if self.budget is not None:
+            self.budget.deposit()
+        deadline_at = self.clock() + self.deadline if self.deadline is not None else None
+        return RetryCall(self, self.max_retries if can_retry else 0, deadline_at, can_retry=can_retry)
+
+
+class LinearRetryPolicy(RetryPolicy):
+    """
+    The clients' original schedule, used when only ``max_retries`` and
+    ``retry_delay`` are given: wait ``base_delay * (attempt + 1)``, with no
+    jitter, budget or deadline.
+    """
+
+    def __init__(self, max_retries: int = 0, *, base_delay: float = 1.0) -> None:
+        super().__init__(max_retries, base_delay=base_delay)
+        self.budget = None
+
+    def backoff(self, attempt: int) -> float:
+        return self.base_delay * (attempt + 1)
+
+
+class RetryCall:
+    """
+    The retry state of one request: attempts used and time left before its deadline
+    """
+
+    def __init__(self, policy: RetryPolicy, retries: int, deadline_at: float | None, *, can_retry: bool = False) -> None:
+        self.policy = policy
+        self.retries = retries
+        self.deadline_at = deadline_at
+        self.can_retry = can_retry
+        self.attempt = 0
+        # Resends after the server closed a reused connection (see resend_stale)
+        self.stale = 0
+
+    @property
+    def number(self) -> int:
+        """
+        The number of the attempt about to be sent, counting from 1
+        """
+        return self.attempt + self.stale + 1
+
+    def remaining(self) -> float | None:
+        """
+        Seconds left before the deadline, or None without one
+        """
+        if self.deadline_at is None:
+            return None
+        return max(0.0, self.deadline_at - self.policy.clock())
+
+    def next_wait(self, retry_after: float | None) -> float | None:
+        """
+        Seconds to wait before retrying, or None when the request must not be
+        retried: out of retries, out of budget, or the wait would pass the deadline
+        """
+        if self.attempt >= self.retries:
+            return None
+        wait = retry_after if retry_after is not None else self.policy.backoff(self.attempt)
+        remaining = self.remaining()
+        if remaining is not None and wait >= remaining:
+            return None
+        if self.policy.budget is not None and not self.policy.budget.withdraw():
+            return None
+        self.attempt += 1
+        return wait
+
+    def resend_stale(self) -> bool:
+        """
+        Whether to resend at once after the server closed a pooled keep-alive
+        connection as the request went out on it. Only once per call, only for
+        requests that are safe to resend, and only before the deadline. These
+        resends don't use up max_retries or the retry budget.
+        """
+        if not self.can_retry or self.stale or self.remaining() == 0:
+            return False
+        self.stale += 1
+        return True
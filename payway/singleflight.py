@@ -0,0 +1,100 @@
+"""
+Coalesce concurrent identical reads: while a GET is in flight, other callers
+asking for the same URL and query wait for it and share its response instead
+of sending their own.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+if TYPE_CHECKING:
+    import asyncio
+
+T = TypeVar("T")
+
+
+def request_key(endpoint: str, params: dict[str, Any] | None = None) -> Hashable:
+    """
+    Identify a GET by its URL and query parameters
+    """
+    return endpoint, tuple(sorted(params.items())) if params else ()
+
+
+class _Flight(Generic[T]):
+    __slots__ = ("done", "error", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    Threaded coalescing: the first caller for a key runs ``fetch``; callers
+    arriving while it runs block until it finishes and get the same result or
+    exception. ``shared`` counts the calls that did not send their own request.
+    """
+
+    def __init__(self) -> None:
+        self.shared = 0
+        self._flights: dict[Hashable, _Flight[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fetch: Callable[[], T]) -> T:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fetch()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+
+class AsyncSingleFlight(Generic[T]):
+    """
+    asyncio coalescing: the first caller for a key starts ``fetch`` as a task
+    and every caller awaits it shielded, so cancelling one waiter (even the
+    first) leaves the request running for the others.
+    """
+
+    def __init__(self) -> None:
+        self.shared = 0
+        self._tasks: dict[Hashable, asyncio.Task[T]] = {}
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._landed(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _landed(self, key: Hashable, task: asyncio.Task[T]) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the outcome as seen in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -4,8 +4,25 @@ import json
 import pathlib
 from typing import Any
 
+from payway.model import PayWayCard
+
+# Keyword arguments for a Client or AsyncClient in tests
+CREDENTIALS = {
+    "merchant_id": "TEST",
+    "bank_account_id": "0000000A",
+    "publishable_api_key": "TPUBLISHABLE-API-KEY",
+    "secret_api_key": "TSECRET-API-KEY",
+}
+
 
 def load_json_file(file_path: str) -> dict[str, Any]:
     file = pathlib.Path(file_path)
     with open(file) as f:
         return json.load(f)
+
+
+def make_card() -> PayWayCard:
+    """
+    A test card that PayWay's sandbox, and the emulator, approve
+    """
+    return PayWayCard(card_number="4564710000000004", cvn="847", expiry_date_month="02", expiry_date_year="29")
@@ -0,0 +1,3 @@
+"""
+Tools for testing code that uses PayWay without calling PayWay: see payway.testing.emulator.
+"""
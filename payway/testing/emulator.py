@@ -0,0 +1,616 @@
+"""
+A local stand-in for the PayWay REST API, for integration and load tests that
+can't use PayWay's rate-limited sandbox.
+
+It serves the single-use token, customer and transaction endpoints over HTTP
+from memory, with the JSON shapes PayWay returns (see tests/data). Responses
+can be slowed by a latency distribution, and ``Fault``s inject 429, 500 and
+503 responses (with ``Retry-After`` if given) before a request is handled.
+POSTs repeated with the same Idempotency-Key get the original response back.
+
+    with Emulator(latency=lognormal_latency(0.08), faults=[Fault(503, rate=0.02, retry_after=1)]) as emulator:
+        client = Client(..., api_url=emulator.url)
+
+Tests that don't need real sockets can skip the server and pass
+``transport=emulator.transport()`` to the client instead.
+
+Or from a shell, for a load generator in another process:
+
+    python -m payway.testing.emulator --port 8765 --latency 0.08 --fault 503:0.02:1
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import copy
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging import getLogger
+from typing import Any, Self
+from urllib.parse import parse_qsl, urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from payway.constants import EndpointFamily
+from payway.transport import InMemoryTransport, Request
+from payway.transport import Response as TransportResponse
+from payway.utils import endpoint_family
+
+logger = getLogger(__name__)
+
+API_PREFIX = "/rest/v1"
+PAGE_SIZE = 20
+CUSTOMER_FIELDS = ("customerName", "emailAddress", "phoneNumber")
+ADDRESS_FIELDS = ("street1", "street2", "cityName", "state", "postalCode")
+CUSTOM_FIELDS = ("customField1", "customField2", "customField3", "customField4")
+SEARCH_FIELDS = {"customer": "customerNumber", "receipt": "receiptNumber", "order": "orderNumber"}
+
+# (HTTP status, JSON body or None for no content)
+Response = tuple[int, dict[str, Any] | None]
+Form = dict[str, str]
+
+
+def constant_latency(seconds: float) -> Callable[[], float]:
+    return lambda: seconds
+
+
+def uniform_latency(low: float, high: float, *, rng: random.Random | None = None) -> Callable[[], float]:
+    rng = rng or random.Random()  # noqa: S311
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5, *, rng: random.Random | None = None) -> Callable[[], float]:
+    """
+    Latency with a long tail, like real network and processing time
+    :param median: seconds half the responses are faster than
+    :param sigma: spread; 0.5 puts p99 at about 3.2x the median
+    """
+    rng = rng or random.Random()  # noqa: S311
+    return lambda: rng.lognormvariate(math.log(median), sigma)
+
+
+@dataclass(slots=True)
+class Fault:
+    """
+    Answer a share of requests with an error status instead of handling them
+
+    :param status: 429, 500 or 503
+    :param rate: chance of each matching request getting the fault
+    :param retry_after: seconds to send in a Retry-After header
+    :param family: only fault requests to this endpoint family
+    :param times: stop after this many faults (None for no limit)
+    """
+
+    status: int
+    rate: float = 1.0
+    retry_after: int | None = None
+    family: EndpointFamily | None = None
+    times: int | None = None
+
+    def strikes(self, family: EndpointFamily | None, roll: float) -> bool:
+        if self.times == 0 or self.family not in (None, family) or roll >= self.rate:
+            return False
+        if self.times is not None:
+            self.times -= 1
+        return True
+
+    def response(self) -> tuple[int, dict[str, Any], dict[str, str]]:
+        if self.status == HTTPStatus.INTERNAL_SERVER_ERROR:
+            body = {"errorNumber": self.status, "traceCode": uuid.uuid4().hex}
+        else:
+            body = error_body(HTTPStatus(self.status).phrase)
+        headers = {} if self.retry_after is None else {"Retry-After": str(self.retry_after)}
+        return self.status, body, headers
+
+
+def error_body(message: str, field_name: str | None = None, field_value: str | None = None) -> dict[str, Any]:
+    return {"data": [{"fieldName": field_name, "message": message, "fieldValue": field_value}]}
+
+
+def not_found(what: str) -> Response:
+    return HTTPStatus.NOT_FOUND, error_body(f"{what} not found")
+
+
+def invalid(field_name: str, message: str, field_value: str | None = None) -> Response:
+    return HTTPStatus.UNPROCESSABLE_ENTITY, error_body(message, field_name, field_value)
+
+
+def _masked(card_number: str) -> str:
+    return f"{card_number[:6]}...{card_number[-3:]}"
+
+
+def _amount(value: str | None) -> float | None:
+    try:
+        return round(float(value), 2) if value else None
+    except ValueError:
+        return None
+
+
+def _transaction_id(value: str | None) -> int | None:
+    return int(value) if value and value.isdigit() else None
+
+
+class PayWayState:
+    """
+    The emulated PayWay account: tokens, customers, transactions and replayable
+    idempotent responses, held in memory. Requests are handled one at a time.
+    """
+
+    def __init__(self, merchant_id: str = "TEST") -> None:
+        self.merchant = {"merchantId": merchant_id, "merchantName": "PAYWAY EMULATOR"}
+        self.tokens: dict[str, dict[str, Any]] = {}
+        self.customers: dict[str, dict[str, Any]] = {}
+        self.transactions: dict[int, dict[str, Any]] = {}
+        # Idempotency-Key -> (request fingerprint, original response)
+        self.idempotent: dict[str, tuple[tuple[Any, ...], Response]] = {}
+        self._transaction_ids = iter(range(1_000_000_001, 10**12))
+        self._customer_numbers = iter(range(1, 10**12))
+        self._lock = threading.RLock()
+        self._routes: list[tuple[str, re.Pattern[str], Callable[..., Response]]] = [
+            ("POST", re.compile(r"/single-use-tokens"), self.create_token),
+            ("POST", re.compile(r"/transactions"), self.create_transaction),
+            ("GET", re.compile(r"/transactions/search-(customer|receipt|order)"), self.search_transactions),
+            ("GET", re.compile(r"/transactions/(\d+)"), self.get_transaction),
+            ("POST", re.compile(r"/transactions/(\d+)/void"), self.void_transaction),
+            ("POST", re.compile(r"/customers"), self.create_customer),
+            ("GET", re.compile(r"/customers"), self.list_customers),
+            ("PUT", re.compile(r"/customers/([^/]+)"), self.create_customer),
+            ("GET", re.compile(r"/customers/([^/]+)"), self.get_customer),
+            ("DELETE", re.compile(r"/customers/([^/]+)"), self.delete_customer),
+            ("PUT", re.compile(r"/customers/([^/]+)/payment-setup"), self.update_payment_setup),
+            ("PATCH", re.compile(r"/customers/([^/]+)/payment-setup"), self.stop_or_start_payments),
+            ("PUT", re.compile(r"/customers/([^/]+)/schedule"), self.schedule_payments),
+            ("DELETE", re.compile(r"/customers/([^/]+)/schedule"), self.stop_schedule),
+            ("PUT", re.compile(r"/customers/([^/]+)/contact"), self.update_contact),
+        ]
+
+    def handle(self, method: str, path: str, form: Form, query: Form, idempotency_key: str | None = None) -> Response:
+        """
+        :param path: request path below /rest/v1, e.g. /transactions/1000000001
+        :return: the status and a copy of the body, safe to serialise while other requests run
+        """
+        with self._lock:
+            if idempotency_key and method == "POST":
+                status, body = self._replay_or_dispatch(idempotency_key, (method, path, sorted(form.items())), form, query)
+            else:
+                status, body = self._dispatch(method, path, form, query)
+            return status, copy.deepcopy(body)
+
+    def _replay_or_dispatch(self, key: str, fingerprint: tuple[Any, ...], form: Form, query: Form) -> Response:
+        if key in self.idempotent:
+            original, response = self.idempotent[key]
+            if original == fingerprint:
+                return response
+            return invalid("Idempotency-Key", "Idempotency-Key was used for a different request", key)
+        status, body = self._dispatch(fingerprint[0], fingerprint[1], form, query)
+        # Replays return the response as first sent, not the transaction's current state
+        self.idempotent[key] = (fingerprint, (status, copy.deepcopy(body)))
+        return status, body
+
+    def _dispatch(self, method: str, path: str, form: Form, query: Form) -> Response:
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if match and route_method == method:
+                return handler(*match.groups(), form=form, query=query)
+        return not_found("Resource")
+
+    # Single-use tokens
+
+    def create_token(self, *, form: Form, query: Form) -> Response:
+        if form.get("paymentMethod") == "bankAccount":
+            required, details = ("bsb", "accountNumber", "accountName"), self._bank_account(form)
+        else:
+            required, details = ("cardNumber", "expiryDateMonth", "expiryDateYear"), self._credit_card(form)
+        missing = [name for name in required if not form.get(name)]
+        if missing:
+            return invalid(missing[0], "must not be blank")
+        token = str(uuid.uuid4())
+        self.tokens[token] = details
+        return HTTPStatus.OK, {"singleUseTokenId": token, **details}
+
+    @staticmethod
+    def _credit_card(form: Form) -> dict[str, Any]:
+        card = {
+            "cardNumber": _masked(form.get("cardNumber", "")),
+            "expiryDateMonth": form.get("expiryDateMonth"),
+            "expiryDateYear": form.get("expiryDateYear"),
+            "cardScheme": "mastercard" if form.get("cardNumber", "").startswith("5") else "visa",
+            "cardType": "credit",
+            "cardholderName": form.get("cardholderName"),
+        }
+        return {"paymentMethod": "creditCard", "creditCard": card}
+
+    @staticmethod
+    def _bank_account(form: Form) -> dict[str, Any]:
+        account = {"bsb": form.get("bsb"), "accountNumber": form.get("accountNumber"), "accountName": form.get("accountName")}
+        return {"paymentMethod": "bankAccount", "bankAccount": account}
+
+    # Transactions
+
+    def create_transaction(self, *, form: Form, query: Form) -> Response:
+        transaction_type = form.get("transactionType")
+        if transaction_type in ("payment", "preAuth", "accountVerification"):
+            return self._charge(form)
+        if transaction_type in ("capture", "refund"):
+            return self._follow_up(form)
+        return invalid("transactionType", "must be one of payment, refund, preAuth, capture or accountVerification")
+
+    def _charge(self, form: Form) -> Response:
+        """
+        A payment, pre-authorisation or account verification from a token or a customer's payment setup
+        """
+        token = form.get("singleUseTokenId")
+        if token:
+            source = self.tokens.pop(token, None)
+            if source is None:
+                return invalid("singleUseTokenId", "Single use token is invalid or has already been used", token)
+            return self._approve(form, source, customer=None)
+        customer = self.customers.get(form.get("customerNumber", ""))
+        if customer is None:
+            return invalid("customerNumber", "Customer not found", form.get("customerNumber"))
+        setup = customer["paymentSetup"]
+        if not setup or setup.get("stopped"):
+            return invalid("customerNumber", "Customer's payments are stopped", customer["customerNumber"])
+        return self._approve(form, setup, customer=customer)
+
+    def _follow_up(self, form: Form) -> Response:
+        """
+        A capture of a pre-authorisation, or a refund
+        """
+        parent = self.transactions.get(_transaction_id(form.get("parentTransactionId")))
+        if parent is None:
+            return invalid("parentTransactionId", "Transaction not found", form.get("parentTransactionId"))
+        source = {key: parent[key] for key in ("paymentMethod", "creditCard", "bankAccount") if key in parent}
+        status, transaction = self._approve(form, source, customer=None, parent=parent)
+        if form.get("transactionType") == "refund":
+            transaction["status"] = "refunded"
+            transaction["isVoidable"] = transaction["isRefundable"] = False
+        return status, transaction
+
+    def _approve(
+        self,
+        form: Form,
+        source: dict[str, Any],
+        customer: dict[str, Any] | None,
+        parent: dict[str, Any] | None = None,
+    ) -> Response:
+        amount = _amount(form.get("principalAmount"))
+        if amount is None:
+            return invalid("principalAmount", "must be a number", form.get("principalAmount"))
+        transaction_id = next(self._transaction_ids)
+        now = datetime.now(UTC)
+        contact = (customer or {}).get("contact", {})
+        transaction = {
+            "transactionId": transaction_id,
+            "receiptNumber": str(transaction_id),
+            "status": "approved",
+            "responseCode": "08",
+            "responseText": "Honour with identification",
+            "transactionType": form.get("transactionType"),
+            "customerNumber": form.get("customerNumber") or (parent or {}).get("customerNumber"),
+            "customerName": contact.get("customerName"),
+            "customerEmail": contact.get("emailAddress"),
+            "orderNumber": form.get("orderNumber"),
+            "currency": form.get("currency", "aud"),
+            "principalAmount": amount,
+            "surchargeAmount": 0.0,
+            "paymentAmount": amount,
+            **{key: source[key] for key in ("paymentMethod", "creditCard", "bankAccount") if key in source},
+            "merchant": self.merchant,
+            "transactionDateTime": now.strftime("%d %b %Y %H:%M UTC"),
+            "user": "EMULATOR",
+            "settlementDate": (now + timedelta(days=1)).strftime("%d %b %Y"),
+            "customerIpAddress": form.get("customerIpAddress"),
+            "parentTransaction": None if parent is None else {"transactionId": parent["transactionId"]},
+            "isVoidable": True,
+            "isRefundable": True,
+        }
+        self.transactions[transaction_id] = transaction
+        return HTTPStatus.OK, transaction
+
+    def get_transaction(self, transaction_id: str, *, form: Form, query: Form) -> Response:
+        transaction = self.transactions.get(int(transaction_id))
+        if transaction is None:
+            return not_found("Transaction")
+        return HTTPStatus.OK, transaction
+
+    def void_transaction(self, transaction_id: str, *, form: Form, query: Form) -> Response:
+        transaction = self.transactions.get(int(transaction_id))
+        if transaction is None:
+            return not_found("Transaction")
+        if not transaction["isVoidable"]:
+            return invalid("transactionId", "Transaction cannot be voided", transaction_id)
+        transaction.update(status="voided", isVoidable=False, isRefundable=False)
+        return HTTPStatus.OK, transaction
+
+    def search_transactions(self, search: str, *, form: Form, query: Form) -> Response:
+        field = SEARCH_FIELDS[search]
+        matches = [item for item in reversed(self.transactions.values()) if str(item.get(field)) == query.get(field)]
+        return HTTPStatus.OK, self._page(f"/transactions/search-{search}", matches, query)
+
+    @staticmethod
+    def _page(path: str, items: list[dict[str, Any]], query: Form) -> dict[str, Any]:
+        page = int(query.get("page") or 1)
+        start = (page - 1) * PAGE_SIZE
+        links = [{"rel": "self", "href": f"{API_PREFIX}{path}?page={page}"}]
+        if start + PAGE_SIZE < len(items):
+            links.append({"rel": "next", "href": f"{API_PREFIX}{path}?page={page + 1}"})
+        return {"data": items[start : start + PAGE_SIZE], "links": links}
+
+    # Customers
+
+    def create_customer(self, customer_number: str | None = None, *, form: Form, query: Form) -> Response:
+        """
+        POST /customers numbers the customer; PUT /customers/{customerNumber} uses your number
+        """
+        if customer_number in self.customers:
+            return invalid("customerNumber", "Customer number is already in use", customer_number)
+        payment_setup: dict[str, Any] = {}
+        token = form.get("singleUseTokenId")
+        if token:
+            status, payment_setup = self._payment_setup(token, form)
+            if status != HTTPStatus.OK:
+                return status, payment_setup
+        customer_number = customer_number or str(next(self._customer_numbers))
+        customer = {
+            "customerNumber": customer_number,
+            "paymentSetup": payment_setup,
+            "contact": self._contact(form),
+            "customFields": {name: form.get(name) for name in CUSTOM_FIELDS},
+            "notes": {"notes": form.get("notes")},
+            "virtualAccount": {},
+        }
+        self.customers[customer_number] = customer
+        return HTTPStatus.OK, customer
+
+    def _payment_setup(self, token: str, form: Form) -> Response:
+        source = self.tokens.pop(token, None)
+        if source is None:
+            return invalid("singleUseTokenId", "Single use token is invalid or has already been used", token)
+        merchant = {**self.merchant, "merchantId": form.get("merchantId") or self.merchant["merchantId"]}
+        return HTTPStatus.OK, {"stopped": False, **source, "merchant": merchant}
+
+    @staticmethod
+    def _contact(form: Form, contact: dict[str, Any] | None = None) -> dict[str, Any]:
+        contact = contact or {"address": {}}
+        contact.update({name: form[name] for name in CUSTOMER_FIELDS if name in form})
+        contact["address"].update({name: form[name] for name in ADDRESS_FIELDS if name in form})
+        if "sendEmailReceipts" in form:
+            contact["sendEmailReceipts"] = form["sendEmailReceipts"] == "true"
+        return contact
+
+    def list_customers(self, *, form: Form, query: Form) -> Response:
+        items = [{"customerNumber": number, **customer["contact"]} for number, customer in self.customers.items()]
+        return HTTPStatus.OK, self._page("/customers", items, query)
+
+    def get_customer(self, customer_number: str, *, form: Form, query: Form) -> Response:
+        customer = self.customers.get(customer_number)
+        if customer is None:
+            return not_found("Customer")
+        return HTTPStatus.OK, customer
+
+    def delete_customer(self, customer_number: str, *, form: Form, query: Form) -> Response:
+        if self.customers.pop(customer_number, None) is None:
+            return not_found("Customer")
+        return HTTPStatus.NO_CONTENT, None
+
+    def update_payment_setup(self, customer_number: str, *, form: Form, query: Form) -> Response:
+        customer = self.customers.get(customer_number)
+        if customer is None:
+            return not_found("Customer")
+        status, payment_setup = self._payment_setup(form.get("singleUseTokenId", ""), form)
+        if status == HTTPStatus.OK:
+            customer["paymentSetup"] = payment_setup
+        return status, payment_setup
+
+    def stop_or_start_payments(self, customer_number: str, *, form: Form, query: Form) -> Response:
+        customer = self.customers.get(customer_number)
+        if customer is None:
+            return not_found("Customer")
+        customer["paymentSetup"]["stopped"] = form.get("stopped") == "true"
+        return HTTPStatus.OK, customer["paymentSetup"]
+
+    def schedule_payments(self, customer_number: str, *, form: Form, query: Form) -> Response:
+        customer = self.customers.get(customer_number)
+        if customer is None:
+            return not_found("Customer")
+        customer["schedule"] = {
+            "frequency": form.get("frequency"),
+            "nextPaymentDate": form.get("nextPaymentDate"),
+            "nextPrincipalAmount": _amount(form.get("nextPrincipalAmount")),
+            "regularPrincipalAmount": _amount(form.get("regularPrincipalAmount")),
+        }
+        return HTTPStatus.OK, customer["schedule"]
+
+    def stop_schedule(self, customer_number: str, *, form: Form, query: Form) -> Response:
+        customer = self.customers.get(customer_number)
+        if customer is None or customer.pop("schedule", None) is None:
+            return not_found("Schedule")
+        return HTTPStatus.NO_CONTENT, None
+
+    def update_contact(self, customer_number: str, *, form: Form, query: Form) -> Response:
+        customer = self.customers.get(customer_number)
+        if customer is None:
+            return not_found("Customer")
+        self._contact(form, customer["contact"])
+        return HTTPStatus.OK, customer["contact"]
+
+
+class Emulator:
+    """
+    Serve a PayWayState over HTTP/1.1 keep-alive on a background thread.
+    ``request_count`` counts the requests received, including faulted ones.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        latency: Callable[[], float] | None = None,
+        faults: Iterable[Fault] = (),
+        state: PayWayState | None = None,
+        seed: int | None = None,
+    ) -> None:
+        """
+        :param port: port to listen on; 0 picks a free one (see ``url``)
+        :param latency: returns the seconds to delay each response, e.g. lognormal_latency(0.08)
+        :param faults: errors to answer requests with instead of handling them, checked in order
+        :param state: the accounts to serve; a fresh empty PayWayState by default
+        :param seed: seed for deciding which requests get faults
+        """
+        self.address = (host, port)
+        self.latency = latency
+        self.faults = list(faults)
+        self.state = state or PayWayState()
+        self.request_count = 0
+        self._random = random.Random(seed)  # noqa: S311
+        self._lock = threading.Lock()
+        self._server: _Server | None = None
+
+    @property
+    def url(self) -> str:
+        """
+        The API base URL to give clients as ``api_url``
+        """
+        host, port = self._server.server_address[:2] if self._server else self.address
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def fail_next(self, status: int, times: int = 1, retry_after: int | None = None, family: EndpointFamily | None = None) -> None:
+        """
+        Answer the next ``times`` requests (to ``family``, if given) with ``status``
+        """
+        with self._lock:
+            self.faults.insert(0, Fault(status, retry_after=retry_after, family=family, times=times))
+
+    def start(self) -> Self:
+        self._server = _Server(self.address, self)
+        threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="payway-emulator", daemon=True
+        ).start()
+        logger.info("PayWay emulator listening on %s", self.url)
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def transport(self) -> InMemoryTransport:
+        """
+        A transport that has this emulator answer a client's requests in-process,
+        with no server or sockets; ``start()`` isn't needed:
+
+            client = Client(..., api_url=emulator.url, transport=emulator.transport())
+        """
+
+        def handle(request: Request) -> TransportResponse:
+            status, payload, headers = self.respond(
+                request.method, request.url, request.body or "", CaseInsensitiveDict(request.headers)
+            )
+            return TransportResponse.from_json(status, payload, headers)
+
+        return InMemoryTransport(handle)
+
+    def respond(self, method: str, target: str, body: str, headers: Any) -> tuple[int, dict[str, Any] | None, dict[str, str]]:  # noqa: ANN401
+        """
+        The status, JSON body and extra headers to answer a request with
+        """
+        url = urlsplit(target)
+        with self._lock:
+            self.request_count += 1
+            fault = self._fault(endpoint_family(url.path))
+        if self.latency is not None:
+            time.sleep(self.latency())
+        if fault is not None:
+            return fault.response()
+        if not headers.get("Authorization"):
+            return HTTPStatus.UNAUTHORIZED, error_body("Missing API key"), {}
+        if not url.path.startswith(API_PREFIX):
+            return *not_found("Resource"), {}
+        form, query = dict(parse_qsl(body)), dict(parse_qsl(url.query))
+        status, payload = self.state.handle(method, url.path[len(API_PREFIX) :], form, query, headers.get("Idempotency-Key"))
+        return status, payload, {}
+
+    def _fault(self, family: EndpointFamily | None) -> Fault | None:
+        roll = self._random.random()
+        return next((fault for fault in self.faults if fault.strikes(family, roll)), None)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Load tests open many connections at once
+    request_queue_size = 128
+
+    def __init__(self, address: tuple[str, int], emulator: Emulator) -> None:
+        self.emulator = emulator
+        super().__init__(address, _Handler)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: _Server
+
+    def _serve(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+        status, payload, headers = self.server.emulator.respond(self.command, self.path, body, self.headers)
+        content = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        for name, value in {"Content-Type": "application/json", **headers}.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _serve  # noqa: N815
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        logger.debug(format, *args)
+
+
+def _fault_arg(value: str) -> Fault:
+    """
+    STATUS:RATE[:RETRY_AFTER], e.g. 503:0.05:2
+    """
+    status, rate, *retry_after = value.split(":")
+    return Fault(int(status), float(rate), int(retry_after[0]) if retry_after else None)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, help="median response time in seconds (lognormal)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--fault", type=_fault_arg, action="append", default=[], metavar="STATUS:RATE[:RETRY_AFTER]")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    latency = lognormal_latency(args.latency, args.latency_sigma) if args.latency else None
+    emulator = Emulator(args.host, args.port, latency=latency, faults=args.fault, seed=args.seed)
+    with emulator, contextlib.suppress(KeyboardInterrupt):
+        print(f"PayWay emulator listening on {emulator.url}")  # noqa: T201
+        threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,31 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterator
 from typing import Any
 
-import requests
-
-from payway.constants import TRANSACTION_URL
+from payway.base import HTTPResponse
+from payway.model import PayWayTransaction
+from payway.pagination import page_json, paginate
 from payway.utils import json_list
 
 
 class TransactionRequest:
-    session = requests.Session()
-    session_no_headers = requests.Session()
+    # Provided by Client, so searches share its connection pool, timeouts and retries
+    get_request: Callable[..., HTTPResponse]
+    transaction_url: str
+    _from_dict: Callable[..., Any]
+
+    def _search(self, path: str, params: dict[str, Any]) -> HTTPResponse:
+        return self.get_request(f"{self.transaction_url}/{path}", params=params)
 
-    def _search(self, path: str, params: dict[str, Any]) -> requests.Response:
-        return self.session_no_headers.get(f"{TRANSACTION_URL}/{path}", params=params)
+    def _iter_search(self, path: str, params: dict[str, Any]) -> Iterator[PayWayTransaction]:
+        return paginate(
+            lambda page: page_json(self._search(path, {**params, "page": page})),
+            lambda item: self._from_dict(PayWayTransaction, item),
+        )
 
     @json_list("search_transactions_by_customer")
-    def search_transactions_by_customer(self, customer_number: int | str, page: int | None = None) -> requests.Response:
+    def search_transactions_by_customer(self, customer_number: int | str, page: int | None = None) -> HTTPResponse:
         """
         Returns a paginated list of transactions for a PayWay customer, most recent first
         :param customer_number: PayWay customer number
@@ -25,7 +34,7 @@ class TransactionRequest:
         return self._search("search-customer", {"customerNumber": customer_number, "page": page})
 
     @json_list("search_transactions_by_receipt")
-    def search_transactions_by_receipt(self, receipt_number: int | str, page: int | None = None) -> requests.Response:
+    def search_transactions_by_receipt(self, receipt_number: int | str, page: int | None = None) -> HTTPResponse:
         """
         Returns a paginated list of transactions with the given receipt number, most recent first
         :param receipt_number: PayWay receipt number
@@ -34,10 +43,32 @@ class TransactionRequest:
         return self._search("search-receipt", {"receiptNumber": receipt_number, "page": page})
 
     @json_list("search_transactions_by_order")
-    def search_transactions_by_order(self, order_number: str, page: int | None = None) -> requests.Response:
+    def search_transactions_by_order(self, order_number: str, page: int | None = None) -> HTTPResponse:
         """
         Returns a paginated list of transactions with the given order number, most recent first
         :param order_number: your order number, supplied when the transaction was created
         :param page: page number, taken from the `next`/`prev` links of a previous response
         """
         return self._search("search-order", {"orderNumber": order_number, "page": page})
+
+    def iter_transactions_by_customer(self, customer_number: int | str) -> Iterator[PayWayTransaction]:
+        """
+        Iterate over every transaction for a PayWay customer, most recent first, following
+        the pagination links. The next page is fetched while the current one is consumed.
+        :param customer_number: PayWay customer number
+        """
+        return self._iter_search("search-customer", {"customerNumber": customer_number})
+
+    def iter_transactions_by_receipt(self, receipt_number: int | str) -> Iterator[PayWayTransaction]:
+        """
+        Iterate over every transaction with the given receipt number (see iter_transactions_by_customer)
+        :param receipt_number: PayWay receipt number
+        """
+        return self._iter_search("search-receipt", {"receiptNumber": receipt_number})
+
+    def iter_transactions_by_order(self, order_number: str) -> Iterator[PayWayTransaction]:
+        """
+        Iterate over every transaction with the given order number (see iter_transactions_by_customer)
+        :param order_number: your order number, supplied when the transaction was created
+        """
+        return self._iter_search("search-order", {"orderNumber": order_number})
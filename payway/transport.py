@@ -0,0 +1,656 @@
+"""
+The HTTP layer under ``Client``. A transport has ``requests.Session``'s
+``get``/``post``/``put``/``patch``/``delete`` call shapes plus ``auth`` and
+``close()``, so a session is one; every PayWay call goes through it.
+
+- RequestsTransport: a pooled ``requests.Session`` (the default)
+- Urllib3Transport: straight onto urllib3's pools, skipping requests' session
+  and adapter layers for less overhead per call
+- HTTP2Transport: multiplexes concurrent calls as HTTP/2 streams over a few
+  connections (needs ``python-payway[http2]``)
+- InMemoryTransport: hands each request to a function, for tests
+
+Transports raise requests' exceptions (``requests.ConnectionError``,
+``requests.Timeout``) so retries and callers' error handling don't depend on
+the engine.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import ssl
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from json import dumps, loads
+from logging import getLogger
+from queue import Empty, LifoQueue
+from typing import TYPE_CHECKING, Any, Protocol, Self
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError, ReadTimeoutError, SSLError
+from urllib3.util.wait import wait_for_read
+
+from payway.constants import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_HTTP2_CONNECTIONS,
+    DEFAULT_HTTP2_STREAMS,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+)
+from payway.hooks import Attempt, current_attempt
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = getLogger(__name__)
+
+# (connect, read) timeout in seconds
+Timeout = tuple[float, float]
+Auth = tuple[str, str]
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+
+class Transport(Protocol):
+    """
+    What ``Client`` sends requests through. ``auth`` is the (user, password)
+    for basic auth when a call doesn't pass its own; the client sets it to the
+    secret API key if it is None.
+    """
+
+    auth: Auth | None
+
+    def get(self, url: str, *, params: Mapping[str, Any] | None = None, timeout: Timeout) -> Any: ...  # noqa: ANN401
+
+    def post(
+        self,
+        url: str,
+        *,
+        data: Mapping[str, Any],
+        auth: Auth | None = None,
+        headers: Mapping[str, str] | None = None,
+        timeout: Timeout,
+    ) -> Any: ...  # noqa: ANN401
+
+    def put(self, url: str, *, data: Mapping[str, Any], headers: Mapping[str, str] | None = None, timeout: Timeout) -> Any: ...  # noqa: ANN401
+
+    def patch(self, url: str, *, data: Mapping[str, Any], timeout: Timeout) -> Any: ...  # noqa: ANN401
+
+    def delete(self, url: str, *, timeout: Timeout) -> Any: ...  # noqa: ANN401
+
+    def close(self) -> None: ...
+
+
+class TimedConnect:
+    """
+    Reports each connection opened (TCP, plus TLS for HTTPS) and the time it took to the attempt in flight
+    """
+
+    # time.monotonic() when the connection was last returned to its pool
+    idle_since = 0.0
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        attempt = current_attempt.get()
+        if attempt is not None:
+            attempt.new_connection = True
+        super().connect()  # type: ignore[misc]
+        if attempt is not None:
+            attempt.connected(time.perf_counter() - started)
+
+    @property
+    def is_connected(self) -> bool:
+        """
+        urllib3 takes an idle connection with anything to read as closed by the
+        server. After a TLS 1.3 handshake that is usually the session tickets
+        the server sends, which would have a warmed-up connection thrown away
+        unused, so TLS-only records are read off first.
+        """
+        sock = self.sock  # type: ignore[attr-defined]
+        if sock is None:
+            return False
+        if not wait_for_read(sock, timeout=0.0):
+            return True
+        return isinstance(sock, ssl.SSLSocket) and _only_tls_records(sock)
+
+
+def _only_tls_records(sock: ssl.SSLSocket) -> bool:
+    """
+    Whether what's waiting on ``sock`` is TLS records with no application data (and no close)
+    """
+    timeout = sock.gettimeout()
+    sock.settimeout(0)
+    try:
+        sock.recv(1)
+    except ssl.SSLWantReadError:
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.settimeout(timeout)
+    return False
+
+
+class TimedHTTPConnection(TimedConnect, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnect, HTTPSConnection):
+    pass
+
+
+class ManagedPool:
+    """
+    A urllib3 connection pool that can open connections before they're needed
+    and reopen ones that have sat idle, so calls don't pay for the handshake
+    """
+
+    pool: LifoQueue[TimedConnect | None] | None
+
+    def _get_conn(self, timeout: float | None = None) -> TimedConnect:
+        conn = super()._get_conn(timeout)  # type: ignore[misc]
+        attempt = current_attempt.get()
+        # Still open after the pool's check for connections the server closed
+        if attempt is not None and conn.sock is not None:
+            attempt.reused_connection = True
+        return conn
+
+    def _put_conn(self, conn: TimedConnect | None) -> None:
+        if conn is not None:
+            conn.idle_since = time.monotonic()
+        super()._put_conn(conn)  # type: ignore[misc]
+
+    def warm(self, connections: int, max_idle: float | None = None, *, timeout: float = DEFAULT_CONNECT_TIMEOUT) -> int:
+        """
+        Have up to ``connections`` idle connections open, reopening any the server
+        has closed or that have been idle ``max_idle`` seconds; connections in use
+        are left alone. Returns the number opened.
+        :param timeout: seconds to wait for each connection
+        """
+        taken = self._take_idle(connections)
+        now = time.monotonic()
+        stale = [conn for conn in taken if not conn.is_connected or (max_idle is not None and now - conn.idle_since >= max_idle)]
+        # Straight back into the queue, before any connecting, so concurrent calls can
+        # have them; they stay as idle as they were
+        for conn in taken:
+            if conn not in stale:
+                super()._put_conn(conn)  # type: ignore[misc]
+        try:
+            _reconnect(stale, timeout)
+        finally:
+            for conn in stale:
+                conn.idle_since = time.monotonic()
+                super()._put_conn(conn)  # type: ignore[misc]
+        return len(stale)
+
+    def refresh(self, max_idle: float, *, timeout: float = DEFAULT_CONNECT_TIMEOUT) -> int:
+        """
+        Reopen the idle connections that the server has closed or that have been idle ``max_idle`` seconds
+        """
+        idle = sum(conn is not None for conn in list(self.pool.queue)) if self.pool is not None else 0
+        return self.warm(idle, max_idle, timeout=timeout) if idle else 0
+
+    def _take_idle(self, connections: int) -> list[TimedConnect]:
+        taken: list[TimedConnect] = []
+        while self.pool is not None and len(taken) < connections:
+            try:
+                conn = self.pool.get(block=False)
+            except Empty:
+                break
+            taken.append(conn or self._new_conn())  # type: ignore[attr-defined]
+        return taken
+
+
+def _reconnect(connections: list[TimedConnect], timeout: float) -> None:
+    """
+    Close ``connections`` and open them again, in parallel
+    """
+    for conn in connections:
+        conn.close()
+        conn.timeout = timeout
+    if not connections:
+        return
+    try:
+        with ThreadPoolExecutor(len(connections), thread_name_prefix="payway-connect") as executor:
+            list(executor.map(lambda conn: conn.connect(), connections))
+    except BaseException:
+        for conn in connections:
+            conn.close()
+        raise
+
+
+class TimedHTTPConnectionPool(ManagedPool, HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(ManagedPool, HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+TIMED_POOL_CLASSES = {"http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = TIMED_POOL_CLASSES
+
+
+# urllib3 and socket errors -> the requests exceptions the client retries on; order
+# matters, as NewConnectionError subclasses ConnectTimeoutError
+NETWORK_ERRORS: tuple[tuple[type[Exception], type[requests.RequestException]], ...] = (
+    (NewConnectionError, requests.ConnectionError),
+    (ConnectTimeoutError, requests.ConnectTimeout),
+    (ReadTimeoutError, requests.ReadTimeout),
+    (SSLError, requests.exceptions.SSLError),
+    (urllib3.exceptions.HTTPError, requests.ConnectionError),
+    (ssl.SSLError, requests.exceptions.SSLError),
+    (TimeoutError, requests.ConnectTimeout),
+    (OSError, requests.ConnectionError),
+)
+
+
+def _network_error(exc: Exception) -> requests.RequestException:
+    error = next(error for network_error, error in NETWORK_ERRORS if isinstance(exc, network_error))
+    return error(exc)
+
+
+class PoolMaintenance(ABC):
+    """
+    Opening and refreshing connections ahead of use, for transports built on ManagedPool
+    """
+
+    @abstractmethod
+    def _connection_pool(self, url: str) -> object:
+        """
+        The connection pool requests to ``url`` go through; a ManagedPool unless e.g. proxied
+        """
+
+    def warm_up(self, url: str, connections: int, *, timeout: float = DEFAULT_CONNECT_TIMEOUT) -> int:
+        """
+        Open and verify (TLS handshake included) up to ``connections`` connections
+        to ``url``'s host, capped at the pool size. Returns the number opened.
+        :param timeout: seconds to wait for each connection
+        """
+        return self._maintain(url, lambda pool: pool.warm(connections, timeout=timeout))
+
+    def refresh(self, url: str, max_idle: float, *, timeout: float = DEFAULT_CONNECT_TIMEOUT) -> int:
+        """
+        Reopen idle connections to ``url``'s host that the server has closed or
+        that have been idle ``max_idle`` seconds. Returns the number reopened.
+        """
+        return self._maintain(url, lambda pool: pool.refresh(max_idle, timeout=timeout))
+
+    def _maintain(self, url: str, action: Callable[[ManagedPool], int]) -> int:
+        pool = self._connection_pool(url)
+        # e.g. a proxy's pool
+        if not isinstance(pool, ManagedPool):
+            return 0
+        try:
+            return action(pool)
+        except (urllib3.exceptions.HTTPError, OSError) as exc:
+            raise _network_error(exc) from exc
+
+
+class RequestsTransport(PoolMaintenance, requests.Session):
+    """
+    One keep-alive pool per client: every request reuses its TCP+TLS connections.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        *,
+        pool_block: bool = False,
+    ) -> None:
+        """
+        :param pool_connections: number of per-host connection pools to cache
+        :param pool_maxsize: keep-alive connections kept open per host
+        :param pool_block: wait for a free connection instead of opening one beyond pool_maxsize
+        """
+        super().__init__()
+        adapter = TimedHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def _connection_pool(self, url: str) -> object:
+        # The pool requests would send to url through, with the session's TLS and proxy settings
+        settings = self.merge_environment_settings(url, {}, None, None, None)
+        return self.get_adapter(url).get_connection_with_tls_context(
+            self.prepare_request(requests.Request("GET", url)), settings["verify"], settings["proxies"], settings["cert"]
+        )
+
+
+@dataclass(slots=True)
+class Request:
+    """
+    A request as Urllib3Transport and InMemoryTransport send it: the query
+    string is in ``url`` and form data is encoded in ``body``, both without
+    None values, as requests would send them
+    """
+
+    method: str
+    url: str
+    headers: dict[str, str]
+    body: str | None = None
+
+    @property
+    def params(self) -> dict[str, str]:
+        return dict(parse_qsl(urlsplit(self.url).query))
+
+    @property
+    def form(self) -> dict[str, str]:
+        return dict(parse_qsl(self.body or ""))
+
+
+def _encode(values: Mapping[str, Any] | None) -> str:
+    return urlencode([(key, value) for key, value in (values or {}).items() if value is not None], doseq=True)
+
+
+def build_request(  # noqa: PLR0913
+    method: str,
+    url: str,
+    *,
+    auth: Auth | None,
+    params: Mapping[str, Any] | None = None,
+    data: Mapping[str, Any] | None = None,
+    headers: Mapping[str, str] | None = None,
+) -> Request:
+    query = _encode(params)
+    headers = dict(headers or {})
+    if auth is not None:
+        headers["Authorization"] = "Basic " + base64.b64encode(f"{auth[0]}:{auth[1]}".encode()).decode()
+    if data is not None:
+        headers.setdefault("content-type", FORM_CONTENT_TYPE)
+    return Request(method, f"{url}?{query}" if query else url, headers, None if data is None else _encode(data))
+
+
+@dataclass(slots=True)
+class Response:
+    """
+    The parts of ``requests.Response`` the client and its callers use
+    """
+
+    status_code: int
+    content: bytes = b""
+    headers: Mapping[str, str] = field(default_factory=dict)
+    request: Request | None = None
+    elapsed: timedelta = field(default_factory=timedelta)
+
+    @classmethod
+    def from_json(cls, status_code: int, body: Any, headers: Mapping[str, str] | None = None) -> Response:  # noqa: ANN401
+        content = b"" if body is None else dumps(body).encode()
+        return cls(status_code, content, {"Content-Type": "application/json", **(headers or {})})
+
+    @property
+    def url(self) -> str:
+        return self.request.url if self.request is not None else ""
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400  # noqa: PLR2004
+
+    def json(self) -> Any:  # noqa: ANN401
+        return loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            msg = f"{self.status_code} error for url: {self.url}"
+            raise requests.HTTPError(msg, response=self)  # type: ignore[arg-type]
+
+
+class _FormTransport(ABC):
+    """
+    The requests.Session call shapes, over a ``send(Request, timeout)``
+    """
+
+    auth: Auth | None = None
+
+    @abstractmethod
+    def _send(self, request: Request, timeout: Timeout) -> Response:
+        """
+        Send one request and return its response, raising requests' exceptions on network errors
+        """
+
+    def get(self, url: str, *, params: Mapping[str, Any] | None = None, timeout: Timeout) -> Response:
+        return self._send(build_request("GET", url, auth=self.auth, params=params), timeout)
+
+    def post(
+        self,
+        url: str,
+        *,
+        data: Mapping[str, Any],
+        auth: Auth | None = None,
+        headers: Mapping[str, str] | None = None,
+        timeout: Timeout,
+    ) -> Response:
+        return self._send(build_request("POST", url, auth=auth or self.auth, data=data, headers=headers), timeout)
+
+    def put(self, url: str, *, data: Mapping[str, Any], headers: Mapping[str, str] | None = None, timeout: Timeout) -> Response:
+        return self._send(build_request("PUT", url, auth=self.auth, data=data, headers=headers), timeout)
+
+    def patch(self, url: str, *, data: Mapping[str, Any], timeout: Timeout) -> Response:
+        return self._send(build_request("PATCH", url, auth=self.auth, data=data), timeout)
+
+    def delete(self, url: str, *, timeout: Timeout) -> Response:
+        return self._send(build_request("DELETE", url, auth=self.auth), timeout)
+
+    def close(self) -> None:  # noqa: B027
+        """
+        Release the transport's connections; transports that hold none needn't override it
+        """
+
+
+class Urllib3Transport(PoolMaintenance, _FormTransport):
+    """
+    Sends through a urllib3 PoolManager directly: no requests Session, adapter
+    or cookie handling on each call
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        *,
+        pool_block: bool = False,
+        ca_certs: str | None = None,
+    ) -> None:
+        """
+        :param pool_connections: number of per-host connection pools to cache
+        :param pool_maxsize: keep-alive connections kept open per host
+        :param pool_block: wait for a free connection instead of opening one beyond pool_maxsize
+        :param ca_certs: CA bundle to verify PayWay's certificate with, instead of the system's
+        """
+        self.auth = None
+        self.pool = urllib3.PoolManager(
+            num_pools=pool_connections, maxsize=pool_maxsize, block=pool_block, cert_reqs="CERT_REQUIRED", ca_certs=ca_certs
+        )
+        self.pool.pool_classes_by_scheme = TIMED_POOL_CLASSES
+
+    def _connection_pool(self, url: str) -> object:
+        return self.pool.connection_from_url(url)
+
+    def _send(self, request: Request, timeout: Timeout) -> Response:
+        started = time.perf_counter()
+        try:
+            raw = self.pool.request(
+                request.method,
+                request.url,
+                body=request.body,
+                headers=request.headers,
+                timeout=urllib3.Timeout(connect=timeout[0], read=timeout[1]),
+                retries=False,
+                redirect=False,
+            )
+        except urllib3.exceptions.HTTPError as exc:
+            raise _network_error(exc) from exc
+        elapsed = timedelta(seconds=time.perf_counter() - started)
+        return Response(raw.status, raw.data, raw.headers, request, elapsed)
+
+    def close(self) -> None:
+        self.pool.clear()
+
+
+class HTTP2Transport(_FormTransport):
+    """
+    Sends over HTTP/2 with httpx: concurrent calls from any number of threads
+    share ``max_connections`` connections as separate streams, instead of
+    each holding an HTTP/1.1 connection of its own.
+
+    httpcore's blocking HTTP/2 connection can't be shared between threads (two
+    threads can open streams out of order, which servers treat as a protocol
+    error), so requests run on an httpx.AsyncClient in an event loop on a
+    background thread, and each calling thread waits for its own.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = DEFAULT_HTTP2_CONNECTIONS,
+        max_streams: int = DEFAULT_HTTP2_STREAMS,
+        *,
+        ca_certs: str | None = None,
+    ) -> None:
+        """
+        :param max_connections: connections to open per host; calls wait for one rather than open more
+        :param max_streams: requests in flight at once across the connections; more calls wait for a stream
+        :param ca_certs: CA bundle to verify PayWay's certificate with, instead of the system's
+        """
+        try:
+            import httpx
+        except ImportError as exc:  # pragma: no cover
+            msg = "HTTP2Transport requires httpx and h2: pip install 'python-payway[http2]'"
+            raise ImportError(msg) from exc
+        self.auth = None
+        self._streams = threading.BoundedSemaphore(max_streams)
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            verify=ssl.create_default_context(cafile=ca_certs) if ca_certs else True,
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="payway-http2", daemon=True)
+        self._thread.start()
+
+    def _send(self, request: Request, timeout: Timeout) -> Response:
+        import httpx
+
+        # The attempt is read here: the event loop's thread doesn't see this thread's context
+        attempt = current_attempt.get()
+        with self._streams:
+            future = asyncio.run_coroutine_threadsafe(self._request(request, timeout, attempt), self._loop)
+            try:
+                raw = future.result()
+            except httpx.TransportError as exc:
+                raise _requests_error(exc) from exc
+            finally:
+                future.cancel()
+        return Response(raw.status_code, raw.content, raw.headers, request, raw.elapsed)
+
+    async def _request(self, request: Request, timeouts: Timeout, attempt: Attempt | None) -> httpx.Response:
+        import httpx
+
+        return await self.client.request(
+            request.method,
+            request.url,
+            content=request.body,
+            headers=request.headers,
+            timeout=httpx.Timeout(timeouts[1], connect=timeouts[0]),
+            extensions={"trace": attempt.trace} if attempt is not None else None,
+        )
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _requests_error(exc: httpx.TransportError) -> requests.RequestException:
+    import httpx
+
+    if isinstance(exc, httpx.ConnectTimeout):
+        return requests.ConnectTimeout(exc)
+    if isinstance(exc, httpx.ReadTimeout):
+        return requests.ReadTimeout(exc)
+    if isinstance(exc, httpx.TimeoutException):
+        return requests.Timeout(exc)
+    return requests.ConnectionError(exc)
+
+
+class KeepAlive:
+    """
+    Keeps a transport's pooled connections to one host fresh from a background
+    thread: connections idle for ``max_idle`` seconds, or that the server has
+    closed, are reopened, so the next call doesn't pay for the handshake. Keep
+    ``max_idle`` below the server's keep-alive timeout.
+    """
+
+    def __init__(self, transport: PoolMaintenance, url: str, max_idle: float, *, timeout: float = DEFAULT_CONNECT_TIMEOUT) -> None:
+        """
+        :param max_idle: seconds a pooled connection may sit idle before it is reopened
+        :param timeout: seconds to wait for each new connection
+        """
+        self.transport = transport
+        self.url = url
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="payway-keep-alive", daemon=True)
+
+    def start(self) -> Self:
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        # Checking four times per max_idle reopens a connection by 1.25 * max_idle idle at the latest
+        while not self._stopped.wait(self.max_idle / 4):
+            try:
+                reopened = self.transport.refresh(self.url, self.max_idle, timeout=self.timeout)
+            except requests.RequestException as exc:
+                logger.warning("Couldn't refresh PayWay connections: %s", exc)
+            else:
+                if reopened:
+                    logger.debug("Reopened %d idle PayWay connections", reopened)
+
+
+class InMemoryTransport(_FormTransport):
+    """
+    Answers each request with ``handler(request)``, e.g. a PayWay emulator's
+    (see ``payway.testing.emulator.Emulator.transport``). Sent requests are
+    kept on ``requests`` for assertions.
+    """
+
+    def __init__(self, handler: Callable[[Request], Response]) -> None:
+        self.auth = None
+        self.handler = handler
+        self.requests: list[Request] = []
+
+    def _send(self, request: Request, timeout: Timeout) -> Response:
+        self.requests.append(request)
+        started = time.perf_counter()
+        response = self.handler(request)
+        response.request = request
+        response.elapsed = timedelta(seconds=time.perf_counter() - started)
+        return response
@@ -2,7 +2,10 @@ from __future__ import annotations
 
 from collections.abc import Callable
 from http import HTTPStatus
+from typing import Any
+from urllib.parse import urlsplit
 
+from payway.constants import ENDPOINT_FAMILY_SEGMENTS, ENDPOINT_ID_PLACEHOLDERS, EndpointFamily
 from payway.exceptions import PaywayError
 
 
@@ -11,16 +14,50 @@ def snake_to_camel(name: str) -> str:
     return first + "".join(word.title() for word in rest)
 
 
+def endpoint_family(endpoint: str) -> EndpointFamily | None:
+    """
+    The family of a PayWay endpoint URL, e.g. transactions for
+    ``.../transactions/search-customer``; None for anything else
+    """
+    for segment in urlsplit(endpoint).path.split("/"):
+        family = ENDPOINT_FAMILY_SEGMENTS.get(segment)
+        if family is not None:
+            return family
+    return None
+
+
+def endpoint_template(endpoint: str) -> str:
+    """
+    An endpoint URL's path from its family segment on, with IDs replaced by
+    placeholders: ``.../rest/v1/transactions/123/void`` -> ``/transactions/{transactionId}/void``
+    """
+    segments = urlsplit(endpoint).path.split("/")
+    start = next((index for index, segment in enumerate(segments) if segment in ENDPOINT_FAMILY_SEGMENTS), len(segments))
+    template = segments[start:]
+    for index in range(1, len(template)):
+        placeholder = ENDPOINT_ID_PLACEHOLDERS.get(template[index - 1])
+        if placeholder and not template[index].startswith("search-"):
+            template[index] = placeholder
+    return "/" + "/".join(template)
+
+
+def json_result(result: Any) -> Any:  # noqa: ANN401
+    """
+    The JSON body of a customer or search response, or the response itself
+    for a successful DELETE
+    """
+    if result.status_code == HTTPStatus.NO_CONTENT:
+        # DELETE methods successful response
+        return result
+    if result.status_code in [HTTPStatus.OK, HTTPStatus.NOT_FOUND, HTTPStatus.UNPROCESSABLE_ENTITY]:
+        return result.json()
+    raise PaywayError(result.status_code, result.text)
+
+
 def json_list(name: str) -> Callable:
     def decorator(function: Callable) -> Callable:
         def wrapper(*args: dict, **kwargs: dict) -> dict:
-            result = function(*args, **kwargs)
-            if result.status_code == HTTPStatus.NO_CONTENT:
-                # DELETE methods successful response
-                return result
-            if result.status_code in [HTTPStatus.OK, HTTPStatus.NOT_FOUND, HTTPStatus.UNPROCESSABLE_ENTITY]:
-                return result.json()
-            raise PaywayError(result.status_code, result.text)
+            return json_result(function(*args, **kwargs))
 
         return wrapper
 
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import base64
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import httpx
+
+from payway.async_client import AsyncClient
+from payway.exceptions import PaywayError
+from payway.model import PayWayCard, PayWayPayment, PayWayTransaction
+from payway.test_utils import load_json_file
+
+
+def basic_auth(api_key: str) -> str:
+    return "Basic " + base64.b64encode(f"{api_key}:".encode()).decode()
+
+
+class AsyncClientTestCase(unittest.IsolatedAsyncioTestCase):
+    def make_client(self, responses: list[httpx.Response | Exception], **kwargs: dict) -> AsyncClient:
+        self.requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        client = AsyncClient(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            transport=httpx.MockTransport(handler),
+            **kwargs,
+        )
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+    def setUp(self) -> None:
+        self.payment = PayWayPayment(
+            customer_number="1",
+            transaction_type="payment",
+            amount=10,
+            currency="aud",
+            order_number="5100",
+            ip_address="127.0.0.1",
+        )
+        self.transaction_json = load_json_file("tests/data/transaction.json")
+
+
+class TestAsyncClient(AsyncClientTestCase):
+    async def test_create_card_token_uses_publishable_key(self) -> None:
+        client = self.make_client(
+            [httpx.Response(200, json={"singleUseTokenId": "2bcec36f", "paymentMethod": "creditCard"})],
+        )
+        card = PayWayCard(card_number="4564710000000004", cvn="847", expiry_date_month="02", expiry_date_year="29")
+        token_response, errors = await client.create_card_token(card)
+        self.assertIsNone(errors)
+        self.assertEqual(token_response.token, "2bcec36f")
+        request = self.requests[0]
+        self.assertEqual(request.headers["Authorization"], basic_auth("TPUBLISHABLE-API-KEY"))
+        self.assertIn(b"paymentMethod=creditCard", request.content)
+        # cardholderName was None and is left out, as requests would
+        self.assertNotIn(b"cardholderName", request.content)
+
+    async def test_process_payment(self) -> None:
+        client = self.make_client([httpx.Response(200, json=self.transaction_json)])
+        transaction, errors = await client.process_payment(self.payment, idempotency_key="key-123")
+        self.assertIsNone(errors)
+        self.assertIsInstance(transaction, PayWayTransaction)
+        self.assertEqual(transaction.status, "approved")
+        self.assertEqual(transaction.raw, self.transaction_json)
+        self.assertEqual(self.requests[0].headers["Idempotency-Key"], "key-123")
+        self.assertEqual(self.requests[0].headers["Authorization"], basic_auth("TPUBLISHABLE-SECRET"))
+
+    async def test_get_transaction(self) -> None:
+        client = self.make_client([httpx.Response(200, json=load_json_file("tests/data/card_transaction.json"))])
+        transaction, errors = await client.get_transaction(1179985404)
+        self.assertIsNone(errors)
+        self.assertEqual(transaction.transaction_id, 1179985404)
+        self.assertEqual(str(self.requests[0].url), "https://api.payway.com.au/rest/v1/transactions/1179985404")
+
+    async def test_documented_errors_are_returned(self) -> None:
+        client = self.make_client(
+            [httpx.Response(422, json={"data": [{"fieldName": "cardNumber", "message": "Invalid card number"}]})],
+        )
+        transaction, errors = await client.process_payment(self.payment)
+        self.assertIsNone(transaction)
+        self.assertEqual(errors[0].field_name, "cardNumber")
+
+    async def test_client_errors_raise(self) -> None:
+        client = self.make_client([httpx.Response(401)])
+        with self.assertRaises(PaywayError) as context:
+            await client.get_transaction(1)
+        self.assertIn("401 Client Error: Unauthorized", str(context.exception))
+
+    async def test_list_customers_drops_empty_page(self) -> None:
+        client = self.make_client([httpx.Response(200, json=load_json_file("tests/data/customers.json"))])
+        response = await client.list_customers()
+        self.assertIsNotNone(response["data"])
+        self.assertEqual(str(self.requests[0].url), "https://api.payway.com.au/rest/v1/customers")
+
+    async def test_iter_transactions_by_customer_follows_next_links(self) -> None:
+        page = load_json_file("tests/data/transactions.json")
+        next_link = {"rel": "next", "href": "https://api.payway.com.au/rest/v1/transactions/search-customer?page=2"}
+        client = self.make_client(
+            [httpx.Response(200, json={**page, "links": [next_link]}), httpx.Response(200, json=page)],
+        )
+        transactions = [transaction async for transaction in client.iter_transactions_by_customer(1)]
+        self.assertEqual([transaction.transaction_id for transaction in transactions], [1179985404, 1179985404])
+        self.assertEqual([request.url.params.get("page") for request in self.requests], [None, "2"])
+
+
+class TestAsyncClientRetries(AsyncClientTestCase):
+    @patch("payway.async_client.asyncio.sleep", new_callable=AsyncMock)
+    async def test_connection_error_then_success_resends_same_idempotency_key(self, mock_sleep) -> None:
+        client = self.make_client(
+            [httpx.ConnectError("connection reset"), httpx.Response(200, json=self.transaction_json)],
+            max_retries=2,
+            retry_delay=0.1,
+        )
+        transaction, errors = await client.process_payment(self.payment, idempotency_key="key-123")
+        self.assertIsNone(errors)
+        self.assertEqual(transaction.status, "approved")
+        self.assertEqual([request.headers["Idempotency-Key"] for request in self.requests], ["key-123", "key-123"])
+        mock_sleep.assert_awaited_once_with(0.1)
+
+    @patch("payway.async_client.asyncio.sleep", new_callable=AsyncMock)
+    async def test_429_honours_retry_after_header(self, mock_sleep) -> None:
+        client = self.make_client(
+            [httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200, json=self.transaction_json)],
+            max_retries=2,
+        )
+        transaction, errors = await client.get_transaction(1179985404)
+        self.assertIsNone(errors)
+        mock_sleep.assert_awaited_once_with(3.0)
+
+    @patch("payway.async_client.asyncio.sleep", new_callable=AsyncMock)
+    async def test_post_without_idempotency_key_is_not_retried(self, mock_sleep) -> None:
+        client = self.make_client([httpx.ConnectError("connection reset")], max_retries=2)
+        with self.assertRaises(httpx.ConnectError):
+            await client.process_payment(self.payment)
+        self.assertEqual(len(self.requests), 1)
+        mock_sleep.assert_not_awaited()
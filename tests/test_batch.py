@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+import httpx
+import requests
+
+from payway.async_client import AsyncClient
+from payway.batch import alookup_transactions, aprocess_payments, lookup_transactions, payment_idempotency_key, process_payments
+from payway.client import Client
+from payway.model import PayWayPayment
+from payway.test_utils import load_json_file
+
+
+def make_payment(order_number: int) -> PayWayPayment:
+    return PayWayPayment(
+        customer_number="1",
+        transaction_type="payment",
+        amount=10,
+        currency="aud",
+        order_number=str(order_number),
+    )
+
+
+class TestPaymentIdempotencyKey(unittest.TestCase):
+    def test_key_is_stable_per_payment(self) -> None:
+        self.assertEqual(payment_idempotency_key(make_payment(1)), payment_idempotency_key(make_payment(1)))
+        self.assertNotEqual(payment_idempotency_key(make_payment(1)), payment_idempotency_key(make_payment(2)))
+
+    def test_namespace_separates_runs(self) -> None:
+        self.assertNotEqual(
+            payment_idempotency_key(make_payment(1), namespace="2024-06-01"),
+            payment_idempotency_key(make_payment(1), namespace="2024-07-01"),
+        )
+
+
+class TestProcessPayments(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+        )
+        self.transaction_json = load_json_file("tests/data/transaction.json")
+
+    def respond(self, endpoint: str, data: dict, **kwargs: dict) -> Mock:
+        if data["orderNumber"] == "13":
+            response = Mock(status_code=500)
+            response.json.side_effect = json.JSONDecodeError("invalid", "", 0)
+            return response
+        response = Mock(status_code=200)
+        response.json.return_value = {**self.transaction_json, "orderNumber": data["orderNumber"]}
+        return response
+
+    @patch("requests.Session.post")
+    def test_streams_every_result_and_isolates_failures(self, mock_post) -> None:
+        mock_post.side_effect = self.respond
+        results = list(process_payments(self.client, (make_payment(n) for n in range(20)), max_workers=4))
+        self.assertEqual(len(results), 20)
+        by_order = {payment.order_number: (transaction, errors) for payment, transaction, errors in results}
+        self.assertEqual(by_order["3"][0].order_number, "3")
+        transaction, errors = by_order["13"]
+        self.assertIsNone(transaction)
+        self.assertIn("Internal server error", errors[0].message)
+
+    def sent_keys(self, mock_post: Mock) -> set[str]:
+        return {call.kwargs["headers"]["Idempotency-Key"] for call in mock_post.call_args_list}
+
+    @patch("requests.Session.post")
+    def test_a_run_id_gives_each_payment_a_stable_key(self, mock_post) -> None:
+        mock_post.side_effect = self.respond
+        payments = [make_payment(1), make_payment(1), make_payment(2)]
+        list(process_payments(self.client, payments, max_workers=2, run_id="2024-06-01"))
+        first_run = self.sent_keys(mock_post)
+        # identical rows are still charged separately
+        self.assertEqual(len(first_run), 3)
+        self.assertIn(payment_idempotency_key(make_payment(2), namespace="2024-06-01:2"), first_run)
+        mock_post.reset_mock()
+        list(process_payments(self.client, payments, max_workers=2, run_id="2024-06-01"))
+        self.assertEqual(self.sent_keys(mock_post), first_run)
+
+    @patch("requests.Session.post")
+    def test_without_a_run_id_keys_are_random(self, mock_post) -> None:
+        mock_post.side_effect = self.respond
+        list(process_payments(self.client, [make_payment(1)], max_workers=1))
+        list(process_payments(self.client, [make_payment(1)], max_workers=1))
+        self.assertEqual(len(self.sent_keys(mock_post)), 2)
+
+    @patch("requests.Session.post")
+    def test_input_is_read_lazily(self, mock_post) -> None:
+        mock_post.side_effect = self.respond
+        consumed = itertools.count()
+        payments = (make_payment(next(consumed)) for _ in itertools.repeat(None))
+        results = process_payments(self.client, payments, max_workers=2, max_pending=4)
+        first = list(itertools.islice(results, 3))
+        results.close()
+        self.assertEqual(len(first), 3)
+        # max_pending in flight plus the refills for the results already taken
+        self.assertLessEqual(next(consumed), 4 + 3)
+
+
+class TestLookups(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+        )
+        self.transaction_json = load_json_file("tests/data/transaction.json")
+
+    def respond(self, endpoint: str, **kwargs: dict) -> Mock:
+        transaction_id = int(endpoint.rsplit("/", 1)[1])
+        if transaction_id == 404:
+            response = Mock(status_code=404)
+            response.json.return_value = {"data": [{"message": "Transaction not found"}]}
+            return response
+        if transaction_id == 500:
+            raise requests.ConnectionError("connection reset")
+        response = Mock(status_code=200)
+        response.json.return_value = {**self.transaction_json, "transactionId": transaction_id}
+        return response
+
+    @patch("requests.Session.get")
+    def test_get_transactions_keeps_failures_per_id(self, mock_get) -> None:
+        mock_get.side_effect = self.respond
+        results = self.client.get_transactions([3, 404, 1, 500, 3], max_workers=4)
+        self.assertEqual(list(results), [3, 404, 1, 500])
+        self.assertEqual(results[1][0].transaction_id, 1)
+        self.assertIsNone(results[3][1])
+        self.assertIsNone(results[404][0])
+        self.assertEqual(results[404][1][0].message, "Transaction not found")
+        self.assertIn("connection reset", results[500][1][0].message)
+
+    @patch("requests.Session.get")
+    def test_get_customers(self, mock_get) -> None:
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.json.return_value = load_json_file("tests/data/customer.json")
+        results = self.client.get_customers(["98", "99"])
+        self.assertEqual(results["99"][0].customer_name, "Rebecca Turing")
+
+    @patch("requests.Session.get")
+    def test_lookup_streams_lazily(self, mock_get) -> None:
+        mock_get.side_effect = self.respond
+        consumed = itertools.count()
+        results = lookup_transactions(self.client, (next(consumed) for _ in itertools.repeat(None)), max_workers=2, max_pending=4)
+        first = list(itertools.islice(results, 3))
+        results.close()
+        self.assertEqual(len(first), 3)
+        self.assertLessEqual(next(consumed), 4 + 3)
+
+
+class TestAsyncProcessPayments(unittest.IsolatedAsyncioTestCase):
+    async def test_streams_every_result(self) -> None:
+        transaction_json = load_json_file("tests/data/transaction.json")
+        in_flight = 0
+        peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return httpx.Response(200, json=transaction_json)
+
+        client = AsyncClient(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            transport=httpx.MockTransport(handler),
+        )
+        self.addAsyncCleanup(client.aclose)
+        results = [result async for result in aprocess_payments(client, (make_payment(n) for n in range(30)), concurrency=5)]
+        self.assertEqual(len(results), 30)
+        self.assertTrue(all(transaction.status == "approved" for _, transaction, _ in results))
+        self.assertLessEqual(peak, 5)
+
+    async def test_lookup_transactions(self) -> None:
+        transaction_json = load_json_file("tests/data/transaction.json")
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/404"):
+                return httpx.Response(404, json={"data": [{"message": "Transaction not found"}]})
+            return httpx.Response(200, json=transaction_json)
+
+        client = AsyncClient(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            transport=httpx.MockTransport(handler),
+        )
+        self.addAsyncCleanup(client.aclose)
+        results = await client.get_transactions([1, 404, 2])
+        self.assertEqual(list(results), [1, 404, 2])
+        self.assertIsNone(results[404][0])
+        streamed = {key async for key, _, _ in alookup_transactions(client, range(10), concurrency=3)}
+        self.assertEqual(streamed, set(range(10)))
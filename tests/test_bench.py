@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from payway.bench import LoadTest, TrackedRetryPolicy, format_report, main, parse_mix, percentile
+from payway.client import Client
+from payway.exceptions import PaywayError
+from payway.model import PaymentError
+from payway.testing.emulator import Emulator
+
+
+class TestBenchHelpers(unittest.TestCase):
+    def test_percentile(self) -> None:
+        values = [float(n) for n in range(1, 101)]
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 1.0), 100)
+        self.assertEqual(percentile([], 0.5), 0)
+
+    def test_parse_mix(self) -> None:
+        self.assertEqual(parse_mix("payment=3, token=1"), {"payment": 3, "token": 1})
+        with self.assertRaises(argparse.ArgumentTypeError):
+            parse_mix("refund=1")
+
+
+class TestLoadTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.emulator = Emulator(seed=1).start()
+        self.addCleanup(self.emulator.stop)
+        self.policy = TrackedRetryPolicy(2, base_delay=0)
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TSECRET-API-KEY",
+            api_url=self.emulator.url,
+            retry_policy=self.policy,
+        )
+        self.addCleanup(self.client.close)
+
+    def test_counts_retries_and_errors(self) -> None:
+        test = LoadTest(self.client, self.policy, {"get_transaction": 1}, seed=1)
+        test.setup(customers=1)
+        self.emulator.fail_next(503, times=1, retry_after=0)
+        test.run_closed(1, 5, 3)
+        self.emulator.fail_next(503, times=3, retry_after=0)
+        test.run_closed(1, 5, 1)
+        report = test.report()["operations"]["get_transaction"]
+        self.assertEqual(report["count"], 4)
+        self.assertEqual(report["retries"], 3)
+        self.assertEqual(report["error_breakdown"], {"PaywayError 503": 1})
+
+    def test_setup_failures_raise_the_errors(self) -> None:
+        test = LoadTest(self.client, self.policy, {"payment": 1}, seed=1)
+        rejected = (None, [PaymentError(field_name="cardNumber", message="Invalid card number")])
+        with mock.patch.object(self.client, "create_card_token", return_value=rejected), self.assertRaises(PaywayError) as raised:
+            test.setup(customers=1)
+        self.assertEqual(raised.exception.code, "BENCH_SETUP")
+        self.assertIn("Invalid card number", str(raised.exception))
+
+    def test_open_load_runs_the_mix(self) -> None:
+        test = LoadTest(self.client, self.policy, {"payment": 1, "token": 1}, seed=1)
+        test.setup(customers=2)
+        test.run_open(200, 4, 5, 20)
+        report = test.report()
+        self.assertEqual(report["total"]["count"], 20)
+        self.assertEqual(report["total"]["errors"], 0)
+        self.assertEqual(len(test.transaction_ids), report["operations"]["payment"]["count"] + 1)
+        self.assertIn("payment", format_report(report))
+
+
+class TestMain(unittest.TestCase):
+    def test_json_report_against_the_built_in_emulator(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.json")
+            main(["--requests", "12", "--concurrency", "2", "--emulator-latency", "0.001", "--seed", "3", "--json", path])
+            with open(path) as file:
+                report = json.load(file)
+        self.assertEqual(report["total"]["count"], 12)
+        self.assertNotIn("secret_api_key", report["settings"])
+        self.assertEqual(set(report["operations"]), {"token", "payment", "get_transaction", "list_customers"})
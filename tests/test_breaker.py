@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import Mock, patch
+
+import httpx
+import requests
+
+from payway.breaker import CIRCUIT_OPEN, CircuitBreaker, CircuitState
+from payway.client import Client
+from payway.constants import EndpointFamily
+from payway.exceptions import PaywayError
+from payway.test_utils import load_json_file
+from tests.test_async_client import AsyncClientTestCase
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.changes: list[tuple[EndpointFamily, CircuitState]] = []
+        self.breaker = CircuitBreaker(
+            failure_threshold=3,
+            reset_timeout=10,
+            probes=2,
+            clock=self.clock,
+            on_change=lambda family, state: self.changes.append((family, state)),
+        )
+        self.circuit = self.breaker.circuits[EndpointFamily.TRANSACTIONS]
+
+    def fail(self, times: int) -> None:
+        for _ in range(times):
+            self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+            self.breaker.record(EndpointFamily.TRANSACTIONS, 503)
+
+    def test_opens_after_consecutive_failures_only(self) -> None:
+        self.fail(2)
+        self.breaker.record(EndpointFamily.TRANSACTIONS, 422)
+        self.fail(2)
+        self.assertIs(self.circuit.state, CircuitState.CLOSED)
+        self.fail(1)
+        self.assertIs(self.circuit.state, CircuitState.OPEN)
+        with self.assertRaises(PaywayError) as raised:
+            self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+        self.assertEqual(raised.exception.code, CIRCUIT_OPEN)
+        # other families are unaffected
+        self.breaker.before_send(EndpointFamily.CUSTOMERS)
+        self.assertEqual(self.breaker.states()["transactions"], "open")
+        self.assertEqual(self.breaker.states()["customers"], "closed")
+
+    def test_half_open_probes_close_the_circuit(self) -> None:
+        self.fail(3)
+        self.clock.now += 10
+        self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+        self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+        self.assertIs(self.circuit.state, CircuitState.HALF_OPEN)
+        # only `probes` requests are let through
+        with self.assertRaises(PaywayError):
+            self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+        self.breaker.record(EndpointFamily.TRANSACTIONS, 200)
+        self.breaker.record(EndpointFamily.TRANSACTIONS, 200)
+        self.assertIs(self.circuit.state, CircuitState.CLOSED)
+        self.assertEqual([state for _, state in self.changes], [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED])
+
+    def test_failed_probe_reopens(self) -> None:
+        self.fail(3)
+        self.clock.now += 10
+        self.fail(1)
+        self.assertIs(self.circuit.state, CircuitState.OPEN)
+        self.assertEqual(self.circuit.times_opened, 2)
+        self.assertEqual(self.circuit.retry_in(), 10)
+
+    def test_lost_probes_are_replaced_after_the_reset_timeout(self) -> None:
+        self.fail(3)
+        self.clock.now += 10
+        self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+        self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+        self.clock.now += 10
+        self.breaker.before_send(EndpointFamily.TRANSACTIONS)
+
+
+class TestClientCircuitBreaker(unittest.TestCase):
+    def setUp(self) -> None:
+        self.breaker = CircuitBreaker(failure_threshold=2)
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            circuit_breaker=self.breaker,
+        )
+
+    @patch("requests.Session.get")
+    def test_network_errors_open_the_circuit_and_requests_fail_fast(self, mock_get) -> None:
+        mock_get.side_effect = requests.ConnectionError("connection refused")
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get_transaction(1)
+        with self.assertRaises(PaywayError) as raised:
+            self.client.get_transaction(1)
+        self.assertEqual(raised.exception.code, CIRCUIT_OPEN)
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_server_errors_count_as_failures(self, mock_get) -> None:
+        mock_get.return_value = Mock(status_code=500)
+        mock_get.return_value.json.return_value = {"errorNumber": 1, "traceCode": "x"}
+        for _ in range(2):
+            with self.assertRaises(PaywayError):
+                self.client.get_transaction(1)
+        self.assertEqual(self.breaker.states()["transactions"], "open")
+
+    @patch("requests.Session.get")
+    def test_successes_keep_it_closed(self, mock_get) -> None:
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.json.return_value = load_json_file("tests/data/transaction.json")
+        for _ in range(5):
+            self.client.get_transaction(1)
+        self.assertEqual(self.breaker.states()["transactions"], "closed")
+
+
+class TestAsyncClientCircuitBreaker(AsyncClientTestCase):
+    async def test_open_circuit_fails_fast(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1)
+        client = self.make_client([httpx.ConnectError("connection refused")], circuit_breaker=breaker)
+        with self.assertRaises(httpx.ConnectError):
+            await client.get_transaction(1)
+        with self.assertRaises(PaywayError) as raised:
+            await client.get_transaction(1)
+        self.assertEqual(raised.exception.code, CIRCUIT_OPEN)
+        self.assertEqual(len(self.requests), 1)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import httpx
+
+from payway.cache import LRUCache, TransactionCache, transaction_key
+from payway.client import Client
+from payway.test_utils import load_json_file
+from tests.test_async_client import AsyncClientTestCase
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.cache = LRUCache(maxsize=2, ttl=60, clock=self.clock)
+
+    def test_hits_and_misses_are_counted(self) -> None:
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", {"x": 1})
+        self.assertEqual(self.cache.get("a"), {"x": 1})
+        self.assertEqual((self.cache.stats.hits, self.cache.stats.misses), (1, 1))
+        self.assertEqual(self.cache.stats.hit_ratio, 0.5)
+
+    def test_entries_expire_after_their_ttl(self) -> None:
+        self.cache.set("a", 1)
+        self.cache.set("b", 2, ttl=math.inf)
+        self.clock.now = 60
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), 2)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_least_recently_used_is_evicted(self) -> None:
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.stats.evictions, 1)
+
+    def test_delete(self) -> None:
+        self.cache.set("a", 1)
+        self.cache.delete("a")
+        self.cache.delete("missing")
+        self.assertIsNone(self.cache.get("a"))
+
+
+class TestTransactionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.cache = TransactionCache(maxsize=10, pending_ttl=30, clock=self.clock)
+
+    def test_ttl_follows_the_status(self) -> None:
+        closed = {"status": "approved", "settlementDate": "13 Jun 2015", "isVoidable": False, "isRefundable": False}
+        self.cache.set("closed", closed)
+        self.cache.set("refundable", closed | {"isRefundable": True})
+        self.cache.set("unflagged", {"status": "approved", "settlementDate": "13 Jun 2015"})
+        self.cache.set("voided", {"status": "voided"})
+        self.cache.set("declined", {"status": "declined"})
+        self.cache.set("pending", {"status": "pending"})
+        self.cache.set("approved*", {"status": "approved*"})
+        self.clock.now = 3600
+        keys = ("closed", "refundable", "unflagged", "voided", "declined", "pending", "approved*")
+        self.assertEqual({key for key in keys if self.cache.get(key)}, {"closed", "voided", "declined"})
+
+    def test_settled_but_voidable_transactions_expire(self) -> None:
+        # settled, yet still voidable: a void made elsewhere must show up
+        transaction = load_json_file("tests/data/transaction.json")
+        self.assertTrue(transaction["settlementDate"] and transaction["isVoidable"])
+        self.cache.set("1179985404", transaction)
+        self.clock.now = 29
+        self.assertEqual(self.cache.get("1179985404"), transaction)
+        self.clock.now = 31
+        self.assertIsNone(self.cache.get("1179985404"))
+
+    def test_save_and_load(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "transactions.json"
+            self.cache.set("voided", {"status": "voided"})
+            self.cache.set("pending", {"status": "pending"})
+            self.clock.now = 40
+            self.cache.save(path)
+            warm = TransactionCache(path=path)
+            self.assertEqual(warm.get("voided"), {"status": "voided"})
+            self.assertIsNone(warm.get("pending"))
+            self.assertEqual(len(warm), 1)
+            self.assertEqual(len(TransactionCache(path=Path(tmp) / "missing.json")), 0)
+
+
+class TestClientTransactionCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = TransactionCache()
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            transaction_cache=self.cache,
+        )
+
+    @patch("requests.Session.get")
+    def test_get_transaction_reads_through(self, mock_get) -> None:
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.json.return_value = load_json_file("tests/data/transaction.json")
+        self.client.get_transaction(1179985404)
+        transaction, errors = self.client.get_transaction(1179985404)
+        self.assertIsNone(errors)
+        self.assertEqual(transaction.status, "approved")
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("requests.Session.post")
+    def test_void_updates_the_cache(self, mock_post) -> None:
+        self.cache.set(transaction_key(1179985404), load_json_file("tests/data/transaction.json"))
+        mock_post.return_value = Mock(status_code=200)
+        mock_post.return_value.json.return_value = load_json_file("tests/data/void_transaction.json")
+        self.client.void_transaction(1179985404)
+        transaction, _ = self.client.get_transaction(1179985404)
+        self.assertEqual(transaction.status, "voided")
+
+    @patch("requests.Session.post")
+    def test_refund_caches_the_refund_and_drops_the_parent(self, mock_post) -> None:
+        self.cache.set(transaction_key(1179985404), load_json_file("tests/data/transaction.json"))
+        refund_json = load_json_file("tests/data/refund_transaction.json") | {"transactionId": 1179985405}
+        mock_post.return_value = Mock(status_code=200)
+        mock_post.return_value.json.return_value = refund_json
+        self.client.refund_transaction(1179985404, amount=100)
+        self.assertIsNone(self.cache.get(transaction_key(1179985404)))
+        self.assertEqual(self.cache.get(transaction_key(1179985405)), refund_json)
+
+
+class TestClientCustomerCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = LRUCache()
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            customer_cache=self.cache,
+        )
+        self.customer_json = load_json_file("tests/data/customer.json")
+
+    @patch("requests.Session.get")
+    def test_get_customer_reads_through(self, mock_get) -> None:
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.json.return_value = self.customer_json
+        first, _ = self.client.get_customer("98")
+        second, errors = self.client.get_customer("98")
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertIsNone(errors)
+        self.assertEqual(second.customer_name, first.customer_name)
+        self.assertIsNot(second, first)
+        self.assertEqual((self.cache.stats.hits, self.cache.stats.misses), (1, 1))
+
+    @patch("requests.Session.get")
+    def test_errors_are_not_cached(self, mock_get) -> None:
+        mock_get.return_value = Mock(status_code=404)
+        mock_get.return_value.json.return_value = {"data": [{"message": "not found"}]}
+        self.client.get_customer("98")
+        self.client.get_customer("98")
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("requests.Session.patch")
+    @patch("requests.Session.get")
+    def test_updates_invalidate_the_customer(self, mock_get, mock_patch) -> None:
+        mock_get.return_value = Mock(status_code=200)
+        mock_get.return_value.json.return_value = self.customer_json
+        mock_patch.return_value = Mock(status_code=200)
+        mock_patch.return_value.json.return_value = {"stopped": True}
+        self.client.get_customer("98")
+        self.client.stop_all_payments("98")
+        self.client.get_customer("98")
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class TestAsyncClientCustomerCache(AsyncClientTestCase):
+    async def test_read_through_and_invalidation(self) -> None:
+        customer_json = load_json_file("tests/data/customer.json")
+        client = self.make_client(
+            [
+                httpx.Response(200, json=customer_json),
+                httpx.Response(200, json={}),
+                httpx.Response(200, json=customer_json),
+            ],
+            customer_cache=LRUCache(),
+        )
+        await client.get_customer("98")
+        await client.get_customer("98")
+        self.assertEqual(len(self.requests), 1)
+        await client.update_contact_details("98", email="rebecca@example.com")
+        customer, _ = await client.get_customer("98")
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(customer.customer_number, "98")
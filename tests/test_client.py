@@ -8,6 +8,7 @@ from unittest.mock import Mock, patch
 import requests
 
 from payway.client import Client
+from payway.constants import RawBody
 from payway.exceptions import PaywayError
 from payway.model import (
     BankAccount,
@@ -106,7 +107,7 @@ class TestClient(unittest.TestCase):
             account_number="123456",
         )
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_create_token(self, mock_post) -> None:
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {
@@ -120,7 +121,7 @@ class TestClient(unittest.TestCase):
         self.assertIsNotNone(token_response.token)
         self.assertEqual(token_response.token, "2bcec36f-7b02-43db-b3ec-bfb65acfe272")
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_create_bank_account_token(self, mock_post) -> None:
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = {
@@ -133,7 +134,7 @@ class TestClient(unittest.TestCase):
         self.assertIsNotNone(token)
         self.assertEqual(token, "3bcec36f-7b02-43db-b3ec-bfb65acfe272")
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_create_customer(self, mock_post) -> None:
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = load_json_file("tests/data/customer.json")
@@ -148,7 +149,7 @@ class TestClient(unittest.TestCase):
         self.assertEqual(payway_customer.customer_name, "Rebecca Turing")
         self.assertEqual(payway_customer.email_address, "bect@example.net")
 
-    @patch("requests.put")
+    @patch("requests.Session.put")
     def test_create_customer_with_custom_id(self, mock_post) -> None:
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = load_json_file("tests/data/customer.json")
@@ -160,7 +161,7 @@ class TestClient(unittest.TestCase):
         self.assertIsNotNone(payway_customer_number)
         self.assertEqual(payway_customer_number, "98")
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_process_payment(self, mock_post) -> None:
         # Take payment (using a credit card token)
         mock_post.return_value.status_code = 200
@@ -179,7 +180,7 @@ class TestClient(unittest.TestCase):
         self.assertEqual(transaction.status, "approved")
         self.assertEqual(transaction.response_code, "11")
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_process_payment_keeps_the_raw_response(self, mock_post) -> None:
         """
         Parsing drops keys PayWay sent, so ``raw`` keeps the body verbatim for
@@ -202,7 +203,7 @@ class TestClient(unittest.TestCase):
         self.assertNotIn("cardScheme", transaction.to_dict()["creditCard"])
         self.assertEqual(transaction.card.raw, response["creditCard"])
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_process_payment_with_idempotency_key(self, mock_post) -> None:
         """
         Send a payment using a unique idempotency key to try and avoid duplicate POSTs
@@ -229,7 +230,7 @@ class TestClient(unittest.TestCase):
         self.assertEqual(transaction.status, "approved")
         self.assertEqual(transaction.response_code, "11")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_transaction_card(self, mock_get) -> None:
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = load_json_file("tests/data/card_transaction.json")
@@ -240,7 +241,7 @@ class TestClient(unittest.TestCase):
         self.assertIsNotNone(transaction.transaction_id)
         self.assertEqual(transaction.transaction_id, 1179985404)
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_void(self, mock_post) -> None:
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = load_json_file("tests/data/void_transaction.json")
@@ -249,7 +250,7 @@ class TestClient(unittest.TestCase):
         self.assertIsNotNone(void_transaction)
         self.assertEqual(void_transaction.status, "voided")
 
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_refund(self, mock_post) -> None:
         mock_post.return_value.status_code = 200
         mock_post.return_value.json.return_value = load_json_file("tests/data/refund_transaction.json")
@@ -260,7 +261,7 @@ class TestClient(unittest.TestCase):
         self.assertIsNotNone(transaction)
         self.assertEqual(transaction.status, "refunded")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_customer(self, mock_get) -> None:
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = load_json_file("tests/data/customer.json")
@@ -270,7 +271,7 @@ class TestClient(unittest.TestCase):
         self.assertEqual(customer.customer_number, "98")
         self.assertEqual(customer.customer_name, "Rebecca Turing")
 
-    @patch("requests.put")
+    @patch("requests.Session.put")
     def test_update_payment_setup_card(self, mock_post) -> None:
         # update card or bank account in PayWay from token
         mock_post.return_value.status_code = 200
@@ -307,7 +308,7 @@ class TestClientRetries(unittest.TestCase):
         self.transaction_json = load_json_file("tests/data/transaction.json")
 
     @patch("payway.client.time.sleep")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_connection_error_then_success_resends_same_idempotency_key(self, mock_post, mock_sleep) -> None:
         success = Mock(status_code=200)
         success.json.return_value = self.transaction_json
@@ -320,7 +321,7 @@ class TestClientRetries(unittest.TestCase):
         self.assertEqual(keys, ["key-123", "key-123"])
 
     @patch("payway.client.time.sleep")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_429_waits_then_succeeds(self, mock_post, mock_sleep) -> None:
         success = Mock(status_code=200)
         success.json.return_value = self.transaction_json
@@ -332,7 +333,7 @@ class TestClientRetries(unittest.TestCase):
         mock_sleep.assert_called_once_with(0.1)
 
     @patch("payway.client.time.sleep")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_429_honours_retry_after_header(self, mock_post, mock_sleep) -> None:
         success = Mock(status_code=200)
         success.json.return_value = self.transaction_json
@@ -342,7 +343,7 @@ class TestClientRetries(unittest.TestCase):
         mock_sleep.assert_called_once_with(3.0)
 
     @patch("payway.client.time.sleep")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_503_exhausting_retries_raises_failure(self, mock_post, mock_sleep) -> None:
         mock_post.side_effect = [Mock(status_code=503, headers={}) for _ in range(3)]
         with self.assertRaises(PaywayError):
@@ -350,7 +351,7 @@ class TestClientRetries(unittest.TestCase):
         self.assertEqual(mock_post.call_count, 3)
 
     @patch("payway.client.time.sleep")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_500_is_not_retried(self, mock_post, mock_sleep) -> None:
         response = Mock(status_code=500)
         response.json.side_effect = json.JSONDecodeError("invalid", "", 0)
@@ -361,7 +362,7 @@ class TestClientRetries(unittest.TestCase):
         mock_sleep.assert_not_called()
 
     @patch("payway.client.time.sleep")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_post_without_idempotency_key_is_not_retried(self, mock_post, mock_sleep) -> None:
         mock_post.side_effect = requests.ConnectionError("connection reset")
         with self.assertRaises(requests.ConnectionError):
@@ -370,7 +371,7 @@ class TestClientRetries(unittest.TestCase):
         mock_sleep.assert_not_called()
 
     @patch("payway.client.time.sleep")
-    @patch("requests.post")
+    @patch("requests.Session.post")
     def test_max_retries_zero_default_is_single_attempt(self, mock_post, mock_sleep) -> None:
         client = Client(
             merchant_id="TEST",
@@ -385,7 +386,7 @@ class TestClientRetries(unittest.TestCase):
         mock_sleep.assert_not_called()
 
     @patch("payway.client.time.sleep")
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_is_retried_on_connection_error(self, mock_get, mock_sleep) -> None:
         success = Mock(status_code=200)
         success.json.return_value = self.transaction_json
@@ -394,3 +395,68 @@ class TestClientRetries(unittest.TestCase):
         self.assertIsNone(errors)
         self.assertIsNotNone(transaction.transaction_id)
         self.assertEqual(mock_get.call_count, 2)
+
+
+class TestClientSession(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            pool_maxsize=32,
+            pool_block=True,
+            connect_timeout=3.05,
+            read_timeout=20,
+        )
+
+    def test_pool_settings_are_applied(self) -> None:
+        adapter = self.client.session.get_adapter("https://api.payway.com.au/rest/v1")
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(self.client.timeout, (3.05, 20))
+        self.assertIs(self.client.session_no_headers, self.client.session)
+
+    @patch("requests.Session.post")
+    def test_post_uses_pooled_session_with_timeouts(self, mock_post) -> None:
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.json.return_value = load_json_file("tests/data/void_transaction.json")
+        self.client.void_transaction(1179985404)
+        mock_post.assert_called_once_with(
+            "https://api.payway.com.au/rest/v1/transactions/1179985404/void",
+            data={},
+            auth=None,
+            headers={"content-type": "application/x-www-form-urlencoded"},
+            timeout=(3.05, 20),
+        )
+
+    @patch("requests.Session.patch")
+    def test_mixin_methods_share_the_client_session(self, mock_patch) -> None:
+        mock_patch.return_value.status_code = 200
+        mock_patch.return_value.json.return_value = {"stopped": True}
+        self.client.stop_all_payments("1")
+        mock_patch.assert_called_once_with(
+            "https://api.payway.com.au/rest/v1/customers/1/payment-setup",
+            data={"stopped": "true"},
+            timeout=(3.05, 20),
+        )
+
+    @patch("requests.Session.get")
+    def test_lazy_parsing_defers_nested_models(self, mock_get) -> None:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = {**load_json_file("tests/data/card_transaction.json"), "creditCard": "invalid"}
+        self.client.lazy_parsing = True
+        transaction, errors = self.client.get_transaction(1179985404)
+        self.assertIsNone(errors)
+        with self.assertRaises(AttributeError):
+            transaction.card
+
+    @patch("requests.Session.get")
+    def test_raw_body_can_be_compressed(self, mock_get) -> None:
+        response = load_json_file("tests/data/card_transaction.json")
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = response
+        self.client.raw_body = RawBody.COMPRESS
+        transaction, _ = self.client.get_transaction(1179985404)
+        self.assertEqual(transaction.raw, response)
+        self.assertIsNone(transaction.card.raw)
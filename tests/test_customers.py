@@ -214,6 +214,7 @@ class TestCustomerRequest(unittest.TestCase):
         mock_get.assert_called_once_with(
             "https://api.payway.com.au/rest/v1/customers",
             params={"page": None},
+            timeout=self.client.timeout,
         )
         self.assertEqual(response.__class__, dict)
         self.assertIsNotNone(response)
@@ -227,4 +228,19 @@ class TestCustomerRequest(unittest.TestCase):
         mock_get.assert_called_once_with(
             "https://api.payway.com.au/rest/v1/customers",
             params={"page": 3},
+            timeout=self.client.timeout,
+        )
+
+    @patch("requests.Session.get")
+    def test_iter_customers(self, mock_get) -> None:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = load_json_file("tests/data/customers.json")
+        customers = list(self.client.iter_customers())
+        self.assertEqual(len(customers), 1)
+        self.assertEqual(customers[0].customer_name, "Jack Smith")
+        self.assertEqual(customers[0].city_name, "Melbourne")
+        mock_get.assert_called_once_with(
+            "https://api.payway.com.au/rest/v1/customers",
+            params={"page": None},
+            timeout=self.client.timeout,
         )
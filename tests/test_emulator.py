@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import unittest
+
+from payway.async_client import AsyncClient
+from payway.client import Client
+from payway.constants import EndpointFamily
+from payway.exceptions import PaywayError
+from payway.model import PayWayCustomer, PayWayPayment
+from payway.retry import RetryPolicy
+from payway.test_utils import make_card
+from payway.testing.emulator import Emulator, Fault, constant_latency
+
+
+def make_client(emulator: Emulator, **kwargs: dict) -> Client:
+    return Client(
+        merchant_id="TEST",
+        bank_account_id="0000000A",
+        publishable_api_key="TPUBLISHABLE-API-KEY",
+        secret_api_key="TSECRET-API-KEY",
+        api_url=emulator.url,
+        **kwargs,
+    )
+
+
+class TestEmulator(unittest.TestCase):
+    def setUp(self) -> None:
+        self.emulator = Emulator(seed=1).start()
+        self.addCleanup(self.emulator.stop)
+        self.client = make_client(self.emulator)
+        self.addCleanup(self.client.close)
+
+    def charge(self, amount: float = 10, idempotency_key: str | None = None) -> int:
+        token, _ = self.client.create_card_token(make_card())
+        payment = PayWayPayment(transaction_type="payment", token=token.token, amount=amount, currency="aud", order_number="5100")
+        transaction, errors = self.client.process_payment(payment, idempotency_key=idempotency_key)
+        self.assertIsNone(errors)
+        return transaction.transaction_id
+
+    def test_token_payment_void_and_refund(self) -> None:
+        transaction_id = self.charge()
+        transaction, _ = self.client.get_transaction(transaction_id)
+        self.assertEqual(transaction.status, "approved")
+        self.assertEqual(transaction.card.card_number, "456471...004")
+        voided, _ = self.client.void_transaction(transaction_id)
+        self.assertEqual(voided.status, "voided")
+        _, errors = self.client.void_transaction(transaction_id)
+        self.assertEqual(errors[0].message, "Transaction cannot be voided")
+        refund, _ = self.client.refund_transaction(self.charge(), amount=5)
+        self.assertEqual(refund.status, "refunded")
+        self.assertEqual([item.order_number for item in self.client.iter_transactions_by_order("5100")], ["5100"] * 2)
+
+    def test_unknown_parents_are_rejected(self) -> None:
+        for parent in ("999", "abc"):
+            _, errors = self.client.refund_transaction(parent, amount=5)
+            self.assertEqual((errors[0].field_name, errors[0].message), ("parentTransactionId", "Transaction not found"))
+
+    def test_customer_lifecycle(self) -> None:
+        token, _ = self.client.create_card_token(make_card())
+        customer, errors = self.client.create_customer(PayWayCustomer(custom_id="c-1", customer_name="Rebecca", token=token.token))
+        self.assertIsNone(errors)
+        self.assertEqual(customer.customer_number, "c-1")
+        self.assertEqual(customer.payment_setup.payment_method, "creditCard")
+        transaction, _ = self.client.process_payment(PayWayPayment(transaction_type="payment", customer_number="c-1", amount=12))
+        self.assertEqual(transaction.principal_amount, 12)
+        self.client.stop_all_payments("c-1")
+        _, errors = self.client.process_payment(PayWayPayment(transaction_type="payment", customer_number="c-1", amount=12))
+        self.assertEqual(errors[0].field_name, "customerNumber")
+        self.client.update_contact_details("c-1", emailAddress="rebecca@example.com")
+        customer, _ = self.client.get_customer("c-1")
+        self.assertEqual(customer.email_address, "rebecca@example.com")
+        self.assertEqual(self.client.delete_customer("c-1").status_code, 204)
+        _, errors = self.client.get_customer("c-1")
+        self.assertEqual(errors[0].message, "Customer not found")
+
+    def test_idempotency_key_replays_the_original_response(self) -> None:
+        token, _ = self.client.create_card_token(make_card())
+        payment = PayWayPayment(transaction_type="payment", token=token.token, amount=10)
+        first, _ = self.client.process_payment(payment, idempotency_key="key-1")
+        self.client.void_transaction(first.transaction_id)
+        replay, errors = self.client.process_payment(payment, idempotency_key="key-1")
+        self.assertIsNone(errors)
+        self.assertEqual(replay.transaction_id, first.transaction_id)
+        self.assertEqual(replay.status, "approved")
+        payment.amount = 11
+        _, errors = self.client.process_payment(payment, idempotency_key="key-1")
+        self.assertEqual(errors[0].field_name, "Idempotency-Key")
+
+    def test_faults_are_retried(self) -> None:
+        transaction_id = self.charge()
+        client = make_client(self.emulator, retry_policy=RetryPolicy(max_retries=2, base_delay=0))
+        self.addCleanup(client.close)
+        self.emulator.fail_next(503, times=2, retry_after=0, family=EndpointFamily.CUSTOMERS)
+        before = self.emulator.request_count
+        client.get_transaction(transaction_id)
+        self.assertEqual(self.emulator.request_count - before, 1)
+        self.emulator.faults.clear()
+        self.emulator.fail_next(503, times=2, retry_after=0)
+        transaction, _ = client.get_transaction(transaction_id)
+        self.assertEqual(transaction.transaction_id, transaction_id)
+        self.assertEqual(self.emulator.request_count - before, 4)
+
+    def test_server_error_shape(self) -> None:
+        self.emulator.faults.append(Fault(500))
+        with self.assertRaises(PaywayError) as raised:
+            self.client.get_transaction(1)
+        self.assertIn("Trace code", str(raised.exception))
+
+
+class TestAsyncClientAgainstEmulator(unittest.IsolatedAsyncioTestCase):
+    async def test_payment_with_latency(self) -> None:
+        calls = []
+
+        def latency() -> float:
+            calls.append(1)
+            return constant_latency(0.001)()
+
+        with Emulator(latency=latency) as emulator:
+            async with AsyncClient(
+                merchant_id="TEST",
+                bank_account_id="0000000A",
+                publishable_api_key="TPUBLISHABLE-API-KEY",
+                secret_api_key="TSECRET-API-KEY",
+                api_url=emulator.url,
+            ) as client:
+                token, _ = await client.create_card_token(make_card())
+                transaction, _ = await client.process_payment(
+                    PayWayPayment(transaction_type="payment", token=token.token, amount=1)
+                )
+                self.assertEqual(transaction.status, "approved")
+        self.assertEqual(len(calls), 2)
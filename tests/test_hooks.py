@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import socket
+import unittest
+
+import requests
+
+from payway.async_client import AsyncClient
+from payway.client import Client
+from payway.hooks import AttemptEvent, ParseEvent, RequestEvent
+from payway.model import PayWayPayment
+from payway.retry import RetryPolicy
+from payway.test_utils import CREDENTIALS, make_card
+from payway.testing.emulator import Emulator
+from payway.utils import endpoint_template
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    def test_ids_become_placeholders(self) -> None:
+        base = "https://api.payway.com.au/rest/v1"
+        self.assertEqual(endpoint_template(f"{base}/transactions/1179985404/void"), "/transactions/{transactionId}/void")
+        self.assertEqual(
+            endpoint_template(f"{base}/transactions/search-customer?customerNumber=1"), "/transactions/search-customer"
+        )
+        self.assertEqual(endpoint_template(f"{base}/customers/98/payment-setup"), "/customers/{customerNumber}/payment-setup")
+        self.assertEqual(endpoint_template(f"{base}/single-use-tokens"), "/single-use-tokens")
+
+
+class TestClientHooks(unittest.TestCase):
+    def setUp(self) -> None:
+        self.emulator = Emulator(seed=1).start()
+        self.addCleanup(self.emulator.stop)
+        self.events: list[RequestEvent] = []
+        self.client = Client(
+            **CREDENTIALS,
+            api_url=self.emulator.url,
+            retry_policy=RetryPolicy(max_retries=1, base_delay=0),
+            hooks=[self.events.append],
+        )
+        self.addCleanup(self.client.close)
+
+    def attempts(self) -> list[AttemptEvent]:
+        return [event for event in self.events if isinstance(event, AttemptEvent)]
+
+    def test_an_event_per_attempt_and_parse(self) -> None:
+        token, _ = self.client.create_card_token(make_card())
+        transaction, _ = self.client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+        self.emulator.fail_next(503, retry_after=0)
+        self.events.clear()
+        self.client.get_transaction(transaction.transaction_id)
+
+        failed, succeeded = self.attempts()
+        self.assertEqual((failed.method, failed.endpoint), ("GET", "/transactions/{transactionId}"))
+        self.assertEqual((failed.attempt, failed.status, failed.retry_wait), (1, 503, 0))
+        self.assertEqual((succeeded.attempt, succeeded.status, succeeded.retry_wait), (2, 200, None))
+        self.assertIsNone(succeeded.connect)  # the pooled connection was reused
+        self.assertGreater(succeeded.bytes_in, 0)
+        self.assertGreater(succeeded.ttfb, 0)
+        self.assertLessEqual(succeeded.ttfb, succeeded.duration)
+        parse = self.events[-1]
+        self.assertIsInstance(parse, ParseEvent)
+        self.assertEqual((parse.model, parse.endpoint, parse.status), ("PayWayTransaction", "/transactions/{transactionId}", 200))
+
+    def test_first_request_reports_connect_and_body_sizes(self) -> None:
+        self.client.create_card_token(make_card())
+        attempt = self.attempts()[0]
+        self.assertEqual((attempt.method, attempt.endpoint, attempt.status), ("POST", "/single-use-tokens", 200))
+        self.assertGreater(attempt.connect, 0)
+        self.assertGreater(attempt.bytes_out, 0)
+
+    def test_network_errors_are_reported(self) -> None:
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        client = Client(**CREDENTIALS, api_url=f"http://127.0.0.1:{port}/rest/v1", hooks=[self.events.append])
+        self.addCleanup(client.close)
+        with self.assertRaises(requests.ConnectionError):
+            client.get_transaction(1)
+        (attempt,) = self.attempts()
+        self.assertEqual((attempt.status, attempt.error, attempt.retry_wait), (None, "ConnectionError", None))
+
+    def test_a_failing_hook_does_not_fail_the_request(self) -> None:
+        def broken(event: RequestEvent) -> None:
+            raise RuntimeError
+
+        self.client.hooks.insert(0, broken)
+        with self.assertLogs("payway.hooks", "ERROR"):
+            token, errors = self.client.create_card_token(make_card())
+        self.assertIsNone(errors)
+        self.assertEqual(len(self.events), 2)
+
+
+class TestAsyncClientHooks(unittest.IsolatedAsyncioTestCase):
+    async def test_trace_timings(self) -> None:
+        events: list[RequestEvent] = []
+        with Emulator() as emulator:
+            async with AsyncClient(**CREDENTIALS, api_url=emulator.url, hooks=[events.append]) as client:
+                await client.create_card_token(make_card())
+                await client.create_card_token(make_card())
+        first, _, second, _ = events
+        self.assertEqual((first.method, first.endpoint, first.status), ("POST", "/single-use-tokens", 200))
+        self.assertGreater(first.connect, 0)
+        self.assertIsNone(second.connect)
+        self.assertGreater(second.ttfb, 0)
+        self.assertGreater(second.bytes_out, 0)
+        self.assertGreater(second.bytes_in, 0)
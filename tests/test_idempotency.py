@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import unittest
+
+import httpx
+import requests
+
+from payway.async_client import AsyncClient
+from payway.client import Client
+from payway.exceptions import PaywayError
+from payway.idempotency import operation
+from payway.model import PayWayPayment
+from payway.retry import RetryPolicy
+from payway.test_utils import CREDENTIALS, make_card
+from payway.testing.emulator import Emulator
+from payway.transport import InMemoryTransport, Response
+
+NO_WAIT = RetryPolicy(max_retries=2, base_delay=0)
+
+
+class EmulatorTestCase(unittest.TestCase):
+    def make_client(self, **kwargs: object) -> Client:
+        self.emulator = Emulator(seed=1)
+        self.transport = self.emulator.transport()
+        return Client(**CREDENTIALS, api_url=self.emulator.url, transport=self.transport, retry_policy=NO_WAIT, **kwargs)
+
+    def charge(self, client: Client) -> PayWayPayment:
+        token, _ = client.create_card_token(make_card())
+        return PayWayPayment(transaction_type="payment", token=token.token, amount=10)
+
+    def sent_keys(self) -> list[str | None]:
+        return [request.headers.get("Idempotency-Key") for request in self.transport.requests]
+
+
+class TestAutoIdempotencyKeys(EmulatorTestCase):
+    def test_every_post_is_keyed_and_the_key_returned(self) -> None:
+        client = self.make_client(auto_idempotency_keys=True)
+        token, _ = client.create_card_token(make_card())
+        transaction, _ = client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+        refund, _ = client.refund_transaction(transaction.transaction_id, 5)
+        fetched, _ = client.get_transaction(transaction.transaction_id)
+
+        keys = self.sent_keys()
+        self.assertEqual(keys[-1], None)
+        self.assertEqual(len(set(keys[:-1])), 3)
+        self.assertEqual([token.idempotency_key, transaction.idempotency_key, refund.idempotency_key], keys[:-1])
+        self.assertIsNone(fetched.idempotency_key)
+
+    def test_unkeyed_posts_are_now_retried(self) -> None:
+        client = self.make_client(auto_idempotency_keys=True)
+        payment = self.charge(client)
+        self.emulator.fail_next(503, retry_after=0)
+        transaction, errors = client.process_payment(payment)
+        self.assertIsNone(errors)
+        first, retry = self.sent_keys()[-2:]
+        self.assertEqual(first, retry)
+        self.assertEqual(transaction.idempotency_key, retry)
+
+    def test_rejected_posts_return_the_key_on_their_errors(self) -> None:
+        client = self.make_client(auto_idempotency_keys=True)
+        payment = PayWayPayment(transaction_type="payment", customer_number="nobody", amount=10)
+        transaction, errors = client.process_payment(payment)
+        self.assertIsNone(transaction)
+        self.assertEqual(errors[0].field_name, "customerNumber")
+        self.assertEqual({error.idempotency_key for error in errors}, {self.sent_keys()[-1]})
+        self.assertIsNotNone(errors[0].idempotency_key)
+
+    def test_off_by_default(self) -> None:
+        client = self.make_client()
+        payment = self.charge(client)
+        self.emulator.fail_next(503, retry_after=0)
+        with self.assertRaises(PaywayError):
+            client.process_payment(payment)
+        self.assertEqual(set(self.sent_keys()), {None})
+
+    def test_caller_keys_win(self) -> None:
+        client = self.make_client(auto_idempotency_keys=True)
+        transaction, _ = client.process_payment(self.charge(client), idempotency_key="order-1")
+        self.assertEqual((self.sent_keys()[-1], transaction.idempotency_key), ("order-1", "order-1"))
+
+
+class TestOperations(EmulatorTestCase):
+    def test_rerunning_an_operation_replays_it(self) -> None:
+        client = self.make_client()
+
+        def refund_order() -> list[str]:
+            with operation("refund-order-42"):
+                token, _ = client.create_card_token(make_card())
+                transaction, _ = client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+                refund, _ = client.refund_transaction(transaction.transaction_id, 10)
+            return [token.token, transaction.transaction_id, refund.transaction_id]
+
+        first = refund_order()
+        self.assertEqual(refund_order(), first)
+        keys = self.sent_keys()
+        self.assertEqual(keys[:3], keys[3:])
+        # the payment and the refund both POST to /transactions, so they're numbered apart
+        self.assertEqual(len(set(keys[:3])), 3)
+
+    def test_operations_are_keyed_apart(self) -> None:
+        client = self.make_client()
+        for order in ("order-1", "order-2"):
+            with operation(order):
+                client.create_card_token(make_card())
+        first, second = self.sent_keys()
+        self.assertNotEqual(first, second)
+
+
+class TestKeysOnErrors(unittest.TestCase):
+    def test_network_errors_note_the_key(self) -> None:
+        def refuse(_: object) -> Response:
+            msg = "refused"
+            raise requests.ConnectionError(msg)
+
+        client = Client(**CREDENTIALS, transport=InMemoryTransport(refuse), auto_idempotency_keys=True, retry_policy=NO_WAIT)
+        with self.assertRaises(requests.ConnectionError) as caught:
+            client.void_transaction(1)
+        (note,) = caught.exception.__notes__
+        self.assertEqual(note, f"Idempotency-Key: {client.session.requests[0].headers['Idempotency-Key']}")
+        self.assertEqual(len(client.session.requests), 3)
+
+    def test_payway_errors_note_the_key(self) -> None:
+        transport = InMemoryTransport(lambda request: Response.from_json(401, {}))
+        client = Client(**CREDENTIALS, transport=transport)
+        with operation("order-1"), self.assertRaises(PaywayError) as caught:
+            client.void_transaction(1)
+        self.assertEqual(caught.exception.__notes__, [f"Idempotency-Key: {transport.requests[0].headers['Idempotency-Key']}"])
+
+
+class TestAsyncAutoIdempotencyKeys(unittest.IsolatedAsyncioTestCase):
+    async def test_retried_with_the_same_key(self) -> None:
+        responses = [httpx.Response(503), httpx.Response(200, json={"transactionId": 1, "status": "voided"})]
+        sent: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request)
+            return responses.pop(0)
+
+        async with AsyncClient(
+            **CREDENTIALS, transport=httpx.MockTransport(handler), retry_policy=NO_WAIT, auto_idempotency_keys=True
+        ) as client:
+            transaction, errors = await client.void_transaction(1)
+        self.assertIsNone(errors)
+        keys = {request.headers["Idempotency-Key"] for request in sent}
+        self.assertEqual(keys, {transaction.idempotency_key})
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import unittest
+
+from benchmarks.import_time import ROOT, deferred_imports, fastest
+
+
+def run_python(code: str) -> None:
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+
+
+class TestImportBudget(unittest.TestCase):
+    def test_client_import_defers_transport_libraries(self) -> None:
+        self.assertEqual(deferred_imports(fastest("payway.client", 1)), [])
+
+    def test_package_names_import_on_first_access(self) -> None:
+        run_python(
+            "import sys, payway\n"
+            "assert 'payway.client' not in sys.modules\n"
+            "assert payway.PayWayCard.__module__ == 'payway.model'\n"
+            "assert 'payway.client' not in sys.modules\n"
+            "assert set(payway.__all__) <= set(dir(payway))\n"
+        )
+
+    def test_requests_is_imported_for_the_first_call(self) -> None:
+        run_python(
+            "import sys\n"
+            "from payway import Client\n"
+            "client = Client('TEST', '0000000A', 'SECRET', 'PUBLISHABLE')\n"
+            "assert 'requests' not in sys.modules\n"
+            "assert client.session.auth == ('SECRET', '')\n"
+            "assert 'requests' in sys.modules\n"
+            "client.close()\n"
+        )
+
+    def test_unknown_names_raise_attribute_error(self) -> None:
+        import payway
+
+        with self.assertRaises(AttributeError):
+            payway.Nope  # noqa: B018
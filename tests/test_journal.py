@@ -0,0 +1,351 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+import requests
+
+from payway.async_client import AsyncClient
+from payway.breaker import CIRCUIT_OPEN, CircuitBreaker
+from payway.client import Client
+from payway.exceptions import PaywayError
+from payway.journal import Journal, JournalEntry, matching_transaction, recover
+from payway.model import PayWayPayment
+from payway.retry import RetryPolicy
+from payway.test_utils import CREDENTIALS, make_card
+from payway.testing.emulator import Emulator
+from payway.transport import InMemoryTransport, Request, Response
+
+NO_RETRIES = RetryPolicy(max_retries=0, base_delay=0)
+
+
+def slow_fsync(fd: int) -> None:
+    time.sleep(0.002)
+
+
+def write_payments(journal: Journal, worker: int) -> None:
+    for number in range(50):
+        key = f"{worker}-{number}"
+        journal.begin(key, "/transactions", {})
+        journal.finish(key, 200)
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "payments.journal"
+
+    def open_journal(self, **kwargs: object) -> Journal:
+        journal = Journal(self.path, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+
+class TestJournal(JournalTestCase):
+    def test_pending_until_finished(self) -> None:
+        journal = self.open_journal()
+        journal.begin("a", "/transactions", {"principalAmount": 10})
+        journal.begin("b", "/transactions", {"principalAmount": 20})
+        journal.finish("a", 200)
+        (entry,) = journal.pending()
+        self.assertEqual((entry.key, entry.endpoint, entry.body), ("b", "/transactions", {"principalAmount": 20}))
+
+    def test_unfinished_entries_survive_reopening(self) -> None:
+        with Journal(self.path) as journal:
+            journal.begin("a", "/transactions", {"orderNumber": "1"})
+            journal.begin("b", "/transactions", {"orderNumber": "2"})
+            journal.finish("b", 200)
+        self.assertEqual([entry.key for entry in self.open_journal().pending()], ["a"])
+
+    def test_reopening_compacts(self) -> None:
+        with Journal(self.path) as journal:
+            for key in "abc":
+                journal.begin(key, "/transactions", {})
+                journal.finish(key, 200)
+            journal.begin("d", "/transactions", {})
+        self.assertEqual(len(self.path.read_bytes().splitlines()), 7)
+        self.open_journal()
+        self.assertEqual(len(self.path.read_bytes().splitlines()), 1)
+
+    def test_a_torn_last_line_is_dropped(self) -> None:
+        with Journal(self.path) as journal:
+            journal.begin("a", "/transactions", {})
+        with self.path.open("ab") as file:
+            file.write(b'{"event":"begin","key":"b","endp')
+        journal = self.open_journal()
+        self.assertEqual([entry.key for entry in journal.pending()], ["a"])
+        journal.begin("c", "/transactions", {})
+        self.assertEqual([entry.key for entry in Journal(self.path).pending()], ["a", "c"])
+
+    def test_compacts_after_enough_records(self) -> None:
+        journal = self.open_journal(compact_after=10)
+        for number in range(20):
+            journal.begin(str(number), "/transactions", {})
+            journal.finish(str(number), 200)
+        self.assertLessEqual(len(self.path.read_bytes().splitlines()), 10)
+        self.assertEqual(journal.pending(), [])
+
+    def test_concurrent_writers_share_fsyncs(self) -> None:
+        journal = self.open_journal()
+        with mock.patch("os.fsync", slow_fsync):
+            threads = [threading.Thread(target=write_payments, args=(journal, worker)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(journal.records, 800)
+        self.assertLess(journal.commits, journal.records / 2)
+        self.assertEqual(journal.pending(), [])
+
+    def test_write_failures_are_raised_to_every_writer(self) -> None:
+        journal = self.open_journal()
+        with mock.patch("os.fsync", side_effect=OSError("disk full")), self.assertRaises(OSError):
+            journal.begin("a", "/transactions", {})
+        with self.assertRaisesRegex(Exception, "disk full"):
+            journal.begin("b", "/transactions", {})
+
+
+# 12 Jun 2015 08:22 UTC
+STARTED = 1434097320.0
+
+
+def found(transaction_id: int, transaction_type: str = "payment", made: str = "12 Jun 2015 18:22 AEST", **fields: object) -> dict:
+    return {
+        "transactionId": transaction_id,
+        "transactionType": transaction_type,
+        "principalAmount": 10.0,
+        "transactionDateTime": made,
+        **fields,
+    }
+
+
+class TestMatchingTransaction(unittest.TestCase):
+    def test_matches_type_amount_and_parent(self) -> None:
+        body = {"transactionType": "refund", "principalAmount": "10", "parentTransactionId": 1}
+        refund = JournalEntry("k", "/transactions", body, STARTED)
+        transactions = [
+            found(4, "refund", parentTransaction={"transactionId": 2}),
+            found(3, "payment"),
+            found(2, "refund", parentTransaction={"transactionId": 1}),
+        ]
+        self.assertEqual(matching_transaction(refund, transactions)["transactionId"], 2)
+
+    def test_claimed_transactions_are_skipped(self) -> None:
+        payment = JournalEntry("k", "/transactions", {"transactionType": "payment", "principalAmount": 10}, STARTED)
+        claimed: set[int] = set()
+        self.assertEqual(matching_transaction(payment, [found(1)], claimed)["transactionId"], 1)
+        self.assertIsNone(matching_transaction(payment, [found(1)], claimed))
+
+    def test_transactions_made_before_the_entry_are_skipped(self) -> None:
+        payment = JournalEntry("k", "/transactions", {"transactionType": "payment", "principalAmount": 10}, STARTED)
+        # one made the minute after, then an earlier declined attempt in another time zone
+        transactions = [found(1, made="12 Jun 2015 08:23 UTC"), found(2, made="12 Jun 2015 18:10 AEST", status="declined")]
+        self.assertEqual(matching_transaction(payment, transactions)["transactionId"], 1)
+        self.assertIsNone(matching_transaction(payment, transactions[1:]))
+
+    def test_transactions_within_the_clock_skew_are_left_to_a_replay(self) -> None:
+        payment = JournalEntry("k", "/transactions", {"transactionType": "payment", "principalAmount": 10}, STARTED)
+        # a declined attempt the minute before the entry began could be an earlier attempt or, on a slow clock, this one
+        declined = found(1, made="12 Jun 2015 08:21 UTC", status="declined")
+        self.assertIsNone(matching_transaction(payment, [declined]))
+        self.assertIsNone(matching_transaction(payment, [found(2), declined]))
+
+    def test_ambiguous_or_undated_matches_are_left_to_a_replay(self) -> None:
+        payment = JournalEntry("k", "/transactions", {"transactionType": "payment", "principalAmount": 10}, STARTED)
+        self.assertIsNone(matching_transaction(payment, [found(1), found(2)]))
+        self.assertIsNone(matching_transaction(payment, [found(1, made="")]))
+        self.assertIsNone(matching_transaction(payment, [found(1, made="12 Jun 2015 18:22 XYZ")]))
+
+
+class TestClientJournal(JournalTestCase):
+    def make_client(self, *, lose_responses: int = 0, **kwargs: object) -> Client:
+        """
+        A client on an emulator whose first ``lose_responses`` answers to payment
+        POSTs are processed and then lost, as if the connection dropped
+        """
+        self.emulator = Emulator(seed=1)
+        answer = self.emulator.transport().handler
+        lost = [lose_responses]
+
+        def handle(request: Request) -> Response:
+            response = answer(request)
+            if request.method == "POST" and "/transactions" in request.url and lost[0]:
+                lost[0] -= 1
+                msg = "connection reset"
+                raise requests.ConnectionError(msg)
+            return response
+
+        self.transport = InMemoryTransport(handle)
+        self.journal = self.open_journal()
+        return Client(
+            **CREDENTIALS,
+            api_url=self.emulator.url,
+            transport=self.transport,
+            retry_policy=NO_RETRIES,
+            journal=self.journal,
+            **kwargs,
+        )
+
+    def payment(self, client: Client, order_number: str | None = "order-1") -> PayWayPayment:
+        token, _ = client.create_card_token(make_card())
+        return PayWayPayment(transaction_type="payment", token=token.token, amount=10, order_number=order_number)
+
+    def posts(self) -> int:
+        return sum(request.method == "POST" for request in self.transport.requests)
+
+    def test_answered_payments_are_finished(self) -> None:
+        client = self.make_client()
+        transaction, _ = client.process_payment(self.payment(client))
+        client.void_transaction(transaction.transaction_id)
+        self.assertEqual(self.journal.pending(), [])
+        # the token POST and both transaction POSTs are keyed, but only the transaction POSTs are journalled
+        self.assertTrue(client.auto_idempotency_keys)
+        self.assertEqual(len(self.path.read_bytes().splitlines()), 4)
+        self.assertNotIn(b"4564710000000004", self.path.read_bytes())
+
+    def test_posts_refused_before_sending_are_not_journalled(self) -> None:
+        client = self.make_client(lose_responses=1, circuit_breaker=CircuitBreaker(failure_threshold=1))
+        with self.assertRaises(requests.ConnectionError):
+            client.process_payment(self.payment(client, order_number="order-1"))
+        with self.assertRaises(PaywayError) as raised:
+            client.process_payment(self.payment(client, order_number="order-2"))
+        self.assertEqual(raised.exception.code, CIRCUIT_OPEN)
+
+        # once PayWay is back, only the payment that reached it is recovered
+        client.circuit_breaker = None
+        ((entry, transaction, _),) = recover(client)
+        self.assertEqual((entry.body["orderNumber"], transaction.order_number), ("order-1", "order-1"))
+        self.assertEqual(len(self.emulator.state.transactions), 1)
+
+    def test_recover_finds_a_lost_payment_by_order_number(self) -> None:
+        client = self.make_client(lose_responses=1)
+        with self.assertRaises(requests.ConnectionError):
+            client.process_payment(self.payment(client))
+        (entry,) = self.journal.pending()
+        posts = self.posts()
+
+        ((recovered, transaction, errors),) = recover(client)
+        self.assertEqual((recovered, errors), (entry, None))
+        self.assertEqual(transaction.order_number, "order-1")
+        self.assertEqual(self.posts(), posts)
+        self.assertEqual(len(self.emulator.state.transactions), 1)
+        self.assertEqual(Journal(self.path).pending(), [])
+
+    def test_recover_replays_a_lost_void(self) -> None:
+        client = self.make_client()
+        payment, _ = client.process_payment(self.payment(client))
+        lose = [1]
+        answer = self.transport.handler
+
+        def handle(request: Request) -> Response:
+            response = answer(request)
+            if request.url.endswith("/void") and lose[0]:
+                lose[0] -= 1
+                msg = "connection reset"
+                raise requests.ConnectionError(msg)
+            return response
+
+        self.transport.handler = handle
+        with self.assertRaises(requests.ConnectionError):
+            client.void_transaction(payment.transaction_id)
+
+        ((_, transaction, errors),) = recover(client)
+        self.assertIsNone(errors)
+        self.assertEqual((transaction.transaction_id, transaction.status), (payment.transaction_id, "voided"))
+        self.assertEqual(self.journal.pending(), [])
+
+    def test_recover_sends_a_payment_that_never_left(self) -> None:
+        client = self.make_client()
+        payment = self.payment(client, order_number="order-2")
+        self.journal.begin("key-1", client.transaction_url, payment.to_dict())
+
+        ((_, transaction, errors),) = recover(client)
+        self.assertIsNone(errors)
+        self.assertEqual((transaction.status, transaction.idempotency_key), ("approved", "key-1"))
+        self.assertEqual(len(self.emulator.state.transactions), 1)
+        # recovering again finds nothing left to do
+        self.assertEqual(list(recover(client)), [])
+
+    def test_recover_replays_despite_an_earlier_attempt_for_the_order(self) -> None:
+        client = self.make_client()
+        client.process_payment(self.payment(client))
+        # an attempt under a new key, begun ten minutes later, that never reached PayWay
+        with mock.patch("time.time", return_value=time.time() + 600):
+            self.journal.begin("key-2", client.transaction_url, self.payment(client).to_dict())
+
+        ((_, transaction, errors),) = recover(client)
+        self.assertIsNone(errors)
+        self.assertEqual(transaction.idempotency_key, "key-2")
+        self.assertEqual(len(self.emulator.state.transactions), 2)
+
+    def test_recover_replays_a_retry_begun_soon_after_a_declined_attempt(self) -> None:
+        client = self.make_client()
+        transaction, _ = client.process_payment(self.payment(client))
+        self.emulator.state.transactions[transaction.transaction_id]["status"] = "declined"
+        with mock.patch("time.time", return_value=time.time() + 119):
+            self.journal.begin("key-2", client.transaction_url, self.payment(client).to_dict())
+
+        ((_, transaction, errors),) = recover(client)
+        self.assertIsNone(errors)
+        self.assertEqual((transaction.status, transaction.idempotency_key), ("approved", "key-2"))
+        self.assertEqual(len(self.emulator.state.transactions), 2)
+
+    def test_failed_recoveries_stay_pending(self) -> None:
+        client = self.make_client(lose_responses=2)
+        with self.assertRaises(requests.ConnectionError):
+            client.process_payment(self.payment(client, order_number=None))
+
+        ((_, transaction, errors),) = recover(client)
+        self.assertIsNone(transaction)
+        self.assertIn("connection reset", errors[0].message)
+        self.assertEqual(len(self.journal.pending()), 1)
+        ((_, transaction, _),) = recover(client)
+        self.assertEqual(transaction.status, "approved")
+        self.assertEqual(len(self.emulator.state.transactions), 1)
+
+    def test_recovers_in_batches(self) -> None:
+        client = self.make_client(lose_responses=5)
+        for number in range(5):
+            with self.assertRaises(requests.ConnectionError):
+                client.process_payment(self.payment(client, order_number=f"order-{number}"))
+        results = list(recover(client, batch_size=2, max_workers=2))
+        self.assertEqual(sorted(transaction.order_number for _, transaction, _ in results), [f"order-{n}" for n in range(5)])
+        self.assertEqual(len(self.emulator.state.transactions), 5)
+        self.assertEqual(self.journal.pending(), [])
+
+
+class TestAsyncClientJournal(unittest.IsolatedAsyncioTestCase):
+    async def test_journals_payment_posts(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            journal = Journal(os.path.join(directory, "payments.journal"))
+            transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"transactionId": 1, "status": "voided"}))
+            async with AsyncClient(**CREDENTIALS, transport=transport, journal=journal) as client:
+                transaction, _ = await client.void_transaction(1)
+            journal.close()
+            lines = Path(journal.path).read_bytes().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn(transaction.idempotency_key.encode(), lines[0])
+
+    async def test_posts_refused_before_sending_are_not_journalled(self) -> None:
+        def refuse(request: httpx.Request) -> httpx.Response:
+            msg = "connection refused"
+            raise httpx.ConnectError(msg)
+
+        with tempfile.TemporaryDirectory() as directory:
+            journal = Journal(os.path.join(directory, "payments.journal"))
+            breaker = CircuitBreaker(failure_threshold=1)
+            transport = httpx.MockTransport(refuse)
+            async with AsyncClient(**CREDENTIALS, transport=transport, journal=journal, circuit_breaker=breaker) as client:
+                with self.assertRaises(httpx.ConnectError):
+                    await client.void_transaction(1)
+                with self.assertRaises(PaywayError):
+                    await client.void_transaction(2)
+            journal.close()
+            self.assertEqual([entry.endpoint for entry in journal.pending()], [f"{client.transaction_url}/1/void"])
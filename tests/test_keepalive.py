@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import unittest
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
+
+from benchmarks._server import https_stand_in
+from payway.client import Client
+from payway.hooks import AttemptEvent, RequestEvent
+from payway.test_utils import CREDENTIALS
+from payway.transport import Urllib3Transport
+from payway.transport import _reconnect as real_reconnect
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class DropsReusedConnections(BaseHTTPRequestHandler):
+    """
+    Answers the first request on each connection, then closes the connection
+    without answering the next, like a server timing out an idle keep-alive
+    connection just as a request goes out on it
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.served = 0
+
+    def _serve(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.served += 1
+        if self.served > 1:
+            self.close_connection = True
+            return
+        body = json.dumps({"customerNumber": "1"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _serve
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+class TestWarmUp(unittest.TestCase):
+    def test_opens_and_reuses_connections(self) -> None:
+        events: list[RequestEvent] = []
+        with https_stand_in({"customerNumber": "1"}) as (server, base_url, certfile):
+            client = Client(**CREDENTIALS, api_url=base_url, pool_maxsize=4, hooks=[events.append])
+            self.addCleanup(client.close)
+            client.session.verify = str(certfile)
+            client.session.trust_env = False
+
+            self.assertEqual(client.warm_up(3), 3)
+            self.assertTrue(wait_for(lambda: server.connections == 3))
+            self.assertEqual(client.warm_up(3), 0)
+            self.assertEqual(client.warm_up(10), 1)
+
+            client.get_customer("1")
+            (attempt,) = [event for event in events if isinstance(event, AttemptEvent)]
+            self.assertIsNone(attempt.connect)
+            self.assertEqual(server.connections, 4)
+
+    def test_refresh_reopens_idle_connections(self) -> None:
+        with https_stand_in({}) as (server, base_url, certfile):
+            transport = Urllib3Transport(ca_certs=str(certfile))
+            self.addCleanup(transport.close)
+            self.assertEqual(transport.warm_up(base_url, 2), 2)
+            self.assertEqual(transport.refresh(base_url, max_idle=60), 0)
+            self.assertEqual(transport.refresh(base_url, max_idle=0), 2)
+            self.assertTrue(wait_for(lambda: server.connections == 4))
+
+    def test_fresh_connections_stay_usable_while_stale_ones_reconnect(self) -> None:
+        with https_stand_in({}) as (_, base_url, certfile):
+            transport = Urllib3Transport(ca_certs=str(certfile))
+            self.addCleanup(transport.close)
+            transport.warm_up(base_url, 2)
+            pool = transport._connection_pool(base_url)
+            stale, fresh = [conn for conn in pool.pool.queue if conn is not None]
+            stale.idle_since -= 120
+            idle_while_reconnecting = []
+
+            def reconnect(connections: list, timeout: float) -> None:
+                idle_while_reconnecting.extend(conn for conn in pool.pool.queue if conn is not None)
+                real_reconnect(connections, timeout)
+
+            with mock.patch("payway.transport._reconnect", reconnect):
+                self.assertEqual(transport.refresh(base_url, max_idle=60), 1)
+            self.assertEqual(idle_while_reconnecting, [fresh])
+            self.assertEqual({conn for conn in pool.pool.queue if conn is not None}, {stale, fresh})
+
+    def test_background_keep_alive(self) -> None:
+        with https_stand_in({}) as (server, base_url, certfile):
+            transport = Urllib3Transport(ca_certs=str(certfile))
+            client = Client(**CREDENTIALS, api_url=base_url, transport=transport, keep_alive=0.1)
+            client.warm_up(1)
+            self.assertTrue(wait_for(lambda: server.connections >= 3))
+            client.close()
+            self.assertFalse(client.keep_alive._thread.is_alive())  # noqa: SLF001
+
+    def test_unreachable_host_raises(self) -> None:
+        client = Client(**CREDENTIALS, api_url="http://127.0.0.1:1/rest/v1")
+        self.addCleanup(client.close)
+        with self.assertRaises(requests.ConnectionError):
+            client.warm_up(1)
+
+
+class TestStaleConnections(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), DropsReusedConnections)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/rest/v1"
+        self.client = Client(**CREDENTIALS, api_url=self.base_url)
+        self.addCleanup(self.client.close)
+        self.client.get_customer("1")
+
+    def test_gets_are_resent_once(self) -> None:
+        customer, errors = self.client.get_customer("1")
+        self.assertEqual((customer.customer_number, errors), ("1", None))
+
+    def test_posts_are_resent_only_with_an_idempotency_key(self) -> None:
+        response = self.client.post_request(self.client.customer_url, {"customerName": "Jo"}, idempotency_key="key-1")
+        self.assertEqual(response.status_code, 200)
+        self.client.get_customer("1")
+        with self.assertRaises(requests.ConnectionError):
+            self.client.post_request(self.client.customer_url, {"customerName": "Jo"})
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+import unittest
+
+import requests
+
+from payway.async_client import AsyncClient
+from payway.client import Client
+from payway.exceptions import PaywayError
+from payway.metrics import Metrics, operation_name
+from payway.model import PayWayPayment
+from payway.retry import RetryPolicy
+from payway.test_utils import CREDENTIALS, make_card
+from payway.testing.emulator import Emulator
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self) -> None:
+        metrics = Metrics(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            metrics.observe("get_customer", "200", "ok", seconds)
+        histogram = metrics.snapshot().calls["get_customer", "200", "ok"]
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 3.65)
+        self.assertEqual(histogram.buckets, ((0.1, 2), (1.0, 3), (float("inf"), 4)))
+
+    def test_threads_record_into_their_own_shards(self) -> None:
+        metrics = Metrics()
+
+        def record() -> None:
+            for _ in range(1000):
+                metrics.observe("process_payment", "200", "ok", 0.2)
+                metrics.count_response_code("process_payment", "08")
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot.calls["process_payment", "200", "ok"].count, 4000)
+        self.assertEqual(snapshot.response_codes["process_payment", "08"], 4000)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot().calls, {})
+
+    def test_exited_threads_shards_are_folded_together(self) -> None:
+        metrics = Metrics()
+        for _ in range(20):
+            thread = threading.Thread(target=metrics.observe, args=("get_transaction", "200", "ok", 0.1))
+            thread.start()
+            thread.join()
+        metrics.observe("get_transaction", "200", "ok", 0.1)
+        self.assertEqual(metrics.snapshot().calls["get_transaction", "200", "ok"].count, 21)
+        self.assertEqual(len(metrics._shards), 1)
+
+    def test_threads_keep_recording_across_a_reset(self) -> None:
+        metrics = Metrics()
+        recorded, reset = threading.Event(), threading.Event()
+
+        def record() -> None:
+            metrics.observe("get_customer", "200", "ok", 0.1)
+            recorded.set()
+            reset.wait()
+            metrics.observe("get_customer", "200", "ok", 0.1)
+
+        thread = threading.Thread(target=record)
+        thread.start()
+        recorded.wait()
+        metrics.reset()
+        reset.set()
+        thread.join()
+        self.assertEqual(metrics.snapshot().calls["get_customer", "200", "ok"].count, 1)
+
+    def test_operation_names(self) -> None:
+        base = "https://api.payway.com.au/rest/v1"
+        self.assertEqual(operation_name("POST", f"{base}/transactions", "payment"), "process_payment")
+        self.assertEqual(operation_name("POST", f"{base}/transactions", "refund"), "refund_transaction")
+        self.assertEqual(operation_name("GET", f"{base}/transactions/12", "refund"), "get_transaction")
+        self.assertEqual(operation_name("GET", f"{base}/transactions/search-order?orderNumber=1"), "search_transactions_by_order")
+        self.assertEqual(operation_name("GET", f"{base}/customers"), "list_customers")
+        self.assertEqual(operation_name("POST", f"{base}/surcharges"), "POST /")
+
+    def test_exposition(self) -> None:
+        metrics = Metrics(buckets=(0.5,))
+        metrics.observe("void_transaction", "503", "retried_failed", 0.25)
+        metrics.count_response_code("process_payment", "00")
+        labels = 'operation="void_transaction",status="503",retry="retried_failed"'
+        self.assertEqual(
+            metrics.exposition().splitlines()[2:],
+            [
+                f'payway_request_duration_seconds_bucket{{{labels},le="0.5"}} 1',
+                f'payway_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1',
+                f"payway_request_duration_seconds_sum{{{labels}}} 0.25",
+                f"payway_request_duration_seconds_count{{{labels}}} 1",
+                "# HELP payway_response_codes_total PayWay transactions by response code.",
+                "# TYPE payway_response_codes_total counter",
+                'payway_response_codes_total{operation="process_payment",response_code="00"} 1',
+            ],
+        )
+
+
+class TestClientMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.emulator = Emulator(seed=1).start()
+        self.addCleanup(self.emulator.stop)
+        self.metrics = Metrics()
+        self.client = Client(
+            **CREDENTIALS, api_url=self.emulator.url, retry_policy=RetryPolicy(max_retries=1, base_delay=0), metrics=self.metrics
+        )
+        self.addCleanup(self.client.close)
+
+    def test_calls_statuses_retries_and_response_codes(self) -> None:
+        token, _ = self.client.create_card_token(make_card())
+        transaction, _ = self.client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+        self.client.refund_transaction(transaction.transaction_id, amount=5)
+        self.emulator.fail_next(503, retry_after=0)
+        self.client.get_transaction(transaction.transaction_id)
+        self.emulator.fail_next(503, times=2, retry_after=0)
+        with self.assertRaises(PaywayError):
+            self.client.list_customers()
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(
+            {key: histogram.count for key, histogram in snapshot.calls.items()},
+            {
+                ("create_token", "200", "ok"): 1,
+                ("process_payment", "200", "ok"): 1,
+                ("refund_transaction", "200", "ok"): 1,
+                ("get_transaction", "200", "retried_ok"): 1,
+                ("list_customers", "503", "retried_failed"): 1,
+            },
+        )
+        self.assertEqual(
+            snapshot.response_codes,
+            {("process_payment", "08"): 1, ("refund_transaction", "08"): 1, ("get_transaction", "08"): 1},
+        )
+
+    def test_thread_pools_dont_pile_up_shards(self) -> None:
+        for _ in range(20):
+            self.client.get_transactions([1, 2, 3])
+        self.metrics.snapshot()
+        self.assertLessEqual(len(self.metrics._shards), 1)
+        self.assertEqual(sum(histogram.count for histogram in self.metrics.snapshot().calls.values()), 60)
+
+    def test_network_errors_are_labelled_with_the_exception(self) -> None:
+        self.emulator.stop()
+        with self.assertRaises(requests.ConnectionError):
+            self.client.get_customer("1")
+        ((key, histogram),) = self.metrics.snapshot().calls.items()
+        self.assertEqual(key, ("get_customer", "ConnectionError", "retried_failed"))
+        self.assertEqual(histogram.count, 1)
+
+
+class TestAsyncClientMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_are_recorded(self) -> None:
+        metrics = Metrics()
+        with Emulator() as emulator:
+            async with AsyncClient(**CREDENTIALS, api_url=emulator.url, metrics=metrics) as client:
+                token, _ = await client.create_card_token(make_card())
+                await client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+        snapshot = metrics.snapshot()
+        self.assertEqual(set(snapshot.calls), {("create_token", "200", "ok"), ("process_payment", "200", "ok")})
+        self.assertEqual(snapshot.response_codes, {("process_payment", "08"): 1})
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import unittest
+
+from benchmarks.microbench import cases, confirm, regressions, transaction_page
+
+
+def result(relative: float) -> dict:
+    return {"seconds": relative / 1000, "calibration": 0.001, "relative": relative}
+
+
+class TestRegressionGate(unittest.TestCase):
+    def test_regressions_use_calibrated_times(self) -> None:
+        baseline = {"cases": {"a": result(10), "b": result(10)}}
+        current = {"cases": {"a": result(12), "b": result(14), "new": result(100)}}
+        self.assertEqual(list(regressions(current, baseline, 0.25)), ["b"])
+        self.assertEqual(regressions(current, baseline, 0.5), {})
+
+    def test_a_regression_must_repeat_to_count(self) -> None:
+        baseline = {"cases": {"transaction.to_dict": result(1e9)}}
+        current = {"cases": {"transaction.to_dict": result(2e9)}}
+        selected = {"transaction.to_dict": cases(1)["transaction.to_dict"]}
+        self.assertEqual(confirm(selected, current, baseline, 0.25, 1), {})
+        self.assertLess(current["cases"]["transaction.to_dict"]["relative"], 1e9)
+
+    def test_cases_run(self) -> None:
+        for name, function in cases(3).items():
+            with self.subTest(name):
+                function()
+        self.assertEqual(len({row["transactionId"] for row in transaction_page(3)["data"]}), 3)
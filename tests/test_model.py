@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import copy
+import pickle
+import unittest
+from dataclasses import dataclass, field
+
+from payway.constants import RawBody
+from payway.model import Merchant, PayWayCard, PayWayCustomer, PayWayPayment, PayWayTransaction
+from payway.test_utils import load_json_file
+
+
+class TestModelCodec(unittest.TestCase):
+    def test_codec_is_compiled_once_per_class(self) -> None:
+        PayWayTransaction.from_dict({})
+        codec = PayWayTransaction.__dict__["_payway_codec"]
+        PayWayTransaction.from_dict(load_json_file("tests/data/transaction.json"))
+        self.assertIs(PayWayTransaction._codec(), codec)
+
+    def test_subclass_gets_its_own_codec(self) -> None:
+        @dataclass
+        class TaggedPayment(PayWayPayment):
+            tag: str | None = field(default=None, metadata={"alias": "customTag"})
+
+        payment = TaggedPayment(transaction_type="payment", tag="vip")
+        self.assertEqual(payment.to_dict()["customTag"], "vip")
+        self.assertNotIn("customTag", PayWayPayment(transaction_type="payment").to_dict())
+
+    def test_aliases_and_converters(self) -> None:
+        data = load_json_file("tests/data/card_transaction.json")
+        transaction = PayWayTransaction.from_dict(data)
+        self.assertIsInstance(transaction.card, PayWayCard)
+        self.assertEqual(transaction.ip_address, data.get("customerIpAddress"))
+        self.assertEqual(transaction.to_dict()["creditCard"], transaction.card.to_dict())
+
+
+class TestLazyParsing(unittest.TestCase):
+    def test_nested_models_are_built_on_first_read(self) -> None:
+        data = {**load_json_file("tests/data/card_transaction.json"), "merchant": "not an object"}
+        # building the merchant would fail, so lazy parsing must not touch it until it is read
+        transaction = PayWayTransaction.from_dict(data, lazy=True)
+        with self.assertRaises(AttributeError):
+            transaction.merchant
+        card = transaction.card
+        self.assertIsInstance(card, PayWayCard)
+        self.assertIs(transaction.card, card)
+
+    def test_lazy_and_eager_results_match(self) -> None:
+        data = load_json_file("tests/data/card_transaction.json")
+        self.assertEqual(PayWayTransaction.from_dict(data, lazy=True), PayWayTransaction.from_dict(data))
+        customer = load_json_file("tests/data/customer.json")
+        self.assertEqual(PayWayCustomer.from_dict(customer, lazy=True), PayWayCustomer.from_dict(customer))
+
+    def test_missing_nested_value_is_none(self) -> None:
+        transaction = PayWayTransaction.from_dict({"transactionId": 1}, lazy=True)
+        self.assertIsNone(transaction.card)
+        self.assertIsNone(transaction.merchant)
+
+
+class TestCompactModels(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = load_json_file("tests/data/card_transaction.json")
+
+    def test_models_have_no_instance_dict(self) -> None:
+        transaction = PayWayTransaction.from_dict(self.data)
+        self.assertFalse(hasattr(transaction, "__dict__"))
+        self.assertFalse(hasattr(transaction.card, "__dict__"))
+
+    def test_compressed_raw_reads_back_unchanged(self) -> None:
+        transaction = PayWayTransaction.from_dict(self.data, raw_body=RawBody.COMPRESS)
+        self.assertEqual(transaction.raw, self.data)
+        self.assertIsNone(transaction.card.raw)
+
+    def test_dropped_raw(self) -> None:
+        for lazy in (False, True):
+            transaction = PayWayTransaction.from_dict(self.data, lazy=lazy, raw_body=RawBody.DROP)
+            self.assertIsNone(transaction.raw)
+            self.assertIsNone(transaction.card.raw)
+            self.assertEqual(transaction, PayWayTransaction.from_dict(self.data))
+
+    def test_copy_and_pickle_keep_fields_and_raw(self) -> None:
+        transaction = PayWayTransaction.from_dict(self.data, lazy=True)
+        for clone in (copy.deepcopy(transaction), pickle.loads(pickle.dumps(transaction))):  # noqa: S301
+            self.assertEqual(clone, transaction)
+            self.assertEqual(clone.raw, self.data)
+
+    def test_unslotted_subclass_with_nested_field(self) -> None:
+        @dataclass
+        class ReconciledTransaction(PayWayTransaction):
+            settlement_merchant: Merchant | None = field(default=None, metadata={"from_dict": Merchant.from_dict})
+
+        data = {**self.data, "settlementMerchant": {"merchantId": "4638116"}}
+        transaction = ReconciledTransaction.from_dict(data, lazy=True)
+        self.assertEqual(transaction.settlement_merchant.merchant_id, "4638116")
+        self.assertIsInstance(transaction.card, PayWayCard)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from payway.client import Client
+from payway.constants import TRANSACTION_URL, EndpointFamily
+from payway.exceptions import PaywayError
+from payway.ratelimit import RateLimiter, TokenBucket
+from payway.utils import endpoint_family
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(10, burst=2, recovery_time=10, clock=self.clock)
+
+    def test_burst_then_rate(self) -> None:
+        self.assertEqual(self.bucket.take(), 0)
+        self.assertEqual(self.bucket.take(), 0)
+        self.assertAlmostEqual(self.bucket.take(), 0.1)
+        self.clock.now += 0.1
+        self.assertEqual(self.bucket.take(), 0)
+
+    def test_throttle_honours_retry_after_and_recovers(self) -> None:
+        self.bucket.throttled(retry_after=3)
+        self.assertEqual(self.bucket.rate, 5)
+        self.assertAlmostEqual(self.bucket.take(), 3)
+        self.clock.now += 3
+        self.assertEqual(self.bucket.take(), 0)
+        self.assertEqual(self.bucket.rate, 8)
+        self.clock.now += 60
+        self.bucket.take()
+        self.assertEqual(self.bucket.rate, 10)
+
+    def test_rejects_rates_that_would_never_refill(self) -> None:
+        for rate, burst in ((0, None), (-1, None), (float("nan"), None), (5, 0.5)):
+            with self.subTest(rate=rate, burst=burst), self.assertRaises(ValueError):
+                TokenBucket(rate, burst)
+
+    def test_rate_never_drops_to_zero(self) -> None:
+        for _ in range(20):
+            self.bucket.throttled()
+        self.assertAlmostEqual(self.bucket.rate, 10 * TokenBucket.min_rate_fraction)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_endpoint_families(self) -> None:
+        self.assertEqual(endpoint_family(f"{TRANSACTION_URL}/search-customer"), EndpointFamily.TRANSACTIONS)
+        self.assertEqual(endpoint_family("https://api.payway.com.au/rest/v1/customers/1/payment-setup"), EndpointFamily.CUSTOMERS)
+        self.assertEqual(endpoint_family("https://api.payway.com.au/rest/v1/single-use-tokens"), EndpointFamily.TOKENS)
+        self.assertIsNone(endpoint_family("https://api.payway.com.au/rest/v1/"))
+
+    def test_threads_share_one_budget(self) -> None:
+        limiter = RateLimiter({"transactions": 200}, burst=5)
+        sent = []
+
+        def worker() -> None:
+            for _ in range(5):
+                limiter.acquire(EndpointFamily.TRANSACTIONS)
+                sent.append(time.monotonic())
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # 40 requests with a burst of 5 need at least 35 refills at 200/s
+        self.assertEqual(len(sent), 40)
+        self.assertGreaterEqual(max(sent) - start, 35 / 200 * 0.9)
+
+    def test_rejects_a_zero_rate(self) -> None:
+        with self.assertRaisesRegex(ValueError, "rate must be more than 0"):
+            RateLimiter({"transactions": 20, "customers": 0})
+
+    def test_unlisted_families_are_not_limited(self) -> None:
+        limiter = RateLimiter({"customers": 1})
+        for _ in range(100):
+            limiter.acquire(EndpointFamily.TRANSACTIONS)
+            limiter.acquire(None)
+
+
+class TestAsyncRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_waits_with_asyncio_sleep(self) -> None:
+        clock = FakeClock()
+        limiter = RateLimiter({"tokens": 10}, burst=1, clock=clock)
+        sleep = Mock()
+
+        async def advance(seconds: float) -> None:
+            sleep(seconds)
+            clock.now += seconds
+
+        with patch("asyncio.sleep", advance):
+            await limiter.aacquire(EndpointFamily.TOKENS)
+            await limiter.aacquire(EndpointFamily.TOKENS)
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args.args[0], 0.1)
+
+
+class TestClientRateLimiting(unittest.TestCase):
+    @patch("requests.Session.get")
+    def test_throttled_responses_slow_the_family_down(self, mock_get) -> None:
+        limiter = RateLimiter({"transactions": 10, "customers": 10})
+        client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            rate_limiter=limiter,
+        )
+        mock_get.return_value.status_code = 429
+        mock_get.return_value.headers = {"Retry-After": "2"}
+        with self.assertRaises(PaywayError):
+            client.get_transaction(1)
+        transactions = limiter.buckets[EndpointFamily.TRANSACTIONS]
+        self.assertEqual(transactions.rate, 5)
+        self.assertGreater(transactions.blocked_until, time.monotonic() + 1)
+        self.assertEqual(limiter.buckets[EndpointFamily.CUSTOMERS].rate, 10)
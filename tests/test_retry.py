@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import Mock, patch
+
+import requests
+
+from payway.client import Client
+from payway.retry import LinearRetryPolicy, RetryBudget, RetryPolicy
+from payway.test_utils import load_json_file
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_full_jitter_exponential_backoff(self) -> None:
+        policy = RetryPolicy(base_delay=0.5, max_delay=3.0, random=lambda: 1.0)
+        self.assertEqual([policy.backoff(attempt) for attempt in range(5)], [0.5, 1.0, 2.0, 3.0, 3.0])
+        policy.random = lambda: 0.25
+        self.assertEqual(policy.backoff(2), 0.5)
+
+    def test_retry_after_wins_over_backoff(self) -> None:
+        call = RetryPolicy(random=lambda: 1.0).call(can_retry=True)
+        self.assertEqual(call.next_wait(7.0), 7.0)
+
+    def test_stops_after_max_retries_or_when_not_retryable(self) -> None:
+        call = RetryPolicy(max_retries=2).call(can_retry=True)
+        self.assertIsNotNone(call.next_wait(None))
+        self.assertIsNotNone(call.next_wait(None))
+        self.assertIsNone(call.next_wait(None))
+        self.assertIsNone(RetryPolicy(max_retries=2).call(can_retry=False).next_wait(None))
+
+    def test_budget_caps_retries_to_a_share_of_requests(self) -> None:
+        budget = RetryBudget(ratio=0.1, reserve=2)
+        policy = RetryPolicy(max_retries=1, budget=budget)
+        allowed = sum(policy.call(can_retry=True).next_wait(None) is not None for _ in range(100))
+        # the two banked retries, then one per ten requests
+        self.assertLessEqual(allowed, 2 + 10)
+        self.assertGreaterEqual(allowed, 10)
+
+    def test_wait_past_the_deadline_is_refused(self) -> None:
+        clock = FakeClock()
+        call = RetryPolicy(deadline=5.0, clock=clock, random=lambda: 1.0).call(can_retry=True)
+        clock.now = 4.0
+        self.assertIsNone(call.next_wait(2.0))
+        self.assertEqual(call.next_wait(0.5), 0.5)
+
+    def test_one_stale_connection_resend_for_safe_requests(self) -> None:
+        policy = RetryPolicy(max_retries=0)
+        call = policy.call(can_retry=True)
+        self.assertTrue(call.resend_stale())
+        self.assertFalse(call.resend_stale())
+        self.assertEqual(call.number, 2)
+        self.assertFalse(policy.call(can_retry=False).resend_stale())
+
+    def test_linear_policy_keeps_the_original_schedule(self) -> None:
+        policy = LinearRetryPolicy(3, base_delay=0.1)
+        call = policy.call(can_retry=True)
+        waits = [call.next_wait(None) for _ in range(3)]
+        self.assertEqual([round(wait, 6) for wait in waits], [0.1, 0.2, 0.3])
+        self.assertIsNone(call.next_wait(None))
+
+
+class TestClientDeadline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+            connect_timeout=5,
+            read_timeout=30,
+            retry_policy=RetryPolicy(max_retries=5, deadline=12.0, clock=self.clock, random=lambda: 1.0),
+        )
+
+    @patch("payway.client.time.sleep")
+    @patch("requests.Session.get")
+    def test_later_attempts_get_shorter_timeouts(self, mock_get, mock_sleep) -> None:
+        mock_sleep.side_effect = self.clock.sleep
+        success = Mock(status_code=200)
+        success.json.return_value = load_json_file("tests/data/transaction.json")
+
+        def timeout_then_success(*args: object, **kwargs: object) -> Mock:
+            if mock_get.call_count < 3:
+                self.clock.now += 4
+                raise requests.Timeout
+            return success
+
+        mock_get.side_effect = timeout_then_success
+        transaction, _ = self.client.get_transaction(1)
+        self.assertEqual(transaction.status, "approved")
+        # 4s per timed-out attempt plus 0.5s then 1s of backoff
+        timeouts = [call.kwargs["timeout"] for call in mock_get.call_args_list]
+        self.assertEqual(timeouts, [(5, 12.0), (5, 7.5), (2.5, 2.5)])
+
+    @patch("payway.client.time.sleep")
+    @patch("requests.Session.get")
+    def test_gives_up_when_the_deadline_is_spent(self, mock_get, mock_sleep) -> None:
+        mock_sleep.side_effect = self.clock.sleep
+
+        def timeout(*args: object, **kwargs: object) -> None:
+            self.clock.now += 6
+            raise requests.Timeout
+
+        mock_get.side_effect = timeout
+        with self.assertRaises(requests.Timeout):
+            self.client.get_transaction(1)
+        self.assertEqual(mock_get.call_count, 2)
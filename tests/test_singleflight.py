@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import httpx
+
+from payway.client import Client
+from payway.singleflight import AsyncSingleFlight, SingleFlight, request_key
+from payway.test_utils import load_json_file
+from tests.test_async_client import AsyncClientTestCase
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_fetch(self) -> None:
+        flight: SingleFlight[int] = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch() -> int:
+            calls.append(1)
+            release.wait(5)
+            return 42
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flight.do, "key", fetch) for _ in range(5)]
+            while flight.shared < 4:
+                threading.Event().wait(0.001)
+            release.set()
+            results = [future.result() for future in futures]
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(len(calls), 1)
+        # once it has landed, the next call fetches again
+        self.assertEqual(flight.do("key", lambda: 7), 7)
+
+    def test_errors_are_shared_too(self) -> None:
+        flight: SingleFlight[int] = SingleFlight()
+
+        def fetch() -> int:
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            flight.do("key", fetch)
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+    def test_request_key_ignores_param_order(self) -> None:
+        self.assertEqual(request_key("/a", {"x": 1, "y": 2}), request_key("/a", {"y": 2, "x": 1}))
+        self.assertNotEqual(request_key("/a", {"page": 1}), request_key("/a", {"page": 2}))
+        self.assertEqual(request_key("/a", None), request_key("/a", {}))
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_cancelling_one_waiter_keeps_the_request_for_the_others(self) -> None:
+        flight: AsyncSingleFlight[int] = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def fetch() -> int:
+            calls.append(1)
+            await release.wait()
+            return 42
+
+        leader = asyncio.create_task(flight.do("key", fetch))
+        follower = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        self.assertEqual(await follower, 42)
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.shared, 1)
+
+
+class TestClientCoalescing(unittest.TestCase):
+    @patch("requests.Session.get")
+    def test_concurrent_get_transaction_sends_one_request(self, mock_get) -> None:
+        client = Client(
+            merchant_id="TEST",
+            bank_account_id="0000000A",
+            publishable_api_key="TPUBLISHABLE-API-KEY",
+            secret_api_key="TPUBLISHABLE-SECRET",
+        )
+        release = threading.Event()
+        response = Mock(status_code=200)
+        response.json.return_value = load_json_file("tests/data/transaction.json")
+
+        def slow_get(*args: object, **kwargs: object) -> Mock:
+            release.wait(5)
+            return response
+
+        mock_get.side_effect = slow_get
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(client.get_transaction, 1) for _ in range(4)]
+            while client.single_flight.shared < 3:
+                threading.Event().wait(0.001)
+            release.set()
+            statuses = [future.result()[0].status for future in futures]
+        self.assertEqual(statuses, ["approved"] * 4)
+        self.assertEqual(mock_get.call_count, 1)
+
+
+class TestAsyncClientCoalescing(AsyncClientTestCase):
+    async def test_concurrent_gets_send_one_request(self) -> None:
+        client = self.make_client([httpx.Response(200, json=self.transaction_json)])
+        results = await asyncio.gather(*(client.get_transaction(1) for _ in range(3)))
+        self.assertEqual([transaction.status for transaction, _ in results], ["approved"] * 3)
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_can_be_turned_off(self) -> None:
+        client = self.make_client([httpx.Response(200, json=self.transaction_json)] * 2, coalesce_gets=False)
+        await asyncio.gather(*(client.get_transaction(1) for _ in range(2)))
+        self.assertEqual(len(self.requests), 2)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from payway.client import Client
+from payway.exceptions import PaywayError
+from payway.model import PayWayTransaction
+from payway.pagination import next_page_number
 from payway.test_utils import load_json_file
 
 
@@ -30,6 +33,7 @@ class TestTransactionRequest(unittest.TestCase):
         mock_get.assert_called_once_with(
             "https://api.payway.com.au/rest/v1/transactions/search-customer",
             params={"customerNumber": 1, "page": None},
+            timeout=self.client.timeout,
         )
         self.assertIsNotNone(response["data"])
 
@@ -41,6 +45,7 @@ class TestTransactionRequest(unittest.TestCase):
         mock_get.assert_called_once_with(
             "https://api.payway.com.au/rest/v1/transactions/search-customer",
             params={"customerNumber": 1, "page": 2},
+            timeout=self.client.timeout,
         )
 
     @patch("requests.Session.get")
@@ -51,6 +56,7 @@ class TestTransactionRequest(unittest.TestCase):
         mock_get.assert_called_once_with(
             "https://api.payway.com.au/rest/v1/transactions/search-receipt",
             params={"receiptNumber": "1234567", "page": None},
+            timeout=self.client.timeout,
         )
         self.assertIsNotNone(response["data"])
 
@@ -62,5 +68,39 @@ class TestTransactionRequest(unittest.TestCase):
         mock_get.assert_called_once_with(
             "https://api.payway.com.au/rest/v1/transactions/search-order",
             params={"orderNumber": "ORDER-1", "page": None},
+            timeout=self.client.timeout,
         )
         self.assertIsNotNone(response["data"])
+
+    @patch("requests.Session.get")
+    def test_iter_transactions_by_customer_follows_next_links(self, mock_get) -> None:
+        page = load_json_file("tests/data/transactions.json")
+        first = Mock(status_code=200)
+        first.json.return_value = {
+            **page,
+            "links": [{"rel": "next", "href": "https://api.payway.com.au/rest/v1/transactions/search-customer?page=2"}],
+        }
+        second = Mock(status_code=200)
+        second.json.return_value = {**page, "links": [{"rel": "prev", "href": "...?page=1"}]}
+        mock_get.side_effect = [first, second]
+
+        transactions = list(self.client.iter_transactions_by_customer(1))
+
+        self.assertEqual(len(transactions), 2)
+        self.assertIsInstance(transactions[0], PayWayTransaction)
+        self.assertEqual(transactions[0].transaction_id, 1179985404)
+        pages = [call.kwargs["params"]["page"] for call in mock_get.call_args_list]
+        self.assertEqual(pages, [None, 2])
+
+    @patch("requests.Session.get")
+    def test_iter_transactions_raises_on_error_pages(self, mock_get) -> None:
+        mock_get.return_value = Mock(status_code=422, text="invalid")
+        with self.assertRaises(PaywayError):
+            list(self.client.iter_transactions_by_order("ORDER-1"))
+
+    def test_next_page_number(self) -> None:
+        self.assertEqual(
+            next_page_number({"links": [{"rel": "next", "href": "https://api.payway.com.au/rest/v1/customers?page=3"}]}),
+            3,
+        )
+        self.assertIsNone(next_page_number({"data": []}))
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import socket
+import ssl
+import threading
+import time
+import unittest
+from importlib.util import find_spec
+
+import httpx
+import requests
+
+from benchmarks._server import h2_stand_in
+from payway.async_client import AsyncClient
+from payway.client import Client
+from payway.model import PayWayPayment
+from payway.retry import RetryPolicy
+from payway.test_utils import CREDENTIALS, make_card
+from payway.testing.emulator import Emulator
+from payway.transport import HTTP2Transport, InMemoryTransport, RequestsTransport, Response, Urllib3Transport
+
+# HTTP2Transport and the HTTP/2 stand-in need python-payway[http2]
+needs_h2 = unittest.skipUnless(find_spec("h2"), "needs h2: pip install 'python-payway[http2]'")
+
+
+def closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/rest/v1"
+
+
+class TestInMemoryTransport(unittest.TestCase):
+    def test_requests_are_encoded_like_requests_does(self) -> None:
+        transport = InMemoryTransport(lambda request: Response.from_json(200, {"customerNumber": "1"}))
+        client = Client(**CREDENTIALS, transport=transport)
+        client.put_request(f"{client.customer_url}/1/contact", {"customerName": "Jo", "emailAddress": None})
+        client.get_request(client.customer_url, params={"page": 2, "unused": None})
+
+        put, get = transport.requests
+        self.assertEqual((put.method, put.url), ("PUT", f"{client.customer_url}/1/contact"))
+        self.assertEqual(put.form, {"customerName": "Jo"})
+        self.assertEqual(put.headers["content-type"], "application/x-www-form-urlencoded")
+        self.assertTrue(put.headers["Authorization"].startswith("Basic "))
+        self.assertEqual(get.params, {"page": "2"})
+
+    def test_token_requests_use_the_publishable_key(self) -> None:
+        transport = InMemoryTransport(lambda request: Response.from_json(200, {"singleUseTokenId": "abc"}))
+        client = Client(**CREDENTIALS, transport=transport)
+        token, errors = client.create_card_token(make_card())
+        self.assertEqual((token.token, errors), ("abc", None))
+        expected = "Basic " + base64.b64encode(b"TPUBLISHABLE-API-KEY:").decode()
+        self.assertEqual(transport.requests[0].headers["Authorization"], expected)
+
+    def test_emulator_without_sockets(self) -> None:
+        emulator = Emulator(seed=1)
+        client = Client(
+            **CREDENTIALS,
+            api_url=emulator.url,
+            transport=emulator.transport(),
+            retry_policy=RetryPolicy(max_retries=1, base_delay=0),
+        )
+        token, _ = client.create_card_token(make_card())
+        transaction, errors = client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+        self.assertIsNone(errors)
+        emulator.fail_next(503, retry_after=0)
+        fetched, errors = client.get_transaction(transaction.transaction_id)
+        self.assertEqual((fetched.transaction_id, errors), (transaction.transaction_id, None))
+        self.assertEqual(emulator.request_count, 4)
+
+
+class TestUrllib3Transport(unittest.TestCase):
+    def test_calls_through_the_emulator(self) -> None:
+        with Emulator() as emulator:
+            client = Client(**CREDENTIALS, api_url=emulator.url, transport=Urllib3Transport())
+            self.addCleanup(client.close)
+            token, _ = client.create_card_token(make_card())
+            transaction, errors = client.process_payment(PayWayPayment(transaction_type="payment", token=token.token, amount=10))
+            self.assertIsNone(errors)
+            self.assertEqual(client.get_transaction(transaction.transaction_id)[0].status, "approved")
+            customers = client.list_customers()
+            self.assertEqual(customers["data"], [])
+
+    def test_network_errors_raise_requests_exceptions(self) -> None:
+        client = Client(**CREDENTIALS, api_url=closed_port_url(), transport=Urllib3Transport())
+        self.addCleanup(client.close)
+        with self.assertRaises(requests.ConnectionError):
+            client.get_customer("1")
+
+    def test_read_timeouts_raise_requests_timeout(self) -> None:
+        with Emulator(latency=lambda: 0.5) as emulator:
+            client = Client(**CREDENTIALS, api_url=emulator.url, transport=Urllib3Transport(), read_timeout=0.05)
+            self.addCleanup(client.close)
+            with self.assertRaises(requests.Timeout):
+                client.get_customer("1")
+
+
+@needs_h2
+class TestHTTP2Transport(unittest.TestCase):
+    def test_concurrent_calls_share_one_connection(self) -> None:
+        with h2_stand_in({"transactionId": 1}, latency=0.05) as (server, base_url, certfile):
+            client = Client(
+                **CREDENTIALS,
+                api_url=base_url,
+                coalesce_gets=False,
+                transport=HTTP2Transport(max_connections=1, ca_certs=str(certfile)),
+            )
+            self.addCleanup(client.close)
+            statuses = []
+            threads = [
+                threading.Thread(target=lambda: statuses.append(client.get_request(f"{base_url}/transactions/1").status_code))
+                for _ in range(20)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(statuses, [200] * 20)
+            self.assertEqual(server.connections, 1)
+
+    def test_streams_are_capped(self) -> None:
+        with h2_stand_in({}, latency=0.1) as (_, base_url, certfile):
+            transport = HTTP2Transport(max_streams=2, ca_certs=str(certfile))
+            self.addCleanup(transport.close)
+            threads = [threading.Thread(target=transport.get, args=(base_url,), kwargs={"timeout": (5, 5)}) for _ in range(4)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertGreaterEqual(time.perf_counter() - started, 0.2)
+
+    def test_network_errors_raise_requests_exceptions(self) -> None:
+        client = Client(**CREDENTIALS, api_url=closed_port_url(), transport=HTTP2Transport())
+        self.addCleanup(client.close)
+        with self.assertRaises(requests.ConnectionError):
+            client.get_customer("1")
+
+
+@needs_h2
+class TestAsyncHTTP2(unittest.IsolatedAsyncioTestCase):
+    async def test_streams_over_one_connection(self) -> None:
+        with h2_stand_in({"customerNumber": "1"}, latency=0.05) as (server, base_url, certfile):
+            verify = ssl.create_default_context(cafile=str(certfile))
+            transport = httpx.AsyncHTTPTransport(http2=True, verify=verify, limits=httpx.Limits(max_connections=1))
+            async with AsyncClient(
+                **CREDENTIALS, api_url=base_url, coalesce_gets=False, transport=transport, max_streams=5
+            ) as client:
+                responses = await asyncio.gather(*(client.get_request(f"{base_url}/customers/1") for _ in range(10)))
+            self.assertEqual({response.http_version for response in responses}, {"HTTP/2"})
+            self.assertEqual(server.connections, 1)
+
+
+class TestDefaultTransport(unittest.TestCase):
+    def test_requests_session_with_the_secret_key(self) -> None:
+        client = Client(**CREDENTIALS, pool_maxsize=4)
+        self.assertIsInstance(client.session, RequestsTransport)
+        self.assertEqual(client.session.auth, ("TSECRET-API-KEY", ""))
+        self.assertEqual(client.session.get_adapter("https://").poolmanager.connection_pool_kw["maxsize"], 4)